@@ -3,8 +3,11 @@ from sqlalchemy import create_engine
 
 from src.config import DATABASE_URL
 from src.database import Base
+from src.note import model as note_model  # noqa: F401
+from src.user import model as user_model  # noqa: F401
 
-engine = create_engine(DATABASE_URL)
+# Migrations run synchronously, so swap the async driver for psycopg2.
+engine = create_engine(DATABASE_URL.replace("+asyncpg", ""))
 
 
 def run_migrations_online():
@@ -12,9 +15,11 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=Base.metadata,
-            literal_binds=True,
             compare_type=True,
         )
 
         with context.begin_transaction():
             context.run_migrations()
+
+
+run_migrations_online()
@@ -0,0 +1,47 @@
+"""initial users and notes schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(), unique=True),
+        sa.Column('hashed_password', sa.String()),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+
+    op.create_table(
+        'notes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('title', sa.String()),
+        sa.Column('content', sa.Text()),
+        sa.Column('tags', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+    )
+    op.create_index('ix_notes_id', 'notes', ['id'])
+    op.create_index('ix_notes_title', 'notes', ['title'])
+
+
+def downgrade() -> None:
+    op.drop_table('notes')
+    op.drop_table('users')
@@ -0,0 +1,59 @@
+"""normalized note tags
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.UniqueConstraint('owner_id', 'name', name='uq_tags_owner_id_name'),
+    )
+    op.create_table(
+        'note_tags',
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('note_id', sa.Integer(), sa.ForeignKey('notes.id', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index('ix_note_tags_note_id', 'note_tags', ['note_id'])
+
+    # Backfill from the comma-joined `notes.tags` column. Names are stored
+    # trimmed and lower-cased, matching the old case-insensitive ILIKE lookup.
+    op.execute("""
+        INSERT INTO tags (owner_id, name)
+        SELECT DISTINCT n.owner_id, lower(trim(t.name))
+        FROM notes n
+        CROSS JOIN LATERAL unnest(string_to_array(n.tags, ',')) AS t(name)
+        WHERE trim(t.name) <> ''
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO note_tags (tag_id, note_id)
+        SELECT DISTINCT tg.id, n.id
+        FROM notes n
+        CROSS JOIN LATERAL unnest(string_to_array(n.tags, ',')) AS t(name)
+        JOIN tags tg ON tg.owner_id = n.owner_id AND tg.name = lower(trim(t.name))
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_tags_note_id', table_name='note_tags')
+    op.drop_table('note_tags')
+    op.drop_table('tags')
@@ -0,0 +1,28 @@
+"""composite index for keyset pagination of notes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows with a NULL sort key would fall outside every keyset page.
+    op.execute("UPDATE notes SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL")
+    op.execute("UPDATE notes SET created_at = updated_at WHERE created_at IS NULL")
+    op.create_index('ix_notes_owner_id_updated_at_id', 'notes', ['owner_id', 'updated_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_owner_id_updated_at_id', table_name='notes')
@@ -0,0 +1,38 @@
+"""full-text search vector for notes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.note.search import document_vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notes', sa.Column('search_vector', postgresql.TSVECTOR()))
+    # `content` is still plain text at this revision (compressed from 0008 on).
+    notes = sa.table(
+        'notes', sa.column('title', sa.String), sa.column('content', sa.Text), sa.column('search_vector')
+    )
+    op.execute(
+        notes.update().values(search_vector=document_vector(notes.c.title, notes.c.content))
+    )
+    op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_search_vector', table_name='notes')
+    op.drop_column('notes', 'search_vector')
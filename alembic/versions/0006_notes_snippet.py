@@ -0,0 +1,31 @@
+"""stored note snippet for summary list views
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notes', sa.Column('snippet', sa.String(length=161), nullable=True))
+    # Approximates make_snippet() (no word-boundary cut); the DAO rewrites
+    # it exactly the next time a note's content changes.
+    op.execute(
+        r"UPDATE notes SET snippet = left(regexp_replace(btrim(coalesce(content, '')), '\s+', ' ', 'g'), 160)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('notes', 'snippet')
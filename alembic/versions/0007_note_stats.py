@@ -0,0 +1,47 @@
+"""note stats counters: per-tag and per-month note counts
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 15:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tags', sa.Column('note_count', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table(
+        'note_month_counts',
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+    )
+
+    # Same computation as `python -m src.note.stats`.
+    op.execute("""
+        UPDATE tags SET note_count = (
+            SELECT count(*) FROM note_tags WHERE note_tags.tag_id = tags.id
+        )
+    """)
+    op.execute("""
+        INSERT INTO note_month_counts (owner_id, month, count)
+        SELECT owner_id, date_trunc('month', created_at)::date, count(*)
+        FROM notes
+        WHERE created_at IS NOT NULL
+        GROUP BY owner_id, date_trunc('month', created_at)::date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('note_month_counts')
+    op.drop_column('tags', 'note_count')
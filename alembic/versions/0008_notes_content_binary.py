@@ -0,0 +1,39 @@
+"""notes.content as bytes, so large bodies can be stored compressed
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing bodies become their UTF-8 bytes, which the codec reads as
+    # plain text; they are compressed the next time they are written.
+    op.alter_column(
+        'notes', 'content',
+        type_=sa.LargeBinary(),
+        existing_type=sa.Text(),
+        postgresql_using="convert_to(content, 'UTF8')",
+    )
+
+
+def downgrade() -> None:
+    # Fails on compressed rows: run `NOTE_CONTENT_CODEC=none python -m src.note.recompress` first.
+    op.alter_column(
+        'notes', 'content',
+        type_=sa.Text(),
+        existing_type=sa.LargeBinary(),
+        postgresql_using="convert_from(content, 'UTF8')",
+    )
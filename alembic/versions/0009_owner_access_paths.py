@@ -0,0 +1,56 @@
+"""per-owner access paths: (owner_id, id) key on notes and note_tags
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built without blocking writes, then promoted to a constraint so
+    # note_tags can reference (owner_id, id).
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_notes_owner_id_id', 'notes', ['owner_id', 'id'], unique=True, postgresql_concurrently=True
+        )
+    op.execute("ALTER TABLE notes ADD CONSTRAINT uq_notes_owner_id_id UNIQUE USING INDEX uq_notes_owner_id_id")
+    # No query looks notes up by title across owners; it only cost writes.
+    op.drop_index('ix_notes_title', table_name='notes')
+
+    op.add_column('note_tags', sa.Column('owner_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE note_tags SET owner_id = notes.owner_id
+        FROM notes
+        WHERE notes.id = note_tags.note_id
+    """)
+    op.alter_column('note_tags', 'owner_id', nullable=False)
+    op.drop_constraint('note_tags_note_id_fkey', 'note_tags', type_='foreignkey')
+    op.create_foreign_key(
+        'fk_note_tags_owner_id_note_id_notes', 'note_tags', 'notes',
+        ['owner_id', 'note_id'], ['owner_id', 'id'], ondelete='CASCADE'
+    )
+    op.drop_index('ix_note_tags_note_id', table_name='note_tags')
+    op.create_index('ix_note_tags_owner_id_note_id', 'note_tags', ['owner_id', 'note_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_tags_owner_id_note_id', table_name='note_tags')
+    op.create_index('ix_note_tags_note_id', 'note_tags', ['note_id'])
+    op.drop_constraint('fk_note_tags_owner_id_note_id_notes', 'note_tags', type_='foreignkey')
+    op.create_foreign_key('note_tags_note_id_fkey', 'note_tags', 'notes', ['note_id'], ['id'], ondelete='CASCADE')
+    op.drop_column('note_tags', 'owner_id')
+
+    op.create_index('ix_notes_title', 'notes', ['title'])
+    op.drop_constraint('uq_notes_owner_id_id', 'notes', type_='unique')
@@ -0,0 +1,54 @@
+"""notes hash-partitioned on owner_id
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.note import partition
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Large tables should be converted online with `python -m src.note.partition`
+    # first; this then has nothing left to do.
+    if op.get_bind().execute(partition.IS_PARTITIONED).scalar():
+        return
+    for statement in partition.prepare_statements(partition.DEFAULT_PARTITIONS):
+        op.execute(statement)
+    op.execute("INSERT INTO notes_partitioned SELECT * FROM notes")
+    for statement in partition.swap_statements():
+        op.execute(statement)
+    op.execute(partition.VALIDATE)
+    op.execute(partition.CLEANUP)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS notes_unpartitioned")
+    op.execute("CREATE TABLE notes_unpartitioned (LIKE notes INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO notes_unpartitioned SELECT * FROM notes")
+    op.execute("ALTER SEQUENCE notes_id_seq OWNED BY notes_unpartitioned.id")
+    op.drop_constraint('fk_note_tags_owner_id_note_id_notes', 'note_tags', type_='foreignkey')
+    op.drop_table('notes')
+    op.rename_table('notes_unpartitioned', 'notes')
+
+    op.create_primary_key('notes_pkey', 'notes', ['id'])
+    op.create_unique_constraint('uq_notes_owner_id_id', 'notes', ['owner_id', 'id'])
+    op.create_foreign_key('notes_owner_id_fkey', 'notes', 'users', ['owner_id'], ['id'])
+    op.create_index('ix_notes_id', 'notes', ['id'])
+    op.create_index('ix_notes_owner_id_updated_at_id', 'notes', ['owner_id', 'updated_at', 'id'])
+    op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], postgresql_using='gin')
+    op.create_foreign_key(
+        'fk_note_tags_owner_id_note_id_notes', 'note_tags', 'notes',
+        ['owner_id', 'note_id'], ['owner_id', 'id'], ondelete='CASCADE'
+    )
@@ -0,0 +1,49 @@
+"""note revision history, partitioned like notes
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.note.partition import DEFAULT_PARTITIONS
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'note_revisions',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String()),
+        sa.Column('tags', sa.String()),
+        sa.Column('content', sa.LargeBinary()),
+        sa.Column('snapshot', sa.Boolean(), nullable=False),
+        sa.Column('saved_at', sa.DateTime()),
+        sa.PrimaryKeyConstraint('owner_id', 'note_id', 'version'),
+        sa.ForeignKeyConstraint(
+            ['owner_id', 'note_id'], ['notes.owner_id', 'notes.id'],
+            name='fk_note_revisions_owner_id_note_id_notes', ondelete='CASCADE'
+        ),
+        postgresql_partition_by='HASH (owner_id)',
+    )
+    for remainder in range(DEFAULT_PARTITIONS):
+        op.execute(f"""
+            CREATE TABLE note_revisions_p{remainder:02d} PARTITION OF note_revisions
+            FOR VALUES WITH (MODULUS {DEFAULT_PARTITIONS}, REMAINDER {remainder})
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table('note_revisions')
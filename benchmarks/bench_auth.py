@@ -0,0 +1,68 @@
+"""Per-request authentication overhead before and after the fast path.
+
+    python -m benchmarks.bench_auth
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_user, report, reset_schema, summarize
+
+from jose import jwt
+
+from src.config import ALGORITHM, SECRET_KEY
+from src.database import async_session
+from src.user import dao
+from src.user.auth import create_access_token, decode_access_token, get_current_user
+from src.user.cache import principal_cache
+
+ROUNDS = 5000
+
+
+def time_sync(func, rounds: int = ROUNDS) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_async(func, rounds: int = ROUNDS) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main() -> None:
+    await reset_schema()
+    user_id = await create_user()
+    token = create_access_token({"sub": str(user_id)}, timedelta(minutes=30))
+    embedded = create_access_token(
+        {"sub": str(user_id), "usr": {"username": "bench", "created_at": datetime(2024, 1, 1).isoformat()}},
+        timedelta(minutes=30),
+    )
+
+    report("auth", case="jose_decode", **summarize(time_sync(lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))))
+    report("auth", case="cached_decode", **summarize(time_sync(lambda: decode_access_token(token))))
+
+    async with async_session() as session:
+        async def before():
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            await dao.get_user_by_id(session, int(claims["sub"]))
+
+        async def cached_principal():
+            principal_cache.local.clear()
+            await get_current_user(token)
+
+        report("auth", case="before_decode_plus_select", **summarize(await time_async(before, 1000)))
+        report("auth", case="principal_cache_miss", **summarize(await time_async(cached_principal, 1000)))
+        report("auth", case="principal_cache_hit", **summarize(await time_async(lambda: get_current_user(token))))
+        report("auth", case="embedded_principal", **summarize(await time_async(lambda: get_current_user(embedded))))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""N notes by id: one POST /notes/batch vs N sequential GET /notes/{id}.
+
+Goes through the app in-process, so auth and rate limiting are included.
+
+    BENCH_SCALES=1,10,50,100 python -m benchmarks.bench_batch
+"""
+import os
+
+os.environ.setdefault("REQUEST_LIMIT_PER_MINUTE", "1000000000")
+os.environ.setdefault("JOB_BACKEND", "memory")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+os.environ.setdefault("CHANGE_FEED_BACKEND", "memory")
+
+import asyncio  # noqa: E402
+
+from benchmarks.common import (  # noqa: E402
+    create_user, measure, parse_scales, report, reset_schema, running, summarize, use_fakeredis
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from src.database import async_session  # noqa: E402
+from src.note.model import Note  # noqa: E402
+from src.user.auth import create_access_token  # noqa: E402
+
+NOTES = 1_000
+
+
+async def seed(owner_id: int) -> list[int]:
+    async with async_session() as session:
+        result = await session.execute(
+            insert(Note).returning(Note.id, sort_by_parameter_order=True),
+            [
+                {"title": f"dream {i}", "content": "I was flying over the sea " * 40, "snippet": "I was flying",
+                 "tags": "dream", "owner_id": owner_id}
+                for i in range(NOTES)
+            ]
+        )
+        ids = result.scalars().all()
+        await session.commit()
+    return ids
+
+
+async def main() -> None:
+    use_fakeredis()
+    from src.main import app
+
+    await reset_schema()
+    owner_id = await create_user()
+    ids = await seed(owner_id)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(owner_id)})}"}
+
+    async with running(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for n in parse_scales("1,10,50,100"):
+                wanted = ids[::len(ids) // n][:n]
+
+                async def sequential() -> None:
+                    for note_id in wanted:
+                        (await client.get(f"/api/notes/{note_id}")).raise_for_status()
+
+                async def batch() -> None:
+                    (await client.post("/api/notes/batch", json={"ids": wanted})).raise_for_status()
+
+                for mode, func in (("sequential", sequential), ("batch", batch)):
+                    report("batch_fetch", mode=mode, ids=n, **summarize(await measure(func, 30)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""Import throughput: one create_note per note vs batched bulk_create_notes.
+
+    BENCH_SCALES=1000,10000 python -m benchmarks.bench_bulk
+"""
+import asyncio
+import time
+
+from benchmarks.common import create_user, parse_scales, report, reset_schema
+
+from src.config import NOTE_BULK_BATCH_SIZE
+from src.database import async_session
+from src.note import dao
+from src.note.schema import NoteCreate
+from src.user.schema import UserResponse
+
+
+async def main() -> None:
+    for scale in parse_scales("1000,10000"):
+        notes = [
+            NoteCreate(title=f"dream {i}", content="I was flying over the ocean " * 20, tags=["flying", f"t{i % 50}"])
+            for i in range(scale)
+        ]
+
+        for mode in ("single", "bulk"):
+            await reset_schema()
+            user = UserResponse(id=await create_user(), username="bench", created_at="2024-01-01T00:00:00")
+            async with async_session() as session:
+                start = time.perf_counter()
+                if mode == "single":
+                    for note in notes:
+                        await dao.create_note(session, note, user)
+                else:
+                    for offset in range(0, scale, NOTE_BULK_BATCH_SIZE):
+                        await dao.bulk_create_notes(session, notes[offset:offset + NOTE_BULK_BATCH_SIZE], user)
+                elapsed = time.perf_counter() - start
+            report("bulk_import", mode=mode, notes=scale, seconds=elapsed, notes_per_s=scale / elapsed)
+
+        start, exported = time.perf_counter(), 0
+        async for chunk in dao.export_notes(user.id):
+            exported += chunk.count(b"\n")
+        report("bulk_export", notes=exported, seconds=time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
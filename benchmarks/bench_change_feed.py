@@ -0,0 +1,71 @@
+"""Memory per idle change feed connection, and publish-to-delivery latency.
+
+Opens BENCH_SCALES idle subscriptions spread over USERS users, then times how
+long an event takes to reach a user's connections while the rest stay idle.
+Set REDIS_URL to go through the Redis stream and pub/sub channel.
+
+    BENCH_SCALES=1000,10000,50000 python -m benchmarks.bench_change_feed
+"""
+import asyncio
+import os
+import time
+import tracemalloc
+
+from benchmarks.common import parse_scales, report, summarize
+
+from src.note.changes import ChangeFeed, MemoryChangeLog, RedisChangeLog
+
+USERS = 1000
+ROUNDS = 200
+
+
+async def run(name: str, log, connections: int) -> None:
+    feed = ChangeFeed(log, 256)
+    listener = asyncio.create_task(feed.run())
+    received: dict[int, asyncio.Event] = {}
+
+    async def connection(user_id: int) -> None:
+        async for event in feed.subscribe(user_id, keepalive=15):
+            if event is not None:
+                received[user_id].set()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clients = [asyncio.create_task(connection(i % USERS)) for i in range(connections)]
+    while sum(len(subscribers) for subscribers in feed._subscribers.values()) < connections:
+        await asyncio.sleep(0.01)
+    per_connection = (tracemalloc.get_traced_memory()[0] - before) / connections
+    tracemalloc.stop()
+
+    samples = []
+    for i in range(ROUNDS):
+        user_id = i % USERS
+        received[user_id] = asyncio.Event()
+        start = time.perf_counter()
+        await feed.publish(user_id, [{"type": "updated", "note_id": i, "version": 1}])
+        await received[user_id].wait()
+        samples.append(time.perf_counter() - start)
+    report(
+        "change_feed", backend=name, connections=connections,
+        bytes_per_connection=round(per_connection), **summarize(samples)
+    )
+
+    feed.close()
+    await asyncio.gather(*clients)
+    listener.cancel()
+
+
+async def main() -> None:
+    for connections in parse_scales("1000,10000"):
+        await run("memory", MemoryChangeLog(100), connections)
+
+        if os.getenv("REDIS_URL"):
+            from redis import asyncio as aioredis
+
+            redis = aioredis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+            await run("redis", RedisChangeLog(redis, 100, 3600), connections)
+            await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
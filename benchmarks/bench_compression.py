@@ -0,0 +1,80 @@
+"""Stored bytes and CPU per note body by codec, and response bytes by encoding.
+
+Bodies are generated dream text of BENCH_CONTENT_KB kilobytes. The response
+part compresses one JSON list page of PAGE such notes with gzip and brotli.
+
+    BENCH_CONTENT_KB=1,4,64 python -m benchmarks.bench_compression
+"""
+import os
+import random
+import time
+
+from benchmarks.common import report, summarize
+from benchmarks.seed import make_content
+
+import orjson
+
+from src.utils import compression
+from src.utils.compression import _Encoder, compress_text, decompress_text
+
+CODECS = [("none", 0), ("zlib", 1), ("zlib", 6), ("zlib", 9), ("zstd", 1), ("zstd", 3), ("zstd", 9)]
+ENCODINGS = [("gzip", 1), ("gzip", 6), ("br", 4), ("br", 11)]
+PAGE = 100
+ROUNDS = 200
+
+
+def timed(func, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_storage(content: str) -> None:
+    raw = len(content.encode())
+    for codec, level in CODECS:
+        if codec == "zstd" and compression.zstandard is None:
+            continue
+        stored = compress_text(content, codec, level, 0)
+        write = summarize(timed(lambda: compress_text(content, codec, level, 0), ROUNDS))
+        read = summarize(timed(lambda: decompress_text(stored), ROUNDS))
+        report(
+            "compression_storage", codec=codec, level=level, raw_bytes=raw, stored_bytes=len(stored),
+            ratio=round(raw / len(stored), 2), compress_p50_ms=write["p50_ms"], decompress_p50_ms=read["p50_ms"]
+        )
+
+
+def bench_response(content_kb: int) -> None:
+    rng = random.Random(23)
+    body = orjson.dumps({
+        "items": [
+            {
+                "id": i, "title": f"dream {i}", "content": make_content(rng, content_kb * 200)[:content_kb * 1024],
+                "tags": ["dream", "lucid"], "version": 1,
+            }
+            for i in range(PAGE)
+        ],
+        "next_cursor": None,
+    })
+    for encoding, level in ENCODINGS:
+        if encoding == "br" and compression.brotli is None:
+            continue
+        sent = len(_Encoder(encoding, level, level).compress(body, final=True))
+        samples = timed(lambda: _Encoder(encoding, level, level).compress(body, final=True), 20)
+        report(
+            "compression_response", encoding=encoding, level=level, page=PAGE, raw_bytes=len(body),
+            sent_bytes=sent, ratio=round(len(body) / sent, 2), **summarize(samples)
+        )
+
+
+def main() -> None:
+    for content_kb in (int(kb) for kb in os.getenv("BENCH_CONTENT_KB", "1,4,64").split(",")):
+        content = make_content(random.Random(19), content_kb * 200)[:content_kb * 1024]
+        bench_storage(content)
+        bench_response(content_kb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Overhead of the request/DB instrumentation behind /metrics and Server-Timing.
+
+Compares the same in-process ASGI route and the same queries with and
+without MetricsMiddleware and the cursor-execute listeners.
+
+    python -m benchmarks.bench_instrumentation
+"""
+import asyncio
+import time
+
+from benchmarks.common import measure, report, summarize
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import DATABASE_URL
+from src.utils.instrumentation import MetricsMiddleware, instrument_engine, timed
+
+ROUNDS = 2_000
+
+
+def make_app(engine, instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/ping/{item_id}")
+    async def ping(item_id: int) -> dict:
+        async with engine.connect() as conn:
+            value = (await conn.execute(text("SELECT :v"), {"v": item_id})).scalar()
+        return {"value": value}
+
+    return app
+
+
+async def main() -> None:
+    samples = []
+    for _ in range(100_000):
+        start = time.perf_counter()
+        with timed("bench"):
+            pass
+        samples.append(time.perf_counter() - start)
+    report("instrumentation", case="timed_block", **summarize(samples))
+
+    for instrumented in (False, True):
+        engine = create_async_engine(DATABASE_URL)
+        if instrumented:
+            instrument_engine(engine)
+
+        async def query() -> None:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        report("instrumentation", case="query", instrumented=instrumented, **summarize(await measure(query, ROUNDS)))
+
+        transport = httpx.ASGITransport(app=make_app(engine, instrumented))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            request = lambda: client.get("/ping/7")  # noqa: E731
+            report("instrumentation", case="request", instrumented=instrumented, **summarize(await measure(request, ROUNDS)))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
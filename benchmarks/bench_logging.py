@@ -0,0 +1,58 @@
+"""Throughput of the GET /api/notes/ DAO path under both logging pipelines.
+
+"sync" reproduces the old setup (file handler on the root logger, records
+formatted and written inline); "queue" is the QueueHandler pipeline.
+
+    python -m benchmarks.bench_logging
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.common import create_user, report, reset_schema
+
+from sqlalchemy import insert
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note
+from src.utils.logging_config import queue_handler
+
+ROUNDS = 5000
+
+
+async def run(owner_id: int) -> float:
+    async with async_session() as session:
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            await dao.get_notes_by_owner(session, owner_id, 10)
+        return ROUNDS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    await reset_schema()
+    owner_id = await create_user()
+    async with async_session() as session:
+        await session.execute(insert(Note), [
+            {"title": f"note {i}", "content": "x", "tags": "", "owner_id": owner_id} for i in range(100)
+        ])
+        await session.commit()
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+
+    sync_handler = logging.FileHandler(os.path.join(tempfile.gettempdir(), "dreamnotes_bench.log"))
+    sync_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root.removeHandler(queue_handler)
+    root.addHandler(sync_handler)
+    report("logging", pipeline="sync", requests_per_s=await run(owner_id))
+
+    root.removeHandler(sync_handler)
+    root.addHandler(queue_handler)
+    report("logging", pipeline="queue", requests_per_s=await run(owner_id))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
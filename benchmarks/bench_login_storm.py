@@ -0,0 +1,73 @@
+"""Note-read latency while a burst of logins verifies bcrypt hashes.
+
+Compares verifying on the event loop (the old behaviour) with the pooled
+`verify_password`. Reads that queue behind blocking bcrypt calls show up
+directly in the read p99.
+
+    BENCH_LOGINS=200 python -m benchmarks.bench_login_storm
+"""
+import asyncio
+import os
+import time
+
+from benchmarks.common import create_user, report, reset_schema, summarize
+
+from sqlalchemy import insert
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note
+from src.utils.password_hashing import hash_password, hasher, pwd_context, verify_password
+
+LOGINS = int(os.getenv("BENCH_LOGINS", 200))
+CONCURRENCY = 20
+
+
+async def blocking_verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+async def storm(verify, hashed: str) -> None:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def login():
+        async with semaphore:
+            await verify("hunter2", hashed)
+
+    await asyncio.gather(*(login() for _ in range(LOGINS)))
+
+
+async def reads(owner_id: int, stop: asyncio.Event, samples: list[float]) -> None:
+    async with async_session() as session:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await dao.get_notes_by_owner(session, owner_id, 10)
+            samples.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+
+async def main() -> None:
+    await reset_schema()
+    owner_id = await create_user()
+    async with async_session() as session:
+        await session.execute(insert(Note), [
+            {"title": f"note {i}", "content": "x", "tags": "", "owner_id": owner_id} for i in range(100)
+        ])
+        await session.commit()
+    hashed = await hash_password("hunter2")
+
+    for mode, verify in (("event_loop", blocking_verify), ("pool", verify_password)):
+        stop, samples = asyncio.Event(), []
+        reader = asyncio.create_task(reads(owner_id, stop, samples))
+        start = time.perf_counter()
+        await storm(verify, hashed)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await reader
+        report("login_storm", mode=mode, logins=LOGINS, logins_per_s=LOGINS / elapsed, **summarize(samples))
+
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
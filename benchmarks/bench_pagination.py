@@ -0,0 +1,62 @@
+"""Cost of fetching a deep page with offset vs keyset (cursor) pagination.
+
+    BENCH_SCALES=10000,1000000 python -m benchmarks.bench_pagination
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_user, measure, parse_scales, report, reset_schema, summarize
+
+from sqlalchemy import insert, select
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note
+from src.utils.pagination import encode_cursor
+
+BATCH = 10_000
+PAGE = 10
+
+
+async def seed(owner_id: int, count: int) -> None:
+    start = datetime(2024, 1, 1)
+    async with async_session() as session:
+        for offset in range(0, count, BATCH):
+            await session.execute(
+                insert(Note),
+                [
+                    {
+                        "title": f"note {i}", "content": "x", "tags": "",
+                        "owner_id": owner_id, "updated_at": start + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + BATCH, count))
+                ]
+            )
+        await session.commit()
+
+
+async def main() -> None:
+    for scale in parse_scales("10000,100000"):
+        await reset_schema()
+        owner_id = await create_user()
+        await seed(owner_id, scale)
+
+        async with async_session() as session:
+            for depth in (0, scale // 2, scale - PAGE):
+                # The row just before the requested page, i.e. what a client
+                # would hold as `next_cursor` after walking there.
+                result = await session.execute(
+                    select(Note.updated_at, Note.id).filter(Note.owner_id == owner_id)
+                    .order_by(Note.updated_at.desc(), Note.id.desc()).offset(max(depth - 1, 0)).limit(1)
+                )
+                updated_at, note_id = result.one()
+                cursor = encode_cursor(updated_at, note_id) if depth else None
+
+                offset_page = lambda: dao.get_notes_by_owner(session, owner_id, PAGE, skip=depth)  # noqa: E731
+                cursor_page = lambda: dao.get_notes_by_owner(session, owner_id, PAGE, cursor)  # noqa: E731
+                report("pagination", mode="offset", notes=scale, depth=depth, **summarize(await measure(offset_page, 30)))
+                report("pagination", mode="cursor", notes=scale, depth=depth, **summarize(await measure(cursor_page, 30)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""Per-user query latency on a plain vs hash-partitioned `notes` table (Postgres).
+
+Seeds BENCH_SCALES notes over USERS users server-side, measures owner-scoped
+reads on the plain table, converts it with the online partitioning tool while
+timing the backfill, and measures again. Needs DATABASE_URL to point at a
+disposable Postgres database.
+
+    DATABASE_URL=postgresql+asyncpg://localhost/bench BENCH_SCALES=1000000,10000000 \\
+        python -m benchmarks.bench_partitioning
+"""
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.common import measure, parse_scales, report, reset_schema, summarize
+
+from sqlalchemy import select, text
+
+from src.database import async_engine, async_session
+from src.note import dao, partition
+from src.note.dao import NOTE_COLUMNS
+from src.note.model import Note
+
+USERS = 10_000
+ROUNDS = 500
+
+
+async def seed(notes: int) -> None:
+    await reset_schema()
+    async with async_engine.begin() as conn:
+        await conn.execute(text("""
+            INSERT INTO users (username, hashed_password)
+            SELECT 'user' || i, 'x' FROM generate_series(1, :users) AS i
+        """), {"users": USERS})
+        # Note i belongs to user (i - 1) % USERS + 1, so any user's notes are
+        # spread over the whole table like they are after years of writes.
+        await conn.execute(text("""
+            INSERT INTO notes (title, content, snippet, tags, owner_id, version, created_at, updated_at)
+            SELECT 'dream ' || i, convert_to(repeat('I was walking through a house ', 20), 'UTF8'),
+                   'I was walking through a house', 'dream', (i - 1) % :users + 1, 1,
+                   now() - i * interval '1 second', now() - i * interval '1 second'
+            FROM generate_series(1, :notes) AS i
+        """), {"users": USERS, "notes": notes})
+    await analyze()
+
+
+async def analyze() -> None:
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE"))
+
+
+async def bench_queries(layout: str, notes: int) -> None:
+    rng = random.Random(7)
+    per_user = notes // USERS
+
+    def pick() -> tuple[int, int]:
+        owner_id = rng.randint(1, USERS)
+        return owner_id, owner_id + USERS * rng.randrange(per_user)
+
+    async with async_session() as session:
+        async def list_page() -> None:
+            await dao.get_notes_by_owner(session, pick()[0], 50, view="summary")
+
+        async def read() -> None:
+            owner_id, note_id = pick()
+            result = await session.execute(
+                select(*NOTE_COLUMNS).filter(Note.id == note_id, Note.owner_id == owner_id)
+            )
+            result.one()
+
+        async def export_page() -> None:
+            result = await session.execute(
+                select(*NOTE_COLUMNS).filter(Note.owner_id == pick()[0]).order_by(Note.id).limit(500)
+            )
+            result.all()
+
+        for name, func in (("list", list_page), ("read", read), ("export_page", export_page)):
+            samples = await measure(func, ROUNDS)
+            report("partitioning", layout=layout, notes=notes, query=name, **summarize(samples))
+
+
+async def main() -> None:
+    if not os.environ["DATABASE_URL"].startswith("postgresql"):
+        raise SystemExit("Set DATABASE_URL to a Postgres database; partitioning is Postgres-only")
+
+    for notes in parse_scales("1000000,10000000"):
+        await seed(notes)
+        await bench_queries("plain", notes)
+
+        start = time.perf_counter()
+        await partition.prepare(partition.DEFAULT_PARTITIONS)
+        await partition.backfill(5000)
+        backfill_seconds = time.perf_counter() - start
+        await partition.swap()
+        await partition.cleanup()
+        report("partitioning_backfill", notes=notes, seconds=backfill_seconds, rows_per_second=notes / backfill_seconds)
+
+        await analyze()
+        await bench_queries("partitioned", notes)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
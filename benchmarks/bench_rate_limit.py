@@ -0,0 +1,49 @@
+"""Per-request cost of the in-process limiter and of its batched sync.
+
+Set REDIS_URL to also measure syncing against a real (or fake) Redis.
+
+    python -m benchmarks.bench_rate_limit
+"""
+import asyncio
+import os
+import time
+
+from benchmarks.common import report, summarize
+
+from src.utils.request_limiter import InMemoryBackend, LocalRateLimiter, RedisBackend
+
+USERS = 1000
+ROUNDS = 100_000
+
+
+async def run(name: str, limiter: LocalRateLimiter) -> None:
+    samples = []
+    for i in range(ROUNDS):
+        start = time.perf_counter()
+        limiter.hit(f"read_notes:user:{i % USERS}", 1_000_000, 60)
+        samples.append(time.perf_counter() - start)
+    report("rate_limit", backend=name, phase="hit", **summarize(samples))
+
+    syncs = []
+    for _ in range(20):
+        for i in range(USERS):
+            limiter.hit(f"read_notes:user:{i}", 1_000_000, 60)
+        start = time.perf_counter()
+        await limiter.sync()
+        syncs.append(time.perf_counter() - start)
+    report("rate_limit", backend=name, phase="sync", keys=USERS, **summarize(syncs))
+
+
+async def main() -> None:
+    await run("memory", LocalRateLimiter(InMemoryBackend()))
+
+    if os.getenv("REDIS_URL"):
+        from redis import asyncio as aioredis
+
+        redis = aioredis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+        await run("redis", LocalRateLimiter(RedisBackend(redis)))
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
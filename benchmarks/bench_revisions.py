@@ -0,0 +1,129 @@
+"""Write overhead and storage of note revisions, and rebuild latency.
+
+For each BENCH_CONTENT_KB body size and kind of edit, reports the bytes a
+revision takes (delta) against a full compressed copy and the time to
+compute it. Then times dao.update_note and the part of it spent on the
+revision: building the row plus its INSERT. (SQLite also reads the old row
+before updating; Postgres returns it from the UPDATE.) Last, rebuilds the oldest
+revision of a long history, which applies up to
+NOTE_REVISION_SNAPSHOT_INTERVAL - 1 deltas.
+
+    BENCH_CONTENT_KB=4,64 python -m benchmarks.bench_revisions
+"""
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.common import create_user, measure, report, reset_schema, summarize
+from benchmarks.seed import make_content
+
+from sqlalchemy import event, insert
+
+from src.config import NOTE_REVISION_SNAPSHOT_INTERVAL
+from src.database import async_engine, async_session
+from src.note import dao, revisions
+from src.note.model import Note
+from src.note.schema import NoteUpdate
+from src.user.schema import UserResponse
+
+ROUNDS = 200
+
+
+def _sentences(content: str) -> list[str]:
+    return content.split(". ")
+
+
+EDITS = {
+    "append": lambda rng, text: text + " " + make_content(rng, 20) + ".",
+    "edit_middle": lambda rng, text: ". ".join(
+        make_content(rng, 12) if i == len(_sentences(text)) // 2 else s for i, s in enumerate(_sentences(text))
+    ),
+    "rewrite": lambda rng, text: make_content(rng, len(text) // 5),
+    "title_only": lambda rng, text: text,
+}
+
+
+revision_seconds = 0.0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _start(conn, cursor, statement, parameters, context, executemany):
+    context.bench_started = time.perf_counter()
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _stop(conn, cursor, statement, parameters, context, executemany):
+    global revision_seconds
+    if statement.startswith("INSERT INTO note_revisions"):
+        revision_seconds += time.perf_counter() - context.bench_started
+
+
+def _timed_revision_row(*args):
+    global revision_seconds
+    start = time.perf_counter()
+    try:
+        return _revision_row(*args)
+    finally:
+        revision_seconds += time.perf_counter() - start
+
+
+_revision_row = revisions.revision_row
+revisions.revision_row = _timed_revision_row
+
+
+async def main() -> None:
+    rng = random.Random(5)
+    for content_kb in (int(kb) for kb in os.getenv("BENCH_CONTENT_KB", "4,64").split(",")):
+        await reset_schema()
+        user = UserResponse(id=await create_user(), username="bench", created_at="2024-01-01T00:00:00")
+        base = ". ".join(make_content(rng, 12) for _ in range(content_kb * 16))[:content_kb * 1024]
+
+        async with async_session() as session:
+            result = await session.execute(
+                insert(Note).returning(Note.id, sort_by_parameter_order=True),
+                [{"title": "n", "content": base, "tags": "", "owner_id": user.id} for _ in range(ROUNDS)]
+            )
+            ids = result.scalars().all()
+            await session.commit()
+
+            for edit, apply_edit in EDITS.items():
+                edited = apply_edit(rng, base)
+                start = time.perf_counter()
+                row = revisions.revision_row(
+                    user.id, 1, {"version": 1, "title": "n", "content": base, "tags": "", "updated_at": None}, edited
+                )
+                encode_ms = (time.perf_counter() - start) * 1000
+                full = len(revisions._snapshot(base))
+                report(
+                    "revision_size", content_kb=content_kb, edit=edit, snapshot=row["snapshot"],
+                    revision_bytes=len(row["content"]), full_copy_bytes=full, encode_ms=encode_ms
+                )
+
+            global revision_seconds
+            edited = EDITS["edit_middle"](rng, base)
+            pending = iter(ids)
+            revision_seconds = 0.0
+            samples = await measure(
+                lambda: dao.update_note(session, next(pending), NoteUpdate(content=edited), user), ROUNDS
+            )
+            report(
+                "revision_update", content_kb=content_kb,
+                revision_ms=revision_seconds / ROUNDS * 1000,
+                revision_share=revision_seconds / sum(samples), **summarize(samples)
+            )
+
+            # A history long enough that the oldest revision sits a full interval below a snapshot.
+            note_id, text = ids[0], base
+            for _ in range(2 * NOTE_REVISION_SNAPSHOT_INTERVAL):
+                text = EDITS["append"](rng, text)
+                await dao.update_note(session, note_id, NoteUpdate(content=text), user)
+            samples = await measure(lambda: dao.get_note_revision(session, note_id, 2, user), 50)
+            report(
+                "revision_rebuild", content_kb=content_kb, interval=NOTE_REVISION_SNAPSHOT_INTERVAL,
+                **summarize(samples)
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
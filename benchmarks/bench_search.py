@@ -0,0 +1,76 @@
+"""Search latency of the configured engine vs a naive ILIKE '%q%' scan.
+
+On SQLite run with SEARCH_BACKEND=memory; against Postgres the tsvector
+engine is measured instead.
+
+    SEARCH_BACKEND=memory BENCH_SCALES=10000,1000000 python -m benchmarks.bench_search
+"""
+import asyncio
+import random
+import time
+
+from benchmarks.common import create_user, measure, parse_scales, report, reset_schema, summarize
+
+from sqlalchemy import insert, or_, select
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note
+from src.note.search import InvertedIndexSearchEngine, search_engine
+
+BATCH = 10_000
+VOCABULARY = [f"word{i}" for i in range(5000)] + ["flying", "ocean", "teeth", "falling", "chase"]
+QUERIES = ["flying", "ocean teeth", "word42 falling"]
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=words))
+
+
+async def seed(owner_id: int, count: int) -> None:
+    rng = random.Random(count)
+    async with async_session() as session:
+        for offset in range(0, count, BATCH):
+            rows = []
+            for _ in range(min(BATCH, count - offset)):
+                title, content = make_text(rng, 5), make_text(rng, 120)
+                rows.append({"title": title, "content": content, "tags": "", "owner_id": owner_id})
+            result = await session.execute(insert(Note).returning(Note.id, sort_by_parameter_order=True), rows)
+            await search_engine.index_many(
+                session, [{"id": note_id, **row} for note_id, row in zip(result.scalars().all(), rows)]
+            )
+        await session.commit()
+
+
+async def naive_search(session, owner_id: int, q: str):
+    terms = q.split()
+    result = await session.execute(
+        select(Note).filter(
+            Note.owner_id == owner_id,
+            *(or_(Note.title.ilike(f"%{term}%"), Note.content.ilike(f"%{term}%")) for term in terms)
+        ).limit(10)
+    )
+    return result.scalars().all()
+
+
+async def main() -> None:
+    for scale in parse_scales("10000,100000"):
+        await reset_schema()
+        owner_id = await create_user()
+        await seed(owner_id, scale)
+
+        async with async_session() as session:
+            if isinstance(search_engine, InvertedIndexSearchEngine):
+                start = time.perf_counter()
+                await search_engine.rebuild(session)
+                report("search", case="memory_rebuild", notes=scale, seconds=time.perf_counter() - start)
+
+            for q in QUERIES:
+                engine = lambda: dao.search_notes(session, owner_id, q, 10)  # noqa: E731
+                naive = lambda: naive_search(session, owner_id, q)  # noqa: E731
+                report("search", case=type(search_engine).__name__, q=q, notes=scale, **summarize(await measure(engine, 20)))
+                report("search", case="naive_ilike", q=q, notes=scale, **summarize(await measure(naive, 5)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""CPU time per rendered page: ORM entities + pydantic vs column rows + orjson.
+
+Measures process time, so waiting on the database does not count.
+
+    python -m benchmarks.bench_serialization
+"""
+import asyncio
+import time
+
+from benchmarks.common import create_user, report, reset_schema, summarize
+
+import orjson
+from sqlalchemy import insert, select
+from sqlalchemy.orm import undefer
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note
+from src.note.schema import NotePage, note_payload
+
+NOTES = 1_000
+ROUNDS = 200
+
+
+async def legacy_page(session, owner_id: int, limit: int) -> bytes:
+    result = await session.execute(
+        select(Note).options(undefer(Note.content)).filter(Note.owner_id == owner_id)
+        .order_by(Note.updated_at.desc(), Note.id.desc()).limit(limit)
+    )
+    notes = result.scalars().all()
+    for note in notes:
+        note.tags = note.tags.split(",") if note.tags else []
+    page = NotePage.model_validate({"items": notes, "next_cursor": None}, from_attributes=True)
+    session.expunge_all()
+    return page.model_dump_json().encode()
+
+
+async def rows_page(session, owner_id: int, limit: int) -> bytes:
+    rows, next_cursor = await dao.get_notes_by_owner(session, owner_id, limit)
+    return orjson.dumps({"items": [note_payload(row) for row in rows], "next_cursor": next_cursor})
+
+
+async def main() -> None:
+    await reset_schema()
+    owner_id = await create_user()
+    async with async_session() as session:
+        await session.execute(
+            insert(Note),
+            [
+                {
+                    "title": f"note {i}", "content": "lorem ipsum dolor sit amet " * 20,
+                    "tags": "work,ideas,todo", "owner_id": owner_id,
+                }
+                for i in range(NOTES)
+            ]
+        )
+        await session.commit()
+
+    async with async_session() as session:
+        for limit in (10, 100):
+            for name, render in (("orm_pydantic", legacy_page), ("rows_orjson", rows_page)):
+                samples = []
+                for _ in range(ROUNDS):
+                    start = time.process_time()
+                    body = await render(session, owner_id, limit)
+                    samples.append(time.process_time() - start)
+                report("serialization", mode=name, page=limit, bytes=len(body), **summarize(samples))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""Time from launching the server to its first answered request.
+
+Compares `python -m src.serve` (workers forked from a preloaded parent) with
+plain `uvicorn --workers` (each worker imports the app itself). Uses the
+database and Redis settings from the environment.
+
+    python -m benchmarks.bench_startup --workers 4
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.common import report, summarize
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response(url: str, timeout: float = 30.0) -> tuple[float, float]:
+    """
+    Polls until `url` answers; returns (seconds until then, that request's latency).
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        attempt = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                response.read()
+            return time.perf_counter() - started, time.perf_counter() - attempt
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f"{url} did not answer within {timeout}s")
+
+
+def launch(command: list[str], port: int) -> tuple[float, float]:
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return first_response(f"http://127.0.0.1:{port}/")
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    commands = {
+        "serve": lambda port: [sys.executable, "-m", "src.serve", "--workers", str(args.workers), "--port", str(port)],
+        "uvicorn": lambda port: [
+            sys.executable, "-m", "uvicorn", "src.main:app", "--workers", str(args.workers),
+            "--port", str(port), "--loop", "uvloop", "--http", "httptools", "--no-access-log",
+        ],
+    }
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    for name, command in commands.items():
+        ready, first = [], []
+        for _ in range(args.runs):
+            port = free_port()
+            until_ready, latency = launch(command(port), port)
+            ready.append(until_ready)
+            first.append(latency)
+        report("startup", server=name, workers=args.workers, phase="launch_to_first_response", **summarize(ready))
+        report("startup", server=name, workers=args.workers, phase="first_request", **summarize(first))
+
+
+if __name__ == "__main__":
+    main()
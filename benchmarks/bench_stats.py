@@ -0,0 +1,62 @@
+"""Latency of note stats: maintained counters vs COUNT(*) scans per request.
+
+    BENCH_SCALES=10000,100000 python -m benchmarks.bench_stats
+"""
+import asyncio
+import random
+
+from benchmarks.common import create_user, measure, parse_scales, report, reset_schema, summarize
+
+from sqlalchemy import func, select
+
+from src.database import async_session
+from src.note import dao, stats
+from src.note.model import Note, Tag, note_tags
+from src.note.schema import NoteCreate
+from src.user.schema import UserResponse
+
+BATCH = 1_000
+TAGS = [f"tag{i}" for i in range(50)]
+
+
+async def scan_stats(session, owner_id: int) -> dict:
+    total = await session.scalar(select(func.count()).select_from(Note).filter(Note.owner_id == owner_id))
+    tags = await session.execute(
+        select(Tag.name, func.count())
+        .join(note_tags, note_tags.c.tag_id == Tag.id)
+        .filter(Tag.owner_id == owner_id)
+        .group_by(Tag.name)
+    )
+    months = await session.execute(
+        select(func.strftime("%Y-%m", Note.created_at), func.count())
+        .filter(Note.owner_id == owner_id)
+        .group_by(func.strftime("%Y-%m", Note.created_at))
+    )
+    return {"total": total, "tags": dict(tags.all()), "months": dict(months.all())}
+
+
+async def main() -> None:
+    rng = random.Random(16)
+    for scale in parse_scales("10000,100000"):
+        await reset_schema()
+        owner_id = await create_user()
+        user = UserResponse(id=owner_id, username="bench", created_at="2024-01-01T00:00:00")
+
+        # Seeded through the DAO so the counters are maintained as in production.
+        async with async_session() as session:
+            for offset in range(0, scale, BATCH):
+                await dao.bulk_create_notes(session, [
+                    NoteCreate(title=f"note {i}", content="x", tags=rng.sample(TAGS, 3))
+                    for i in range(offset, min(offset + BATCH, scale))
+                ], user)
+
+        async with async_session() as session:
+            assert (await stats.get_stats(session, owner_id))["total"] == scale
+            counters = lambda: stats.get_stats(session, owner_id)  # noqa: E731
+            scans = lambda: scan_stats(session, owner_id)  # noqa: E731
+            report("stats", mode="counters", notes=scale, **summarize(await measure(counters, 50)))
+            report("stats", mode="count_scan", notes=scale, **summarize(await measure(scans, 50)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
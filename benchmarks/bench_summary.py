@@ -0,0 +1,58 @@
+"""Bytes and latency per list page: full notes vs `view=summary`.
+
+    BENCH_CONTENT_KB=4,64 python -m benchmarks.bench_summary
+"""
+import asyncio
+import os
+
+from benchmarks.common import create_user, measure, report, reset_schema, summarize
+
+import orjson
+from sqlalchemy import insert
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note
+from src.note.schema import note_payload, note_summary_payload
+
+NOTES = 2_000
+PAGE = 100
+
+
+async def seed(owner_id: int, content_kb: int) -> None:
+    content = ("I was walking through a house I had never seen, " * 30)[:1024] * content_kb
+    async with async_session() as session:
+        await session.execute(
+            insert(Note),
+            [
+                {
+                    "title": f"dream {i}", "content": content, "snippet": dao.make_snippet(content),
+                    "tags": "dream,lucid", "owner_id": owner_id,
+                }
+                for i in range(NOTES)
+            ]
+        )
+        await session.commit()
+
+
+async def main() -> None:
+    for content_kb in (int(kb) for kb in os.getenv("BENCH_CONTENT_KB", "4,64").split(",")):
+        await reset_schema()
+        owner_id = await create_user()
+        await seed(owner_id, content_kb)
+
+        async with async_session() as session:
+            for view, payload in (("full", note_payload), ("summary", note_summary_payload)):
+                size = 0
+
+                async def page() -> None:
+                    nonlocal size
+                    rows, next_cursor = await dao.get_notes_by_owner(session, owner_id, PAGE, view=view)
+                    size = len(orjson.dumps({"items": [payload(row) for row in rows], "next_cursor": next_cursor}))
+
+                samples = await measure(page, 50)
+                report("summary_view", view=view, content_kb=content_kb, page=PAGE, bytes=size, **summarize(samples))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
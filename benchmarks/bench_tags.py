@@ -0,0 +1,82 @@
+"""Tag lookup latency as the number of notes per user grows.
+
+    BENCH_SCALES=1000,100000,1000000 python -m benchmarks.bench_tags
+"""
+import asyncio
+import random
+
+from benchmarks.common import create_user, measure, parse_scales, report, reset_schema, summarize
+
+from sqlalchemy import insert, or_, select
+
+from src.database import async_session
+from src.note import dao
+from src.note.model import Note, Tag, note_tags
+
+TAG_POOL = [f"tag{i}" for i in range(200)]
+BATCH = 10_000
+
+
+async def seed(owner_id: int, count: int) -> None:
+    rng = random.Random(count)
+    async with async_session() as session:
+        result = await session.execute(
+            insert(Tag).returning(Tag.name, Tag.id),
+            [{"owner_id": owner_id, "name": name} for name in TAG_POOL]
+        )
+        tag_ids = dict(result.all())
+
+        for offset in range(0, count, BATCH):
+            size = min(BATCH, count - offset)
+            picked = [rng.sample(TAG_POOL, 3) for _ in range(size)]
+            result = await session.execute(
+                insert(Note).returning(Note.id),
+                [
+                    {"title": f"note {offset + i}", "content": "x", "tags": ",".join(names), "owner_id": owner_id}
+                    for i, names in enumerate(picked)
+                ]
+            )
+            ids = result.scalars().all()
+            await session.execute(
+                insert(note_tags),
+                [
+                    {"note_id": note_id, "owner_id": owner_id, "tag_id": tag_ids[name]}
+                    for note_id, names in zip(ids, picked) for name in names
+                ]
+            )
+        await session.commit()
+
+
+async def legacy_lookup(session, owner_id: int, prompt: str):
+    result = await session.execute(
+        select(Note).filter(
+            Note.owner_id == owner_id,
+            or_(
+                Note.tags.ilike(f'%,{prompt},%'),
+                Note.tags.ilike(f'{prompt},%'),
+                Note.tags.ilike(f'%,{prompt}'),
+                Note.tags.ilike(f'{prompt}'),
+            )
+        ).limit(10)
+    )
+    return result.scalars().all()
+
+
+async def main() -> None:
+    for scale in parse_scales("1000,10000,100000"):
+        await reset_schema()
+        owner_id = await create_user()
+        await seed(owner_id, scale)
+
+        async with async_session() as session:
+            cases = {
+                "legacy_ilike": lambda: legacy_lookup(session, owner_id, "tag7"),
+                "tag_any": lambda: dao.get_notes_by_tags(session, owner_id, ["tag7", "tag8"], "any"),
+                "tag_all": lambda: dao.get_notes_by_tags(session, owner_id, ["tag7", "tag8"], "all"),
+            }
+            for case, func in cases.items():
+                report("tags", case=case, notes=scale, **summarize(await measure(func, 50)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""Statements and latency per update/delete: read-modify-write vs single DML.
+
+    python -m benchmarks.bench_update
+"""
+import asyncio
+import time
+
+from benchmarks.common import create_user, report, reset_schema, summarize
+
+from sqlalchemy import event, insert, select
+
+from src.database import async_engine, async_session
+from src.note import dao
+from src.note.model import Note
+from src.note.schema import NoteUpdate
+from src.user.schema import UserResponse
+
+ROUNDS = 500
+statements = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def legacy_update(session, note_id: int, owner_id: int, note_update: NoteUpdate) -> None:
+    result = await session.execute(select(Note).filter(Note.id == note_id, Note.owner_id == owner_id))
+    db_note = result.scalars().first()
+    for var, value in vars(note_update).items():
+        setattr(db_note, var, value) if value is not None else None
+    await session.commit()
+    await session.refresh(db_note)
+
+
+async def legacy_delete(session, note_id: int, owner_id: int) -> None:
+    result = await session.execute(select(Note).filter(Note.id == note_id, Note.owner_id == owner_id))
+    await session.delete(result.scalars().first())
+    await session.commit()
+
+
+async def run(name: str, func, ids: list[int]) -> None:
+    global statements
+    statements, samples = 0, []
+    for note_id in ids:
+        start = time.perf_counter()
+        await func(note_id)
+        samples.append(time.perf_counter() - start)
+    report("update", case=name, statements_per_op=statements / len(ids), **summarize(samples))
+
+
+async def main() -> None:
+    await reset_schema()
+    user = UserResponse(id=await create_user(), username="bench", created_at="2024-01-01T00:00:00")
+    async with async_session() as session:
+        result = await session.execute(
+            insert(Note).returning(Note.id, sort_by_parameter_order=True),
+            [{"title": f"n{i}", "content": "x" * 2000, "tags": "", "owner_id": user.id} for i in range(4 * ROUNDS)]
+        )
+        ids = result.scalars().all()
+        await session.commit()
+
+        change = NoteUpdate(content="y" * 2000)
+        await run("legacy_update", lambda i: legacy_update(session, i, user.id, change), ids[:ROUNDS])
+        await run("dml_update", lambda i: dao.update_note(session, i, change, user), ids[ROUNDS:2 * ROUNDS])
+        await run("legacy_delete", lambda i: legacy_delete(session, i, user.id), ids[2 * ROUNDS:3 * ROUNDS])
+        await run("dml_delete", lambda i: dao.delete_note(session, i, user), ids[3 * ROUNDS:])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
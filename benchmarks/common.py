@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+# The app reads its settings at import time, so point it at a throwaway
+# SQLite database before anything from `src` is imported.
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'dreamnotes_bench.db')}"
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from src.database import Base, async_engine, async_session  # noqa: E402
+from src.note import model as note_model  # noqa: E402,F401
+from src.user.model import User  # noqa: E402
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if async_engine.dialect.name == "sqlite":
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def parse_scales(default: str) -> list[int]:
+    return [int(scale) for scale in os.getenv("BENCH_SCALES", default).split(",")]
+
+
+async def reset_schema() -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def create_user(username: str = "bench") -> int:
+    async with async_session() as session:
+        result = await session.execute(
+            insert(User).returning(User.id),
+            [{"username": username, "hashed_password": "x"}]
+        )
+        user_id = result.scalar_one()
+        await session.commit()
+    return user_id
+
+
+async def measure(func, repeat: int = 100) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50) * 1000,
+        "p95_ms": pick(0.95) * 1000,
+        "p99_ms": pick(0.99) * 1000,
+    }
+
+
+def report(name: str, **fields) -> None:
+    print(json.dumps({"benchmark": name, **fields}))
+
+
+def use_fakeredis() -> None:
+    """
+    Makes the app's startup connect to an in-process fakeredis instead of REDIS_HOST.
+    """
+    import fakeredis
+    import src.main
+    from src.utils import redis_client
+    from src.utils.instrumentation import TimedRedis
+
+    async def init_fake_redis():
+        redis_client.redis = TimedRedis(connection_pool=fakeredis.FakeAsyncRedis(decode_responses=True).connection_pool)
+        return redis_client.redis
+
+    redis_client.init_redis = init_fake_redis
+    src.main.init_redis = init_fake_redis
+
+
+@asynccontextmanager
+async def running(app):
+    """
+    Drives the ASGI lifespan protocol, so the app starts up and shuts down
+    exactly as under a server while requests go through an in-process transport.
+    """
+    to_app, from_app = asyncio.Queue(), asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, to_app.get, from_app.put))
+    await to_app.put({"type": "lifespan.startup"})
+    message = await from_app.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"App startup failed: {message.get('message')}")
+    try:
+        yield app
+    finally:
+        await to_app.put({"type": "lifespan.shutdown"})
+        await from_app.get()
+        await task
@@ -0,0 +1,276 @@
+"""Load test of every note and user endpoint, with baseline comparison.
+
+Seeds a fresh database, starts the app in-process (fakeredis, in-memory job
+queue) and drives each scenario with `--concurrency` async clients. Results
+go to JSON; with `--baseline`, any scenario whose p95 latency or throughput
+regressed by more than `--tolerance` fails the run.
+
+    python -m benchmarks.load --notes 100000 --requests 2000 --output benchmarks/results/latest.json
+    python -m benchmarks.load --baseline benchmarks/results/baseline.json
+    python -m benchmarks.load --save-baseline benchmarks/results/baseline.json
+
+Runs against SQLite by default; set DATABASE_URL to a local Postgres to
+measure that instead.
+"""
+import os
+
+# Settings are read at import time. Keep rate limiting and bcrypt out of the
+# way unless the caller asks otherwise; bcrypt cost is its own benchmark.
+os.environ.setdefault("REQUEST_LIMIT_PER_MINUTE", "1000000000")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("JOB_BACKEND", "memory")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+if os.getenv("DATABASE_URL", "sqlite").startswith("sqlite"):
+    os.environ.setdefault("SEARCH_BACKEND", "memory")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import itertools  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from typing import Callable, NamedTuple  # noqa: E402
+
+from benchmarks.common import running, summarize, use_fakeredis  # noqa: E402
+from benchmarks.seed import WORDS, seed  # noqa: E402
+
+import httpx  # noqa: E402
+
+from src.user.auth import create_access_token  # noqa: E402
+
+
+class Request(NamedTuple):
+    method: str
+    url: str
+    kwargs: dict = {}
+
+
+class Scenario(NamedTuple):
+    name: str
+    build: Callable[[int, "Context"], Request]
+    # Requests per scenario are capped by what the context can supply.
+    limit: Callable[["Context"], int] | None = None
+    after: Callable[[int, httpx.Response, "Context"], None] | None = None
+
+
+class Context:
+    def __init__(self, seeded: dict) -> None:
+        self.user_ids = seeded["user_ids"]
+        self.password = seeded["password"]
+        self.tags = seeded["tags"]
+        self.notes = seeded["notes"]
+        self.rng = random.Random(19)
+        self.tokens = {user_id: create_access_token({"sub": str(user_id)}) for user_id in self.user_ids}
+        self.created_notes: list[tuple[int, int]] = []
+        self.created_users: list[tuple[int, str]] = []
+
+    def user(self, i: int) -> int:
+        return self.user_ids[i % len(self.user_ids)]
+
+    def auth(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    def seeded_note(self, i: int) -> tuple[int, int]:
+        # Seeding assigns note k (1-based) to user_ids[(k - 1) % users].
+        users = len(self.user_ids)
+        index = i % users
+        note_id = index + 1 + users * self.rng.randrange(max(self.notes // users, 1))
+        return self.user_ids[index], note_id
+
+
+def _note_body(i: int) -> dict:
+    return {"title": f"load {i}", "content": " ".join(WORDS), "tags": ["load", "dream"]}
+
+
+def _record_note(i: int, response: httpx.Response, ctx: Context) -> None:
+    if response.status_code == 200:
+        body = response.json()
+        ctx.created_notes.append((ctx.user(i), body["id"]))
+
+
+def _record_user(i: int, response: httpx.Response, ctx: Context) -> None:
+    if response.status_code == 200:
+        ctx.created_users.append((response.json()["id"], f"load-{i}"))
+
+
+def _read_note(i: int, ctx: Context) -> Request:
+    user_id, note_id = ctx.seeded_note(i)
+    return Request("GET", f"/api/notes/{note_id}", {"headers": ctx.auth(user_id)})
+
+
+def _read_batch(i: int, ctx: Context) -> Request:
+    user_id, _ = ctx.seeded_note(i)
+    ids = [ctx.seeded_note(i)[1] for _ in range(20)]
+    return Request("POST", "/api/notes/batch", {"headers": ctx.auth(user_id), "json": {"ids": ids}})
+
+
+def _update_note(i: int, ctx: Context) -> Request:
+    user_id, note_id = ctx.seeded_note(i)
+    return Request("PUT", f"/api/notes/{note_id}", {"headers": ctx.auth(user_id), "json": {"title": f"edited {i}"}})
+
+
+def _delete_note(i: int, ctx: Context) -> Request:
+    user_id, note_id = ctx.created_notes[i]
+    return Request("DELETE", f"/api/notes/{note_id}", {"headers": ctx.auth(user_id)})
+
+
+def _change_password(i: int, ctx: Context) -> Request:
+    user_id, _ = ctx.created_users[i]
+    token = create_access_token({"sub": str(user_id)})
+    return Request(
+        "POST", "/api/users/me/password",
+        {"headers": {"Authorization": f"Bearer {token}"}, "json": {"old_password": ctx.password, "new_password": "changed"}}
+    )
+
+
+def _bulk_body(i: int) -> bytes:
+    return b"".join(json.dumps(_note_body(i * 100 + line)).encode() + b"\n" for line in range(100))
+
+
+SCENARIOS = [
+    Scenario("users.create", lambda i, ctx: Request(
+        "POST", "/api/users/", {"json": {"username": f"load-{i}", "password": ctx.password}}
+    ), after=_record_user),
+    Scenario("users.login", lambda i, ctx: Request(
+        "POST", "/api/users/token",
+        {"data": {"username": f"user{i % len(ctx.user_ids)}", "password": ctx.password}}
+    )),
+    Scenario("users.read", lambda i, ctx: Request("GET", f"/api/users/{ctx.user(i)}")),
+    Scenario("users.logout", lambda i, ctx: Request(
+        "POST", "/api/users/logout",
+        {"headers": {"Authorization": f"Bearer {create_access_token({'sub': str(ctx.user(i))})}"}}
+    )),
+    Scenario("notes.create", lambda i, ctx: Request(
+        "POST", "/api/notes/", {"headers": ctx.auth(ctx.user(i)), "json": _note_body(i)}
+    ), after=_record_note),
+    Scenario("notes.bulk", lambda i, ctx: Request(
+        "POST", "/api/notes/bulk", {"headers": ctx.auth(ctx.user(i)), "content": _bulk_body(i)}
+    ), limit=lambda ctx: 50),
+    Scenario("notes.list", lambda i, ctx: Request("GET", "/api/notes/", {"headers": ctx.auth(ctx.user(i))})),
+    Scenario("notes.list_summary", lambda i, ctx: Request(
+        "GET", "/api/notes/", {"headers": ctx.auth(ctx.user(i)), "params": {"view": "summary", "limit": 100}}
+    )),
+    Scenario("notes.by_tag", lambda i, ctx: Request(
+        "GET", f"/api/notes/{ctx.rng.choice(ctx.tags)}", {"headers": ctx.auth(ctx.user(i))}
+    )),
+    Scenario("notes.search", lambda i, ctx: Request(
+        "GET", "/api/notes/search", {"headers": ctx.auth(ctx.user(i)), "params": {"q": ctx.rng.choice(WORDS)}}
+    )),
+    Scenario("notes.stats", lambda i, ctx: Request("GET", "/api/notes/stats", {"headers": ctx.auth(ctx.user(i))})),
+    Scenario("notes.read", _read_note),
+    Scenario("notes.batch", _read_batch),
+    Scenario("notes.update", _update_note),
+    Scenario("notes.export", lambda i, ctx: Request(
+        "GET", "/api/notes/export", {"headers": ctx.auth(ctx.user(i))}
+    ), limit=lambda ctx: 20),
+    Scenario("notes.delete", _delete_note, limit=lambda ctx: len(ctx.created_notes)),
+    Scenario("users.change_password", _change_password, limit=lambda ctx: len(ctx.created_users)),
+]
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        scenario: Scenario,
+        ctx: Context,
+        requests: int,
+        concurrency: int
+) -> dict:
+    if scenario.limit is not None:
+        requests = min(requests, scenario.limit(ctx))
+    counter = itertools.count()
+    latencies, errors = [], 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            request = scenario.build(i, ctx)
+            start = time.perf_counter()
+            response = await client.request(request.method, request.url, **request.kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            if scenario.after is not None:
+                scenario.after(i, response, ctx)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        return {"n": 0, "errors": 0}
+    return {"errors": errors, "throughput_rps": len(latencies) / elapsed, **summarize(latencies)}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not current.get("n") or not previous.get("n"):
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']:.0f}/s -> {current['throughput_rps']:.0f}/s"
+            )
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--notes", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=1_000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", help="also write the results here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    wanted = set(args.scenarios.split(",")) if args.scenarios else None
+    use_fakeredis()
+    from src.main import app
+
+    started = time.perf_counter()
+    ctx = Context(await seed(args.users, args.notes))
+    seed_seconds = time.perf_counter() - started
+
+    results = {}
+    async with running(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+            for scenario in SCENARIOS:
+                if wanted is not None and scenario.name not in wanted:
+                    continue
+                results[scenario.name] = await run_scenario(client, scenario, ctx, args.requests, args.concurrency)
+                print(json.dumps({"scenario": scenario.name, **results[scenario.name]}))
+
+    report = {
+        "meta": {
+            "users": args.users,
+            "notes": args.notes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "seed_seconds": seed_seconds,
+        },
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
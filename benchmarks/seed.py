@@ -0,0 +1,103 @@
+"""Synthetic users and notes at scale, written straight through Core inserts.
+
+Derived data (snippets, tag links, stats counters, search vectors) is filled
+in the way the DAO would, so every endpoint sees a realistic database.
+
+    python -m benchmarks.seed --users 100 --notes 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import reset_schema
+
+from sqlalchemy import insert
+
+from src.database import async_session
+from src.note import stats
+from src.note.dao import make_snippet
+from src.note.model import Note, Tag, note_tags
+from src.note.search import InvertedIndexSearchEngine, search_engine
+from src.user.model import User
+from src.utils.password_hashing import hash_password
+
+BATCH = 10_000
+PASSWORD = "bench-password"
+TAGS = ["dream", "lucid", "nightmare", "flying", "water", "family", "work", "school", "chase", "recurring"]
+WORDS = (
+    "I was in a house by the ocean and the stairs kept going down while my teeth were "
+    "falling out and someone I knew was calling from another room full of water"
+).split()
+
+
+def make_content(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+async def seed(users: int, notes: int, content_words: int = 150, seed_value: int = 19) -> dict:
+    """
+    Resets the schema and fills it; returns what the load generator needs.
+    """
+    rng = random.Random(seed_value)
+    await reset_schema()
+    hashed = await hash_password(PASSWORD)
+    start = datetime(2024, 1, 1)
+
+    async with async_session() as session:
+        result = await session.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [{"username": f"user{i}", "hashed_password": hashed} for i in range(users)]
+        )
+        user_ids = result.scalars().all()
+
+        result = await session.execute(
+            insert(Tag).returning(Tag.owner_id, Tag.name, Tag.id, sort_by_parameter_order=True),
+            [{"owner_id": user_id, "name": name} for user_id in user_ids for name in TAGS]
+        )
+        tag_ids = {(owner_id, name): tag_id for owner_id, name, tag_id in result.all()}
+
+        for offset in range(0, notes, BATCH):
+            rows, picked = [], []
+            for i in range(offset, min(offset + BATCH, notes)):
+                owner_id = user_ids[i % users]
+                names = rng.sample(TAGS, rng.randint(0, 3))
+                content = make_content(rng, content_words)
+                created = start + timedelta(minutes=i)
+                rows.append({
+                    "title": f"dream {i}", "content": content, "snippet": make_snippet(content),
+                    "tags": ",".join(names), "owner_id": owner_id, "created_at": created, "updated_at": created,
+                })
+                picked.append(names)
+
+            result = await session.execute(insert(Note).returning(Note.id, sort_by_parameter_order=True), rows)
+            ids = result.scalars().all()
+            links = [
+                {"note_id": note_id, "owner_id": row["owner_id"], "tag_id": tag_ids[(row["owner_id"], name)]}
+                for note_id, row, names in zip(ids, rows, picked) for name in names
+            ]
+            if links:
+                await session.execute(insert(note_tags), links)
+            if not isinstance(search_engine, InvertedIndexSearchEngine):
+                await search_engine.index_many(session, [{"id": note_id, **row} for note_id, row in zip(ids, rows)])
+            await session.commit()
+
+        await stats.rebuild(session)
+
+    return {"user_ids": user_ids, "password": PASSWORD, "tags": TAGS, "notes": notes}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--notes", type=int, default=10_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    await seed(args.users, args.notes)
+    print(f"Seeded {args.users} users and {args.notes} notes in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
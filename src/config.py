@@ -13,3 +13,100 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis://localhost")
 
 REQUEST_LIMIT_PER_MINUTE = os.getenv("REQUEST_LIMIT_PER_MINUTE", 60)
+
+# "postgres" uses the stored tsvector column, "memory" the in-process inverted index (SQLite/tests).
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "postgres")
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "simple")
+
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+PRINCIPAL_CACHE_REDIS_TTL = int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL", 300))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_USE_REDIS = os.getenv("PRINCIPAL_CACHE_USE_REDIS", "true").lower() == "true"
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# "thread" (bcrypt releases the GIL) or "process".
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+# Put username/created_at in the token so authenticated requests skip the user lookup.
+JWT_EMBED_PRINCIPAL = os.getenv("JWT_EMBED_PRINCIPAL", "false").lower() == "true"
+
+NOTE_BULK_BATCH_SIZE = int(os.getenv("NOTE_BULK_BATCH_SIZE", 500))
+NOTE_BULK_MAX_LINES = int(os.getenv("NOTE_BULK_MAX_LINES", 100000))
+NOTE_EXPORT_CHUNK_SIZE = int(os.getenv("NOTE_EXPORT_CHUNK_SIZE", 1000))
+NOTE_BATCH_MAX_IDS = int(os.getenv("NOTE_BATCH_MAX_IDS", 100))
+# Storage codec for note bodies: "none", "zlib" or "zstd" (needs zstandard).
+# Bodies under NOTE_CONTENT_COMPRESS_MIN bytes are always stored as plain UTF-8.
+NOTE_CONTENT_CODEC = os.getenv("NOTE_CONTENT_CODEC", "zlib")
+NOTE_CONTENT_COMPRESS_MIN = int(os.getenv("NOTE_CONTENT_COMPRESS_MIN", 1024))
+NOTE_CONTENT_COMPRESS_LEVEL = int(os.getenv("NOTE_CONTENT_COMPRESS_LEVEL", 6))
+# Every Nth revision of a note is stored in full, so rebuilding any revision
+# applies fewer than N deltas.
+NOTE_REVISION_SNAPSHOT_INTERVAL = int(os.getenv("NOTE_REVISION_SNAPSHOT_INTERVAL", 20))
+
+# Responses smaller than this go out uncompressed; br needs the Brotli package.
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 6))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", 4))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Connections each worker opens per engine at startup, before it accepts requests.
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", 2))
+
+# Comma-separated read replica URLs; empty means every query goes to DATABASE_URL.
+DATABASE_REPLICA_URLS = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", 5))
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Per-module overrides, e.g. "src.note.dao=DEBUG,sqlalchemy.engine=WARNING".
+LOG_LEVELS = os.getenv("LOG_LEVELS", "sqlalchemy.engine=WARNING")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Fraction of INFO-and-below records kept; warnings and errors are never sampled.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+NOTE_CACHE_TTL = int(os.getenv("NOTE_CACHE_TTL", 300))
+NOTE_CACHE_LOCAL_SIZE = int(os.getenv("NOTE_CACHE_LOCAL_SIZE", 10000))
+
+# "redis" reconciles counters across workers, "memory" keeps them per process.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "redis")
+RATE_LIMIT_SYNC_INTERVAL = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", 0.25))
+
+# "redis" runs jobs from a Redis stream in `python -m src.worker` processes;
+# "memory" runs them on an in-process pool (tests, single-process runs).
+JOB_BACKEND = os.getenv("JOB_BACKEND", "redis")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 8))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", 1.0))
+JOB_IDEMPOTENCY_TTL = int(os.getenv("JOB_IDEMPOTENCY_TTL", 86400))
+# Seconds a claimed job may stay unacknowledged before another worker takes it over.
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", 60))
+
+# Period of the event-loop lag probe behind `event_loop_lag_seconds`.
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", 0.5))
+
+# "redis" shares note change events between workers through per-user streams
+# and one pub/sub channel; "memory" only reaches connections in this process.
+CHANGE_FEED_BACKEND = os.getenv("CHANGE_FEED_BACKEND", "redis")
+# Events kept per user for Last-Event-ID resumption, and how long an idle user's log lives.
+CHANGE_FEED_HISTORY = int(os.getenv("CHANGE_FEED_HISTORY", 1000))
+CHANGE_FEED_HISTORY_TTL = int(os.getenv("CHANGE_FEED_HISTORY_TTL", 86400))
+# Events a connection may fall behind before it is closed and has to resume.
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", 256))
+CHANGE_FEED_KEEPALIVE = float(os.getenv("CHANGE_FEED_KEEPALIVE", 15))
+
+# `python -m src.serve`; SERVER_WORKERS=0 means one per CPU available to the process.
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 0))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 2048))
+# Seconds a stopping worker waits for in-flight requests before cancelling them.
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
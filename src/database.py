@@ -1,20 +1,214 @@
+import asyncio
+import itertools
+from contextlib import AsyncExitStack
 import logging
+import time
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import DeclarativeBase
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Session, configure_mappers
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from src.config import DATABASE_URL
+from src.config import (
+    DATABASE_REPLICA_URLS,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PREWARM,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    REPLICA_HEALTH_CHECK_INTERVAL,
+    REPLICA_STICKY_SECONDS,
+)
+from src.utils.instrumentation import instrument_engine, record
+from src.utils.logging_config import get_logger
+from src.utils.lru import TTLCache
+from src.utils.metrics import Counter, Gauge, Histogram
+from src.utils.redis_client import get_redis
+
+logger = get_logger(__name__)
+
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+)
+db_pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out of the pool.")
+db_pool_overflow = Gauge("db_pool_overflow", "Connections open beyond the configured pool size.")
+db_replicas_healthy = Gauge("db_replicas_healthy", "Read replicas currently passing health checks.")
+db_routed_reads = Counter("db_routed_reads_total", "Read-only sessions by the engine serving them.", ["target"])
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            db_pool_checkout_seconds.observe(elapsed)
+            record("pool", elapsed)
+
+
+def engine_options(url: str) -> dict:
+    # SQLite (benchmarks, local runs) keeps SQLAlchemy's own pool choice.
+    if url.startswith("sqlite"):
+        return {}
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if "+asyncpg" in url:
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+async_engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(async_engine)
+
+if isinstance(async_engine.pool, TimedQueuePool):
+    db_pool_checked_out.set_function(async_engine.pool.checkedout)
+    db_pool_overflow.set_function(lambda: max(async_engine.pool.overflow(), 0))
+
+
+
+class ReplicaRouter:
+    """
+    Picks a healthy reader engine and tracks users that must read from the writer.
+
+    After a user writes, their reads stay on the writer for REPLICA_STICKY_SECONDS
+    so replication lag never hides their own changes. The window is recorded
+    locally and, when Redis is up, shared with the other workers.
+    """
+
+    def __init__(self, writer: AsyncEngine, readers: list[AsyncEngine]) -> None:
+        self.writer = writer
+        self.readers = readers
+        self.healthy = list(readers)
+        self._round_robin = itertools.count()
+        self._sticky = TTLCache(100_000, REPLICA_STICKY_SECONDS)
+        db_replicas_healthy.set_function(lambda: len(self.healthy))
+
+    def reader(self) -> AsyncEngine:
+        healthy = self.healthy
+        if not healthy:
+            return self.writer
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def mark_write(self, user_id: int) -> None:
+        if not self.readers:
+            return
+        self._sticky.set(user_id, True)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(f"replica:sticky:{user_id}", 1, px=int(REPLICA_STICKY_SECONDS * 1000))
+            except RedisError as e:
+                logger.warning("Could not share read-your-writes window: %s", e)
+
+    async def is_sticky(self, user_id: int) -> bool:
+        if self._sticky.get(user_id):
+            return True
+        redis = get_redis()
+        if redis is None:
+            return False
+        try:
+            return bool(await redis.exists(f"replica:sticky:{user_id}"))
+        except RedisError:
+            return True
+
+    async def check_health(self) -> None:
+        healthy = []
+        for engine in self.readers:
+            try:
+                async with engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), REPLICA_HEALTH_CHECK_INTERVAL)
+                healthy.append(engine)
+            except Exception as e:
+                logger.warning("Read replica %s failed health check: %s", engine.url.render_as_string(), e)
+        self.healthy = healthy
+
+    async def run_health_checks(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(REPLICA_HEALTH_CHECK_INTERVAL)
+
+
+replica_router = ReplicaRouter(
+    async_engine,
+    [create_async_engine(url, **engine_options(url)) for url in DATABASE_REPLICA_URLS]
+)
+for reader in replica_router.readers:
+    instrument_engine(reader)
+
+
+async def _prewarm_engine(engine: AsyncEngine, connections: int) -> None:
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+
+
+async def prewarm(connections: int = DB_POOL_PREWARM) -> None:
+    """
+    Configures the mappers and opens `connections` pooled connections per
+    engine, so the first requests pay for neither.
+    """
+    configure_mappers()
+    for engine in [replica_router.writer, *replica_router.healthy]:
+        try:
+            await _prewarm_engine(engine, connections)
+        except Exception as e:
+            logger.warning("Could not prewarm %s: %s", engine.url.render_as_string(), e)
+
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs to a reader once `use_replica` enabled it for the
+    session; DML, flushes and everything else go to the writer.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        reader = self.info.get("reader")
+        if reader is not None and not self._flushing and getattr(clause, "is_select", False):
+            return reader.sync_engine
+        return replica_router.writer.sync_engine
 
-async_engine = create_async_engine(DATABASE_URL)
 
 async_session = async_sessionmaker(
-    bind=async_engine,
     expire_on_commit=False,
-    class_=AsyncSession
+    class_=AsyncSession,
+    sync_session_class=RoutingSession
 
 )
 
 
+async def use_replica(session: AsyncSession, user_id: int) -> None:
+    """
+    Lets the following reads of `session` go to a replica unless the user
+    wrote recently.
+    """
+    if not replica_router.readers:
+        return
+    if await replica_router.is_sticky(user_id):
+        session.info.pop("reader", None)
+        db_routed_reads.inc(target="primary")
+        return
+    reader = session.info.setdefault("reader", replica_router.reader())
+    db_routed_reads.inc(target="primary" if reader is replica_router.writer else "replica")
+
+
+async def mark_write(session: AsyncSession, user_id: int) -> None:
+    session.info.pop("reader", None)
+    await replica_router.mark_write(user_id)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -23,5 +217,6 @@ logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
 
 async def get_db() -> AsyncSession:
+    # AsyncSession checks a connection out on its first statement, not here.
     async with async_session() as session:
         yield session
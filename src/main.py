@@ -1,19 +1,106 @@
-from src.config import REDIS_HOST
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from src.config import (
+    CHANGE_FEED_BACKEND,
+    EVENT_LOOP_LAG_INTERVAL,
+    JOB_BACKEND,
+    JOB_WORKERS,
+    RATE_LIMIT_BACKEND,
+    RESPONSE_BROTLI_QUALITY,
+    RESPONSE_COMPRESSION_MIN_SIZE,
+    RESPONSE_GZIP_LEVEL,
+)
+from src.database import async_session, prewarm, replica_router
+from src.note import jobs as note_jobs  # noqa: F401  (registers the note job handlers)
+from src.note.changes import change_feed, redis_change_log
+from src.note.search import search_engine, InvertedIndexSearchEngine
 from src.note.router import router as note_router
 from src.user.router import router as user_router
+from src.utils.metrics import registry
+from src.utils.password_hashing import hasher
+from src.utils.compression import CompressionMiddleware
+from src.utils.instrumentation import MetricsMiddleware, monitor_event_loop, report_startup
+from src.utils.jobs import RedisJobBackend, job_queue
+from src.utils.redis_client import init_redis
+from src.utils.logging_config import get_logger
+from src.utils.request_limiter import RedisBackend, rate_limiter
 
 from fastapi import FastAPI
-from fastapi_limiter import FastAPILimiter
-from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from fastapi.responses import PlainTextResponse
 
-app = FastAPI()
+logger = get_logger(__name__)
+background_tasks: list[asyncio.Task] = []
 
 
-@app.on_event("startup")
 async def startup():
-    redis = await aioredis.from_url(REDIS_HOST, encoding="utf-8", decode_responses=True)
-    await FastAPILimiter.init(redis)
+    started = time.perf_counter()
+    redis = await init_redis()
+    try:
+        # Opens the first pooled connection now rather than on the first request.
+        await redis.ping()
+    except (RedisError, OSError) as e:
+        logger.warning("Redis is not reachable at startup: %s", e)
+    await prewarm()
+    if RATE_LIMIT_BACKEND == "redis":
+        rate_limiter.backend = RedisBackend(redis)
+    background_tasks.append(asyncio.create_task(rate_limiter.run()))
+    background_tasks.append(asyncio.create_task(monitor_event_loop(EVENT_LOOP_LAG_INTERVAL)))
+
+    if JOB_BACKEND == "redis":
+        job_queue.backend = RedisJobBackend(redis)
+    else:
+        background_tasks.append(asyncio.create_task(job_queue.run(JOB_WORKERS)))
+
+    if CHANGE_FEED_BACKEND == "redis":
+        change_feed.log = redis_change_log(redis)
+    background_tasks.append(asyncio.create_task(change_feed.run()))
+
+    if replica_router.readers:
+        await replica_router.check_health()
+        background_tasks.append(asyncio.create_task(replica_router.run_health_checks()))
+
+    if isinstance(search_engine, InvertedIndexSearchEngine):
+        async with async_session() as session:
+            await search_engine.rebuild(session)
+
+    report_startup(time.perf_counter() - started)
+
 
+def drain() -> None:
+    """
+    Ends change feeds and stops taking in-process jobs, so a stopping worker
+    is not held open by long-lived streams.
+    """
+    change_feed.close()
+    job_queue.stop()
+
+
+async def shutdown():
+    drain()
+    for task in background_tasks:
+        task.cancel()
+    await rate_limiter.sync()
+    hasher.shutdown()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=RESPONSE_COMPRESSION_MIN_SIZE,
+    gzip_level=RESPONSE_GZIP_LEVEL,
+    brotli_quality=RESPONSE_BROTLI_QUALITY,
+)
+# Added last, so outermost: its timings include compression.
+app.add_middleware(MetricsMiddleware)
 app.include_router(note_router, prefix="/api", tags=["notes"])
 app.include_router(user_router, prefix="/api", tags=["user"])
 
@@ -21,3 +108,8 @@ app.include_router(user_router, prefix="/api", tags=["user"])
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the DreamNotesAPI."}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
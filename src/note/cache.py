@@ -0,0 +1,156 @@
+from typing import Awaitable, Callable, Iterable
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from src.config import NOTE_CACHE_LOCAL_SIZE, NOTE_CACHE_TTL
+from src.utils.logging_config import get_logger
+from src.utils.lru import TTLCache
+from src.utils.metrics import Counter
+from src.utils.redis_client import get_redis
+
+logger = get_logger(__name__)
+
+note_cache_requests = Counter(
+    "note_cache_requests_total",
+    "Cached note reads by outcome: local/redis hit, miss, or 304.",
+    ["result"],
+)
+
+
+class NoteCache:
+    """
+    Per-user versioned cache of rendered note responses.
+
+    Every key embeds the user's generation counter, and writes bump the counter
+    instead of deleting keys: stale entries simply stop being addressed and
+    age out. Redis holds the counters and a shared copy of the entries; a local
+    LRU answers repeated reads in this worker.
+    """
+
+    def __init__(self, local_size: int, ttl: int) -> None:
+        self.ttl = ttl
+        self.local = TTLCache(local_size, ttl)
+        # Only used while Redis is not configured.
+        self._generations: dict[int, int] = {}
+
+    async def generation(self, user_id: int) -> int:
+        redis = get_redis()
+        if redis is None:
+            return self._generations.get(user_id, 0)
+        try:
+            return int(await redis.get(f"notes:gen:{user_id}") or 0)
+        except RedisError as e:
+            logger.warning("Note cache generation read failed: %s", e)
+            return -1
+
+    async def bump(self, user_id: int) -> None:
+        redis = get_redis()
+        if redis is None:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            return
+        try:
+            await redis.incr(f"notes:gen:{user_id}")
+        except RedisError as e:
+            logger.error("Note cache invalidation failed for user ID %s: %s", user_id, e)
+
+    async def bump_many(self, user_ids: Iterable[int]) -> None:
+        """
+        `bump` for many users in one round trip, for changes made outside the DAO.
+        """
+        user_ids = list(user_ids)
+        redis = get_redis()
+        if redis is None:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            return
+        pipe = redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.incr(f"notes:gen:{user_id}")
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            logger.error("Note cache invalidation failed for %s users: %s", len(user_ids), e)
+
+    async def get(self, user_id: int, generation: int, key: str) -> tuple[str, str] | None:
+        full_key = f"notes:cache:{user_id}:{generation}:{key}"
+        entry = self.local.get(full_key)
+        if entry is not None:
+            note_cache_requests.inc(result="local")
+            return entry
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(full_key)
+            except RedisError as e:
+                logger.warning("Note cache read failed: %s", e)
+                raw = None
+            if raw is not None:
+                etag, _, body = raw.partition("\n")
+                self.local.set(full_key, (etag, body))
+                note_cache_requests.inc(result="redis")
+                return etag, body
+
+        note_cache_requests.inc(result="miss")
+        return None
+
+    async def set(self, user_id: int, generation: int, key: str, etag: str, body: str) -> None:
+        full_key = f"notes:cache:{user_id}:{generation}:{key}"
+        self.local.set(full_key, (etag, body))
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(full_key, f"{etag}\n{body}", ex=self.ttl)
+            except RedisError as e:
+                logger.warning("Note cache write failed: %s", e)
+
+
+note_cache = NoteCache(NOTE_CACHE_LOCAL_SIZE, NOTE_CACHE_TTL)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+async def cached_response(
+        request: Request,
+        user_id: int,
+        key: str,
+        load: Callable[[], Awaitable[tuple[str, str | None]]]
+) -> Response:
+    """
+    Serves `key` for the user from cache, or renders it with `load`.
+
+    `load` returns the JSON body and its ETag; None means "derive the ETag
+    from the user's generation", which lets list pages answer 304 without
+    even a cache lookup.
+    """
+    generation = await note_cache.generation(user_id)
+    if generation < 0:
+        body, etag = await load()
+        return Response(body, media_type="application/json", headers={"ETag": etag} if etag else None)
+
+    generation_etag = f'W/"{user_id}.{generation}"'
+    if_none_match = request.headers.get("if-none-match")
+    if _etag_matches(if_none_match, generation_etag):
+        note_cache_requests.inc(result="not_modified")
+        return Response(status_code=304, headers={"ETag": generation_etag})
+
+    entry = await note_cache.get(user_id, generation, key)
+    if entry is None:
+        body, etag = await load()
+        etag = etag or generation_etag
+        await note_cache.set(user_id, generation, key, etag, body)
+    else:
+        etag, body = entry
+
+    if _etag_matches(if_none_match, etag):
+        note_cache_requests.inc(result="not_modified")
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
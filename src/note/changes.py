@@ -0,0 +1,306 @@
+"""
+Per-user feed of note create/update/delete events behind GET /notes/changes
+and its WebSocket twin.
+
+Events are appended to a capped per-user log whose entry ids ("<ms>-<seq>")
+are what clients send back as Last-Event-ID to resume. With Redis, the log is
+a stream per user and each append publishes the user id on one channel. Each
+worker keeps one subscription to that channel and, for users with connections
+on this worker, reads the new entries once and fans them out to in-process
+queues, so an idle connection costs a coroutine and a queue, not a Redis
+connection.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator
+
+import orjson
+from redis.exceptions import RedisError
+
+from src.config import CHANGE_FEED_HISTORY, CHANGE_FEED_HISTORY_TTL, CHANGE_FEED_QUEUE_SIZE
+from src.utils.logging_config import get_logger
+from src.utils.metrics import Counter, Gauge
+
+logger = get_logger(__name__)
+
+change_feed_connections = Gauge("change_feed_connections", "Open change feed connections in this worker.")
+change_events_published = Counter("change_events_published_total", "Note change events appended to the feed.")
+change_feed_dropped = Counter(
+    "change_feed_dropped_total",
+    "Connections closed because the client fell CHANGE_FEED_QUEUE_SIZE events behind.",
+)
+
+Event = tuple[str, dict]
+
+
+def parse_event_id(event_id: str) -> tuple[int, int]:
+    """
+    "<ms>-<seq>" as a comparable tuple; raises ValueError if malformed.
+    """
+    ms, seq = event_id.split("-")
+    return int(ms), int(seq)
+
+
+def _after(event_id: str) -> str:
+    ms, seq = parse_event_id(event_id)
+    return f"{ms}-{seq + 1}"
+
+
+class MemoryChangeLog:
+    """
+    Log for a single process; connections on other workers see nothing.
+    Meant for tests and local runs.
+    """
+
+    shared = False
+
+    def __init__(self, history: int) -> None:
+        self.history = history
+        self._logs: dict[int, deque[Event]] = {}
+        self._last = (0, 0)
+
+    def _next_id(self) -> str:
+        ms = int(time.time() * 1000)
+        self._last = (ms, 0) if ms > self._last[0] else (self._last[0], self._last[1] + 1)
+        return "%d-%d" % self._last
+
+    async def append(self, user_id: int, events: list[dict]) -> None:
+        log = self._logs.setdefault(user_id, deque(maxlen=self.history))
+        log.extend((self._next_id(), event) for event in events)
+
+    async def latest(self, user_id: int) -> str:
+        log = self._logs.get(user_id)
+        return log[-1][0] if log else "0-0"
+
+    async def read(self, user_id: int, after: str) -> tuple[list[Event], bool]:
+        """
+        Entries newer than `after`, and whether older ones were trimmed since.
+        """
+        log = self._logs.get(user_id) or ()
+        position = parse_event_id(after)
+        events = [entry for entry in log if parse_event_id(entry[0]) > position]
+        truncated = bool(log) and parse_event_id(log[0][0]) > position
+        return events, truncated
+
+    async def listen(self, poke) -> None:
+        return
+
+
+class RedisChangeLog:
+    shared = True
+    channel = "notes:changes"
+
+    def __init__(self, redis, history: int, ttl: int) -> None:
+        self.redis = redis
+        self.history = history
+        self.ttl = ttl
+
+    def _key(self, user_id: int) -> str:
+        return f"notes:changes:{user_id}"
+
+    async def append(self, user_id: int, events: list[dict]) -> None:
+        key = self._key(user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(key, {"event": orjson.dumps(event)}, maxlen=self.history, approximate=True)
+        pipe.expire(key, self.ttl)
+        pipe.publish(self.channel, user_id)
+        await pipe.execute()
+
+    async def latest(self, user_id: int) -> str:
+        entries = await self.redis.xrevrange(self._key(user_id), count=1)
+        return entries[0][0] if entries else "0-0"
+
+    async def read(self, user_id: int, after: str) -> tuple[list[Event], bool]:
+        key = self._key(user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xrange(key, min=_after(after), count=self.history)
+        pipe.xrange(key, count=1)
+        entries, oldest = await pipe.execute()
+        events = [(entry_id, orjson.loads(fields["event"])) for entry_id, fields in entries]
+        if oldest:
+            truncated = parse_event_id(oldest[0][0]) > parse_event_id(after)
+        else:
+            # The stream expired after a quiet spell; it may have held events the client never saw.
+            truncated = parse_event_id(after)[0] < (time.time() - self.ttl) * 1000
+        return events, truncated
+
+    async def listen(self, poke) -> None:
+        """
+        Calls `poke(user_id)` for every append by any worker. After a lost
+        subscription it pokes `None`: everyone may have missed something.
+        """
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                poke(None)
+                async for message in pubsub.listen():
+                    poke(int(message["data"]))
+            except (RedisError, OSError) as e:
+                logger.warning("Change feed subscription lost: %s", e)
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+
+class Subscription:
+    __slots__ = ("queue", "last_id", "closed")
+
+    def __init__(self, size: int) -> None:
+        self.queue: asyncio.Queue[Event | None] = asyncio.Queue(size)
+        self.last_id = (0, 0)
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class ChangeFeed:
+    """
+    Appends events to the log and delivers them to this worker's connections.
+
+    For each user with connections here, one pump reads the log after a
+    shared cursor whenever a poke says it grew. A connection replays from its
+    own last id before relying on the pump, and skips anything at or before
+    that id, so reconnects neither lose nor repeat events. A connection whose
+    queue overflows is closed; the client resumes from the last id it got.
+    """
+
+    def __init__(self, log, queue_size: int) -> None:
+        self.log = log
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._cursors: dict[int, str] = {}
+        self._dirty: set[int] = set()
+        self._pumping: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+        change_feed_connections.set_function(
+            lambda: sum(len(subscribers) for subscribers in self._subscribers.values())
+        )
+
+    async def publish(self, user_id: int, events: list[dict]) -> None:
+        try:
+            await self.log.append(user_id, events)
+        except (RedisError, OSError) as e:
+            logger.error("Could not publish note changes for user ID %s: %s", user_id, e)
+            return
+        change_events_published.inc(len(events))
+        if not self.log.shared:
+            self.poke(user_id)
+
+    def poke(self, user_id: int | None) -> None:
+        for uid in self._subscribers if user_id is None else (user_id,):
+            if uid not in self._subscribers:
+                continue
+            self._dirty.add(uid)
+            if uid in self._cursors and uid not in self._pumping:
+                self._pumping.add(uid)
+                task = asyncio.create_task(self._pump(uid))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _pump(self, user_id: int) -> None:
+        try:
+            while user_id in self._dirty and user_id in self._subscribers:
+                self._dirty.discard(user_id)
+                events, _ = await self.log.read(user_id, self._cursors[user_id])
+                if not events or user_id not in self._subscribers:
+                    continue
+                self._cursors[user_id] = events[-1][0]
+                for subscription in self._subscribers[user_id]:
+                    for event in events:
+                        try:
+                            subscription.queue.put_nowait(event)
+                        except asyncio.QueueFull:
+                            change_feed_dropped.inc()
+                            subscription.closed = True
+                            break
+        except (RedisError, OSError) as e:
+            # The next poke retries from the same cursor.
+            logger.warning("Change feed read failed for user ID %s: %s", user_id, e)
+        finally:
+            self._pumping.discard(user_id)
+
+    async def subscribe(
+            self,
+            user_id: int,
+            last_event_id: str | None = None,
+            keepalive: float | None = None
+    ) -> AsyncIterator[Event | None]:
+        """
+        Yields (event_id, event) as they happen, after the backlog since
+        `last_event_id`; yields None every `keepalive` seconds of silence.
+        A "reset" event means the backlog was trimmed and the client should
+        reload its notes before carrying on.
+        """
+        if last_event_id is not None and parse_event_id(last_event_id)[0] > time.time() * 1000:
+            # An id from the future would park the shared cursor past real events.
+            last_event_id = None
+        subscription = Subscription(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        try:
+            backlog: list[Event] = []
+            if last_event_id is None:
+                start = await self.log.latest(user_id)
+            else:
+                backlog, truncated = await self.log.read(user_id, last_event_id)
+                start = backlog[-1][0] if backlog else last_event_id
+                if truncated:
+                    start = backlog[-1][0] if backlog else await self.log.latest(user_id)
+                    backlog = [(start, {"type": "reset"})]
+            # No await between the read and this: the pump must not start
+            # past anything the backlog did not cover.
+            self._cursors.setdefault(user_id, start)
+            if user_id in self._dirty:
+                self.poke(user_id)
+
+            for event in backlog:
+                yield event
+            subscription.last_id = parse_event_id(start)
+
+            # A closed subscription still hands out what it queued: those
+            # events are gap-free, so the client resumes right after them.
+            while not (subscription.closed and subscription.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    break
+                position = parse_event_id(event[0])
+                if position <= subscription.last_id:
+                    continue
+                subscription.last_id = position
+                yield event
+        finally:
+            subscribers = self._subscribers[user_id]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[user_id]
+                self._cursors.pop(user_id, None)
+                self._dirty.discard(user_id)
+
+    async def run(self) -> None:
+        await self.log.listen(self.poke)
+
+    def close(self) -> None:
+        """
+        Ends every open feed, e.g. on shutdown; clients reconnect elsewhere.
+        """
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.close()
+
+
+change_feed = ChangeFeed(MemoryChangeLog(CHANGE_FEED_HISTORY), CHANGE_FEED_QUEUE_SIZE)
+
+
+def redis_change_log(redis) -> RedisChangeLog:
+    return RedisChangeLog(redis, CHANGE_FEED_HISTORY, CHANGE_FEED_HISTORY_TTL)
@@ -1,13 +1,144 @@
-from sqlalchemy import and_
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Iterable
+
+import orjson
+from sqlalchemy import Integer, Row, Select, any_, bindparam, delete, func, insert, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import undefer
 from fastapi import HTTPException
 
-from src.utils.logging_config import logger
-from src.note.model import Note
-from src.note.schema import NoteCreate, NoteUpdate
+from src.config import NOTE_EXPORT_CHUNK_SIZE
+from src.database import async_session, mark_write, use_replica
+from src.utils.logging_config import get_logger
+from src.note import jobs, revisions, stats
+from src.note.changes import change_feed
+from src.note.cache import note_cache
+from src.note.model import SNIPPET_LENGTH, Note, NoteRevision, Tag, note_tags
+from src.note.schema import NoteCreate, NoteUpdate, note_payload
+from src.note.search import SearchHit, search_engine
 from src.user.schema import UserResponse
+from src.utils.pagination import decode_cursor, encode_cursor
+
+logger = get_logger(__name__)
+
+# What list endpoints render. Selecting plain rows skips the identity map
+# and instance state that loading full `Note` entities would cost per row.
+NOTE_COLUMNS = (Note.id, Note.title, Note.content, Note.tags, Note.version, Note.created_at, Note.updated_at)
+NOTE_SUMMARY_COLUMNS = (
+    Note.id, Note.title, Note.snippet, Note.tags, Note.version, Note.created_at, Note.updated_at
+)
+# What the revision history keeps of the version an update overwrites.
+REPLACED_COLUMNS = (Note.id, Note.title, Note.content, Note.tags, Note.version, Note.updated_at)
+REVISION_COLUMNS = (NoteRevision.version, NoteRevision.title, NoteRevision.tags, NoteRevision.saved_at)
+
+
+def make_snippet(content: str | None) -> str:
+    """
+    The first SNIPPET_LENGTH characters of the content, whitespace collapsed
+    and cut at a word boundary.
+    """
+    text = " ".join((content or "").split())
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    cut = text[:SNIPPET_LENGTH]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "…"
+
+
+def _columns(view: str) -> tuple:
+    return NOTE_SUMMARY_COLUMNS if view == "summary" else NOTE_COLUMNS
+
+
+def normalize_tags(tags: Iterable[str] | None) -> list[str]:
+    names = []
+    for tag in tags or []:
+        name = tag.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+async def _set_note_tags(
+        session: AsyncSession,
+        owner_id: int,
+        tags_by_note: dict[int, Iterable[str] | None],
+        replace: bool = False
+) -> None:
+    deltas = Counter()
+    if replace:
+        result = await session.execute(
+            delete(note_tags)
+            .where(note_tags.c.owner_id == owner_id, note_tags.c.note_id.in_(list(tags_by_note)))
+            .returning(note_tags.c.tag_id)
+        )
+        deltas.subtract(result.scalars().all())
+
+    names_by_note = {note_id: normalize_tags(tags) for note_id, tags in tags_by_note.items()}
+    names = list(dict.fromkeys(name for note_names in names_by_note.values() for name in note_names))
+    if not names:
+        await stats.adjust_tag_counts(session, deltas)
+        return
+
+    result = await session.execute(
+        select(Tag.name, Tag.id).filter(Tag.owner_id == owner_id, Tag.name.in_(names))
+    )
+    tag_ids = dict(result.all())
+
+    # Sorted, so concurrent inserts of overlapping names lock in the same order.
+    missing = sorted(name for name in names if name not in tag_ids)
+    if missing:
+        result = await session.execute(
+            stats.dialect_insert(session)(Tag)
+            .on_conflict_do_nothing(index_elements=["owner_id", "name"])
+            .returning(Tag.name, Tag.id),
+            [{"owner_id": owner_id, "name": name} for name in missing]
+        )
+        tag_ids.update(result.all())
+        # Created by a concurrent request since the select above.
+        raced = [name for name in missing if name not in tag_ids]
+        if raced:
+            result = await session.execute(
+                select(Tag.name, Tag.id).filter(Tag.owner_id == owner_id, Tag.name.in_(raced))
+            )
+            tag_ids.update(result.all())
+
+    rows = [
+        {"note_id": note_id, "owner_id": owner_id, "tag_id": tag_ids[name]}
+        for note_id, note_names in names_by_note.items() for name in note_names
+    ]
+    await session.execute(insert(note_tags), rows)
+    deltas.update(row["tag_id"] for row in rows)
+    await stats.adjust_tag_counts(session, deltas)
+
+
+async def _fetch_page(
+        session: AsyncSession,
+        stmt: Select,
+        limit: int,
+        cursor: str | None = None,
+        skip: int | None = None
+) -> tuple[list[Row], str | None]:
+    stmt = stmt.order_by(Note.updated_at.desc(), Note.id.desc())
+
+    # Legacy offset mode, kept for old clients. Costs O(skip) per page.
+    if skip is not None:
+        result = await session.execute(stmt.offset(skip).limit(limit))
+        return result.all(), None
+
+    if cursor is not None:
+        updated_at, note_id = decode_cursor(cursor, datetime.fromisoformat, int)
+        stmt = stmt.filter(tuple_(Note.updated_at, Note.id) < (updated_at, note_id))
+
+    result = await session.execute(stmt.limit(limit + 1))
+    notes = result.all()
+    if len(notes) <= limit:
+        return notes, None
+
+    notes = notes[:limit]
+    return notes, encode_cursor(notes[-1].updated_at, notes[-1].id)
 
 
 async def create_note(
@@ -18,6 +149,7 @@ async def create_note(
     db_note = Note(
         title=note.title,
         content=note.content,
+        snippet=make_snippet(note.content),
         tags=','.join(note.tags) if note.tags else '',
         owner_id=user.id
     )
@@ -25,117 +157,322 @@ async def create_note(
     session.add(db_note)
 
     try:
+        await session.flush()
+        await _set_note_tags(session, user.id, {db_note.id: note.tags})
+        await stats.adjust_month_counts(session, user.id, [db_note.created_at])
         await session.commit()
-        await session.refresh(db_note)
-        logger.info(f"Note created with ID: {db_note.id} by user ID: {user.id}")
+        await mark_write(session, user.id)
+        await note_cache.bump(user.id)
+        await jobs.index_later(db_note.id, db_note.version)
+        await change_feed.publish(user.id, [{"type": "created", "note_id": db_note.id, "version": db_note.version}])
+        logger.info("Note created with ID: %s by user ID: %s", db_note.id, user.id)
     except IntegrityError as e:
         await session.rollback()
-        logger.error(f"Integrity error while creating note: {e}")
+        logger.error("Integrity error while creating note: %s", e)
         raise HTTPException(status_code=400, detail="Integrity Error")
     except SQLAlchemyError as e:
         await session.rollback()
-        logger.error(f"SQLAlchemy error while creating note: {e}")
+        logger.error("SQLAlchemy error while creating note: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     except Exception as e:
         await session.rollback()
-        logger.error(f"Unexpected error while creating note: {e}")
+        logger.error("Unexpected error while creating note: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     return db_note
 
 
+async def bulk_create_notes(
+        session: AsyncSession,
+        notes: list[NoteCreate],
+        user: UserResponse
+) -> list[int]:
+    rows = [
+        {
+            "title": note.title,
+            "content": note.content,
+            "snippet": make_snippet(note.content),
+            "tags": ','.join(note.tags) if note.tags else '',
+            "owner_id": user.id,
+        }
+        for note in notes
+    ]
+
+    try:
+        result = await session.execute(
+            insert(Note).returning(Note.id, Note.created_at, sort_by_parameter_order=True), rows
+        )
+        created = result.all()
+        ids = [row.id for row in created]
+        await stats.adjust_month_counts(session, user.id, [row.created_at for row in created])
+        await _set_note_tags(session, user.id, {note_id: note.tags for note_id, note in zip(ids, notes)})
+        await session.commit()
+        await mark_write(session, user.id)
+        await note_cache.bump(user.id)
+        await jobs.index_many_later(ids)
+        await change_feed.publish(user.id, [{"type": "created", "note_id": note_id, "version": 1} for note_id in ids])
+        logger.info("Bulk created %s notes by user ID: %s", len(ids), user.id)
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error("SQLAlchemy error while bulk creating notes: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return ids
+
+
+async def export_notes(owner_id: int) -> AsyncIterator[bytes]:
+    """
+    Streams the user's notes as NDJSON through a server-side cursor.
+
+    Opens its own session: the request-scoped one is closed before a
+    streaming response starts sending.
+    """
+    async with async_session() as session:
+        result = await session.stream(
+            select(*NOTE_COLUMNS)
+            .filter(Note.owner_id == owner_id)
+            .order_by(Note.id)
+            .execution_options(yield_per=NOTE_EXPORT_CHUNK_SIZE)
+        )
+        exported = 0
+        async for rows in result.partitions():
+            exported += len(rows)
+            yield b"".join(orjson.dumps(note_payload(row)) + b"\n" for row in rows)
+        logger.info("Exported %s notes for user ID: %s", exported, owner_id)
+
+
 async def get_note_by_id(
         session: AsyncSession,
         note_id: int,
         user: UserResponse
 
 ) -> Note:
+    await use_replica(session, user.id)
     try:
-        result = await session.execute(select(Note).filter(Note.id == note_id, Note.owner_id == user.id))
+        result = await session.execute(
+            select(Note).options(undefer(Note.content)).filter(Note.id == note_id, Note.owner_id == user.id)
+        )
         note = result.scalars().first()
         if note is None:
-            logger.warning(f"Note with ID: {note_id} not found for user ID: {user.id}")
+            logger.warning("Note with ID: %s not found for user ID: %s", note_id, user.id)
             raise HTTPException(status_code=404, detail="Note not found")
-        logger.info(f"Note retrieved with ID: {note_id} by user ID: {user.id}")
+        logger.info("Note retrieved with ID: %s by user ID: %s", note_id, user.id)
     except SQLAlchemyError as e:
-        logger.error(f"SQLAlchemy error while retrieving note: {e}")
+        logger.error("SQLAlchemy error while retrieving note: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     return note
 
 
+async def get_notes_by_ids(
+        session: AsyncSession,
+        owner_id: int,
+        note_ids: list[int],
+        view: str = "full"
+) -> tuple[list[Row], list[int]]:
+    """
+    The owner's notes among `note_ids` in request order, plus the ids that
+    matched nothing; one query whatever the number of ids.
+    """
+    note_ids = list(dict.fromkeys(note_ids))
+    await use_replica(session, owner_id)
+    if session.get_bind().dialect.name == "postgresql":
+        # One array parameter keeps a single prepared statement for every batch size.
+        id_filter = Note.id == any_(bindparam("note_ids", note_ids, type_=ARRAY(Integer)))
+    else:
+        id_filter = Note.id.in_(note_ids)
+
+    try:
+        result = await session.execute(select(*_columns(view)).filter(id_filter, Note.owner_id == owner_id))
+        found = {row.id: row for row in result.all()}
+    except SQLAlchemyError as e:
+        logger.error("SQLAlchemy error while retrieving notes by IDs: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return [found[note_id] for note_id in note_ids if note_id in found], [i for i in note_ids if i not in found]
+
+
 async def get_notes_by_tags(
         session: AsyncSession,
         owner_id: int,
-        prompt: str,
-        skip: int = 0,
+        tags: Iterable[str],
+        match: str = "any",
         limit: int = 10,
+        cursor: str | None = None,
+        skip: int | None = None,
+        view: str = "full"
 
-) -> list[Note]:
-    try:
-        print(prompt)
-        result = await session.execute(
-            select(Note).filter(
-                and_(
-                    Note.owner_id == owner_id,
-                    Note.tags.ilike(f'%,{prompt},%') |
-                    Note.tags.ilike(f'{prompt},%') |
-                    Note.tags.ilike(f'%,{prompt}') |
-                    Note.tags.ilike(f'{prompt}')
-                )
-            ).offset(skip).limit(limit))
+) -> tuple[list[Row], str | None]:
+    names = normalize_tags(tags)
+    if not names:
+        return [], None
+
+    matched = (
+        select(note_tags.c.note_id)
+        .join(Tag, Tag.id == note_tags.c.tag_id)
+        .filter(Tag.owner_id == owner_id, note_tags.c.owner_id == owner_id, Tag.name.in_(names))
+        .group_by(note_tags.c.note_id)
+    )
+    if match == "all":
+        matched = matched.having(func.count() == len(names))
 
-        notes = result.scalars().all()
-        logger.info(f"Retrieved {len(notes)} notes for user ID: {owner_id}")
+    await use_replica(session, owner_id)
+    try:
+        notes, next_cursor = await _fetch_page(
+            session,
+            select(*_columns(view)).filter(
+                Note.owner_id == owner_id,
+                Note.id.in_(matched)
+            ),
+            limit, cursor, skip
+        )
+        logger.info("Retrieved %s notes for user ID: %s", len(notes), owner_id)
     except SQLAlchemyError as e:
-        logger.error(f"SQLAlchemy error while retrieving notes: {e}")
+        logger.error("SQLAlchemy error while retrieving notes: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    return notes
+    return notes, next_cursor
 
 
 async def get_notes_by_owner(
         session: AsyncSession,
         owner_id: int,
-        skip: int = 0,
         limit: int = 10,
+        cursor: str | None = None,
+        skip: int | None = None,
+        view: str = "full"
+
+) -> tuple[list[Row], str | None]:
+    await use_replica(session, owner_id)
+    try:
+        notes, next_cursor = await _fetch_page(
+            session, select(*_columns(view)).filter(Note.owner_id == owner_id), limit, cursor, skip
+        )
+        logger.info("Retrieved %s notes for user ID: %s", len(notes), owner_id)
+    except SQLAlchemyError as e:
+        logger.error("SQLAlchemy error while retrieving notes: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return notes, next_cursor
+
+
+async def search_notes(
+        session: AsyncSession,
+        owner_id: int,
+        q: str,
+        limit: int = 10,
+        cursor: str | None = None
+) -> tuple[list[SearchHit], str | None]:
+    await use_replica(session, owner_id)
+    try:
+        hits, next_cursor = await search_engine.search(session, owner_id, q, limit, cursor)
+        logger.info("Search returned %s notes for user ID: %s", len(hits), owner_id)
+    except SQLAlchemyError as e:
+        logger.error("SQLAlchemy error while searching notes: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return hits, next_cursor
+
 
-) -> list[Note]:
+async def get_note_stats(
+        session: AsyncSession,
+        owner_id: int
+) -> dict:
+    await use_replica(session, owner_id)
     try:
-        result = await session.execute(select(Note).filter(Note.owner_id == owner_id).offset(skip).limit(limit))
-        notes = result.scalars().all()
-        logger.info(f"Retrieved {len(notes)} notes for user ID: {owner_id}")
+        return await stats.get_stats(session, owner_id)
     except SQLAlchemyError as e:
-        logger.error(f"SQLAlchemy error while retrieving notes: {e}")
+        logger.error("SQLAlchemy error while retrieving note stats: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    return notes
+
+
+async def _raise_not_updated(
+        session: AsyncSession,
+        note_id: int,
+        user: UserResponse,
+        expected_version: int | None
+) -> None:
+    # Only reached when the single-statement DML matched nothing: tell a
+    # missing note apart from a version conflict.
+    if expected_version is not None:
+        result = await session.execute(
+            select(Note.version).filter(Note.id == note_id, Note.owner_id == user.id)
+        )
+        if result.scalar() is not None:
+            logger.warning("Version conflict on note ID: %s for user ID: %s", note_id, user.id)
+            raise HTTPException(status_code=412, detail="Note has been modified")
+    logger.warning("Note with ID: %s not found for user ID: %s", note_id, user.id)
+    raise HTTPException(status_code=404, detail="Note not found")
+
+
+async def _update_returning_replaced(
+        session: AsyncSession,
+        owner_id: int,
+        note_filter: list,
+        values: dict
+) -> tuple[Note | None, dict | None]:
+    """
+    Applies `values` to the note matching `note_filter`; returns it and the
+    columns of the version it replaced, for the revision history.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        # One statement: the CTE locks the row, so under concurrent updates
+        # it hands back the version this update actually overwrites.
+        replaced = select(*REPLACED_COLUMNS).filter(*note_filter).with_for_update().cte("replaced")
+        result = await session.execute(
+            update(Note)
+            .filter(Note.owner_id == owner_id, Note.id == replaced.c.id)
+            .values(**values)
+            .returning(Note, *(column.label(f"replaced_{column.key}") for column in replaced.c))
+            .options(undefer(Note.content))
+        )
+        row = result.first()
+        if row is None:
+            return None, None
+        return row[0], {column.key: row._mapping[f"replaced_{column.key}"] for column in replaced.c}
+
+    # SQLite cannot return columns of the FROM table; read the row first.
+    result = await session.execute(select(*REPLACED_COLUMNS).filter(*note_filter))
+    row = result.first()
+    if row is None:
+        return None, None
+    result = await session.execute(
+        update(Note).filter(*note_filter).values(**values).returning(Note).options(undefer(Note.content))
+    )
+    return result.scalars().first(), dict(row._mapping)
 
 
 async def update_note(
         session: AsyncSession,
         note_id: int,
         note_update: NoteUpdate,
-        user: UserResponse
+        user: UserResponse,
+        expected_version: int | None = None
 
 ) -> Note:
+    values = {var: value for var, value in vars(note_update).items() if value is not None}
+    if "content" in values:
+        values["snippet"] = make_snippet(values["content"])
+    values["version"] = Note.version + 1
+
+    note_filter = [Note.id == note_id, Note.owner_id == user.id]
+    if expected_version is not None:
+        note_filter.append(Note.version == expected_version)
+
     try:
-        result = await session.execute(
-            select(Note).filter(
-                Note.id == note_id,
-                Note.owner_id == user.id)
-        )
-        db_note = result.scalars().first()
+        db_note, replaced = await _update_returning_replaced(session, user.id, note_filter, values)
         if db_note is None:
-            logger.warning(f"Note with ID: {note_id} not found for user ID: {user.id}")
             await session.rollback()
-            raise HTTPException(status_code=404, detail="Note not found")
-        for var, value in vars(note_update).items():
-            setattr(db_note, var, value) if value is not None else None
-        session.add(db_note)
+            await _raise_not_updated(session, note_id, user, expected_version)
+        await session.execute(
+            insert(NoteRevision), [revisions.revision_row(user.id, note_id, replaced, db_note.content)]
+        )
+        if note_update.tags is not None:
+            await _set_note_tags(session, user.id, {note_id: db_note.tags.split(",")}, replace=True)
         await session.commit()
-        await session.refresh(db_note)
-        logger.info(f"Note updated with ID: {note_id} by user ID: {user.id}")
+        await mark_write(session, user.id)
+        await note_cache.bump(user.id)
+        if note_update.title is not None or note_update.content is not None:
+            await jobs.index_later(note_id, db_note.version)
+        await change_feed.publish(user.id, [{"type": "updated", "note_id": note_id, "version": db_note.version}])
+        logger.info("Note updated with ID: %s by user ID: %s", note_id, user.id)
     except SQLAlchemyError as e:
         await session.rollback()
-        logger.error(f"SQLAlchemy error while updating note: {e}")
+        logger.error("SQLAlchemy error while updating note: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     return db_note
 
@@ -143,29 +480,149 @@ async def update_note(
 async def delete_note(
         session: AsyncSession,
         note_id: int,
-        user: UserResponse
+        user: UserResponse,
+        expected_version: int | None = None
 
 ) -> None:
-    try:
+    stmt = delete(Note).filter(Note.id == note_id, Note.owner_id == user.id)
+    if expected_version is not None:
+        stmt = stmt.filter(Note.version == expected_version)
 
-        result = await session.execute(
-            select(Note).filter(
-                Note.id == note_id,
-                Note.owner_id == user.id)
+    try:
+        # Unlink the tags first so their counts can be decremented; the
+        # whole transaction is rolled back if the note turns out not to match.
+        await _set_note_tags(session, user.id, {note_id: None}, replace=True)
+        result = await session.execute(stmt.returning(Note.created_at, Note.version))
+        deleted = result.first()
+        if deleted is None:
+            await session.rollback()
+            await _raise_not_updated(session, note_id, user, expected_version)
+        await stats.adjust_month_counts(session, user.id, [deleted.created_at], sign=-1)
+        # The foreign key cascades on Postgres; SQLite does not enforce it.
+        await session.execute(
+            delete(NoteRevision).filter(NoteRevision.owner_id == user.id, NoteRevision.note_id == note_id)
         )
 
-        db_note = result.scalars().first()
-
-        if db_note is None:
-            logger.warning(f"Note with ID: {note_id} not found for user ID: {user.id}")
-            raise HTTPException(status_code=404, detail="Note not found")
-
-        await session.delete(db_note)
         await session.commit()
+        await mark_write(session, user.id)
+        await note_cache.bump(user.id)
+        await jobs.remove_later(note_id)
+        await change_feed.publish(user.id, [{"type": "deleted", "note_id": note_id, "version": deleted.version}])
 
-        logger.info(f"Note deleted with ID: {note_id} by user ID: {user.id}")
+        logger.info("Note deleted with ID: %s by user ID: %s", note_id, user.id)
 
     except SQLAlchemyError as e:
         await session.rollback()
-        logger.error(f"SQLAlchemy error while deleting note: {e}")
+        logger.error("SQLAlchemy error while deleting note: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+async def _current_note(session: AsyncSession, note_id: int, user: UserResponse) -> Row:
+    result = await session.execute(
+        select(Note.version, Note.title, Note.content, Note.tags, Note.updated_at)
+        .filter(Note.id == note_id, Note.owner_id == user.id)
+    )
+    note = result.first()
+    if note is None:
+        logger.warning("Note with ID: %s not found for user ID: %s", note_id, user.id)
+        raise HTTPException(status_code=404, detail="Note not found")
+    return note
+
+
+async def get_note_revisions(
+        session: AsyncSession,
+        note_id: int,
+        user: UserResponse,
+        limit: int = 10,
+        cursor: str | None = None
+) -> tuple[list[Row], str | None]:
+    """
+    Earlier versions of the note, newest first, without their content.
+    """
+    await use_replica(session, user.id)
+    stmt = (
+        select(*REVISION_COLUMNS)
+        .filter(NoteRevision.owner_id == user.id, NoteRevision.note_id == note_id)
+        .order_by(NoteRevision.version.desc())
+    )
+    if cursor is not None:
+        (before,) = decode_cursor(cursor, int)
+        stmt = stmt.filter(NoteRevision.version < before)
+
+    try:
+        await _current_note(session, note_id, user)
+        result = await session.execute(stmt.limit(limit + 1))
+        rows = result.all()
+    except SQLAlchemyError as e:
+        logger.error("SQLAlchemy error while retrieving note revisions: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], encode_cursor(rows[limit - 1].version)
+
+
+async def get_note_revision(
+        session: AsyncSession,
+        note_id: int,
+        version: int,
+        user: UserResponse
+) -> dict:
+    """
+    The note as it was at `version`, rebuilt from the revision history.
+    """
+    try:
+        note = await _current_note(session, note_id, user)
+        if version == note.version:
+            revision = {**note._mapping, "saved_at": note.updated_at}
+        else:
+            revision = await revisions.rebuild(session, user.id, note_id, version, note.version, note.content)
+    except (SQLAlchemyError, LookupError) as e:
+        logger.error("Error while rebuilding revision %s of note ID: %s: %s", version, note_id, e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    if revision is None:
+        logger.warning("Revision %s of note ID: %s not found for user ID: %s", version, note_id, user.id)
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return revision
+
+
+async def restore_note(
+        session: AsyncSession,
+        note_id: int,
+        user: UserResponse,
+        version: int | None = None,
+        at: datetime | None = None,
+        expected_version: int | None = None
+) -> Note:
+    """
+    Writes an earlier version back as a new version, chosen by number or as
+    the version that was current at `at`. The overwritten one is kept in
+    the history like any other update.
+    """
+    if at is not None:
+        try:
+            note = await _current_note(session, note_id, user)
+            if note.updated_at is not None and note.updated_at <= at:
+                version = note.version
+            else:
+                result = await session.execute(
+                    select(func.max(NoteRevision.version)).filter(
+                        NoteRevision.owner_id == user.id,
+                        NoteRevision.note_id == note_id,
+                        NoteRevision.saved_at <= at
+                    )
+                )
+                version = result.scalar()
+        except SQLAlchemyError as e:
+            logger.error("SQLAlchemy error while resolving a note revision by time: %s", e)
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        if version is None:
+            raise HTTPException(status_code=404, detail="No revision of the note at that time")
+
+    revision = await get_note_revision(session, note_id, version, user)
+    note_update = NoteUpdate(title=revision["title"], content=revision["content"])
+    note_update.tags = revision["tags"] or ""
+    db_note = await update_note(session, note_id, note_update, user, expected_version)
+    logger.info("Note ID: %s restored to version %s by user ID: %s", note_id, version, user.id)
+    return db_note
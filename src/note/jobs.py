@@ -0,0 +1,40 @@
+from sqlalchemy import select
+
+from src.database import async_session
+from src.note.model import Note
+from src.note.search import search_engine
+from src.utils.jobs import job_handler, job_queue
+
+
+@job_handler("search.index")
+async def index_notes(payload: dict) -> None:
+    """
+    Re-indexes the notes as they are now, so jobs for older versions of a
+    note that run late still index the latest text.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(Note.id, Note.owner_id, Note.title, Note.content).filter(Note.id.in_(payload["ids"]))
+        )
+        documents = [dict(row._mapping) for row in result.all()]
+        if documents:
+            await search_engine.index_many(session, documents)
+            await session.commit()
+
+
+@job_handler("search.remove")
+async def remove_notes(payload: dict) -> None:
+    for note_id in payload["ids"]:
+        await search_engine.on_delete(note_id)
+
+
+async def index_later(note_id: int, version: int) -> None:
+    await job_queue.enqueue("search.index", {"ids": [note_id]}, key=f"search.index:{note_id}:{version}")
+
+
+async def index_many_later(note_ids: list[int]) -> None:
+    await job_queue.enqueue("search.index", {"ids": note_ids})
+
+
+async def remove_later(note_id: int) -> None:
+    await job_queue.enqueue("search.remove", {"ids": [note_id]}, key=f"search.remove:{note_id}")
@@ -1,18 +1,142 @@
+from datetime import datetime, timezone
 
-from sqlalchemy import Integer, String, Text, ForeignKey, func, DateTime
+
+from sqlalchemy import Integer, String, Text, ForeignKey, Date, DateTime, Table, Column, UniqueConstraint, Index
+from sqlalchemy import Boolean, ForeignKeyConstraint
+from sqlalchemy import LargeBinary, TypeDecorator
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import mapped_column, relationship
+from src.config import NOTE_CONTENT_CODEC, NOTE_CONTENT_COMPRESS_LEVEL, NOTE_CONTENT_COMPRESS_MIN
 from src.database import Base
+from src.utils.compression import check_codec, compress_text, decompress_text
+
+SNIPPET_LENGTH = 160
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+check_codec(NOTE_CONTENT_CODEC)
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored as bytes, compressed with NOTE_CONTENT_CODEC when large enough.
+    Reads accept every codec and plain UTF-8, whatever is configured now.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, NOTE_CONTENT_CODEC, NOTE_CONTENT_COMPRESS_LEVEL, NOTE_CONTENT_COMPRESS_MIN)
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            # SQLite databases created before the column became binary hand back text.
+            return value
+        return decompress_text(bytes(value))
+
+
+# Normalized tag index. `Note.tags` keeps the comma-joined display string,
+# lookups go through `note_tags` so they can be served by the primary key.
+# `owner_id` is carried along so the link can reference (owner_id, id), the
+# key of the partitioned `notes` table.
+note_tags = Table(
+    "note_tags",
+    Base.metadata,
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Column("note_id", Integer, primary_key=True),
+    Column("owner_id", Integer, nullable=False),
+    ForeignKeyConstraint(
+        ["owner_id", "note_id"], ["notes.owner_id", "notes.id"],
+        name="fk_note_tags_owner_id_note_id_notes", ondelete="CASCADE"
+    ),
+    Index("ix_note_tags_owner_id_note_id", "owner_id", "note_id"),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    __table_args__ = (UniqueConstraint("owner_id", "name", name="uq_tags_owner_id_name"),)
+
+    id = mapped_column(Integer, primary_key=True)
+    owner_id = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = mapped_column(String, nullable=False)
+    # Notes carrying the tag, kept current by the DAO alongside `note_tags`.
+    note_count = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+
+class NoteMonthCount(Base):
+    """
+    Notes per owner and creation month (first day of the month), maintained
+    incrementally so stats never scan `notes`.
+    """
+    __tablename__ = "note_month_counts"
+
+    owner_id = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = mapped_column(Date, primary_key=True)
+    count = mapped_column(Integer, nullable=False, default=0)
 
 
 class Note(Base):
+    """
+    On Postgres the table is hash-partitioned on `owner_id` with primary key
+    (owner_id, id), which also takes the place of `uq_notes_owner_id_id`;
+    see src/note/partition.py. Queries should filter on `owner_id` so they
+    touch a single partition.
+    """
     __tablename__ = "notes"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "id", name="uq_notes_owner_id_id"),
+        Index("ix_notes_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+        Index("ix_notes_search_vector", "search_vector", postgresql_using="gin"),
+        # SQLite otherwise reuses the id of the newest note once it is deleted,
+        # and the reused id's "search.index:{id}:{version}" job key is then
+        # already claimed, so the new note would never be indexed.
+        {"sqlite_autoincrement": True},
+    )
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    title = mapped_column(String, index=True)
-    content = mapped_column(Text)
+    title = mapped_column(String)
+    # Deferred: list pages render `snippet`, only single-note reads need the body.
+    content = mapped_column(CompressedText, deferred=True)
+    snippet = mapped_column(String(SNIPPET_LENGTH + 1))
     tags = mapped_column(String)
-    created_at = mapped_column(DateTime, default=func.now())
-    updated_at = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+    # Set in Python, not with now(): SQLite's CURRENT_TIMESTAMP drops the
+    # fraction, and its text comparison then breaks the (updated_at, id) cursor.
+    created_at = mapped_column(DateTime, default=utcnow)
+    updated_at = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
+    version = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    search_vector = mapped_column(TSVECTOR().with_variant(Text(), "sqlite"), deferred=True)
 
     owner_id = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="notes")
+
+
+class NoteRevision(Base):
+    """
+    A note as it was before an update. `content` is either a snapshot, stored
+    like `Note.content`, or a delta that rebuilds it from the next version's
+    content; see src/note/revisions.py. Hash-partitioned like `notes` on
+    Postgres.
+    """
+    __tablename__ = "note_revisions"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["owner_id", "note_id"], ["notes.owner_id", "notes.id"],
+            name="fk_note_revisions_owner_id_note_id_notes", ondelete="CASCADE"
+        ),
+    )
+
+    owner_id = mapped_column(Integer, primary_key=True)
+    note_id = mapped_column(Integer, primary_key=True)
+    version = mapped_column(Integer, primary_key=True)
+    title = mapped_column(String)
+    tags = mapped_column(String)
+    content = mapped_column(LargeBinary)
+    snapshot = mapped_column(Boolean, nullable=False)
+    # When this version was written, i.e. the note's `updated_at` back then.
+    saved_at = mapped_column(DateTime)
@@ -0,0 +1,239 @@
+"""
+Online conversion of `notes` to hash partitioning on `owner_id` (Postgres):
+
+    python -m src.note.partition prepare [--partitions 16]
+    python -m src.note.partition backfill [--batch 5000] [--after ID]
+    python -m src.note.partition verify
+    python -m src.note.partition swap
+    python -m src.note.partition cleanup    # or `abort` before the swap
+
+`prepare` creates `notes_partitioned` with the same columns, primary key
+(owner_id, id) and per-partition indexes, plus a trigger on `notes` that
+mirrors every write into it. `backfill` copies existing rows in id order;
+each batch is locked FOR SHARE, so a concurrent update or delete either
+happens first (and the copy sees it) or waits for the batch (and the trigger
+replays it). `swap` renames the tables in one short transaction and points
+note_tags at the new table; the old one stays as `notes_unpartitioned`
+until `cleanup`. Run it between migrations 0009 and 0010; 0010 then sees a
+partitioned table and does nothing, and otherwise converts offline.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from src.database import async_engine
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PARTITIONS = 16
+
+IS_PARTITIONED = text("""
+    SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'notes'::regclass)
+""")
+
+# Every named object of both tables, as (kind, name on the plain table).
+# The swap moves the plain ones aside and gives their names to the new ones.
+_OBJECTS = [
+    ("CONSTRAINT", "notes_pkey"),
+    ("CONSTRAINT", "notes_owner_id_fkey"),
+    ("INDEX", "ix_notes_id"),
+    ("INDEX", "ix_notes_owner_id_updated_at_id"),
+    ("INDEX", "ix_notes_search_vector"),
+]
+
+
+def _renamed(name: str, table: str) -> str:
+    return name.replace("notes", table, 1)
+
+
+def prepare_statements(partitions: int) -> list[str]:
+    statements = [
+        "CREATE TABLE notes_partitioned (LIKE notes INCLUDING DEFAULTS) PARTITION BY HASH (owner_id)",
+        "ALTER TABLE notes_partitioned ADD CONSTRAINT notes_partitioned_pkey PRIMARY KEY (owner_id, id)",
+        """
+        ALTER TABLE notes_partitioned ADD CONSTRAINT notes_partitioned_owner_id_fkey
+        FOREIGN KEY (owner_id) REFERENCES users (id)
+        """,
+    ]
+    statements += [
+        f"""
+        CREATE TABLE notes_p{remainder:02d} PARTITION OF notes_partitioned
+        FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+        """
+        for remainder in range(partitions)
+    ]
+    statements += [
+        # Lookups by id alone (search jobs, maintenance scripts) probe each partition.
+        "CREATE INDEX ix_notes_partitioned_id ON notes_partitioned (id)",
+        "CREATE INDEX ix_notes_partitioned_owner_id_updated_at_id ON notes_partitioned (owner_id, updated_at, id)",
+        "CREATE INDEX ix_notes_partitioned_search_vector ON notes_partitioned USING gin (search_vector)",
+        """
+        CREATE FUNCTION notes_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM notes_partitioned WHERE owner_id = OLD.owner_id AND id = OLD.id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO notes_partitioned SELECT NEW.*;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """,
+        """
+        CREATE TRIGGER notes_mirror AFTER INSERT OR UPDATE OR DELETE ON notes
+        FOR EACH ROW EXECUTE FUNCTION notes_mirror()
+        """,
+    ]
+    return statements
+
+
+# Copies the next batch after :after and returns its last id (NULL when done).
+# Rows the trigger already mirrored are newer than what the batch read.
+BACKFILL = text("""
+    WITH batch AS (
+        SELECT * FROM notes WHERE id > :after ORDER BY id LIMIT :size FOR SHARE
+    ), copied AS (
+        INSERT INTO notes_partitioned SELECT * FROM batch ON CONFLICT (owner_id, id) DO NOTHING
+    )
+    SELECT max(id) FROM batch
+""")
+
+COUNTS = text("SELECT (SELECT count(*) FROM notes), (SELECT count(*) FROM notes_partitioned)")
+
+
+def swap_statements() -> list[str]:
+    statements = [
+        # Fail fast instead of queueing every request behind a long reader.
+        "SET LOCAL lock_timeout = '5s'",
+        "LOCK TABLE notes, notes_partitioned, note_tags IN ACCESS EXCLUSIVE MODE",
+        "DROP TRIGGER notes_mirror ON notes",
+        "DROP FUNCTION notes_mirror()",
+        "ALTER TABLE note_tags DROP CONSTRAINT fk_note_tags_owner_id_note_id_notes",
+        "ALTER TABLE notes RENAME TO notes_unpartitioned",
+        """
+        ALTER TABLE notes_unpartitioned
+        RENAME CONSTRAINT uq_notes_owner_id_id TO uq_notes_unpartitioned_owner_id_id
+        """,
+    ]
+    for kind, name in _OBJECTS:
+        old = _renamed(name, "notes_unpartitioned")
+        if kind == "CONSTRAINT":
+            statements.append(f"ALTER TABLE notes_unpartitioned RENAME CONSTRAINT {name} TO {old}")
+        else:
+            statements.append(f"ALTER INDEX {name} RENAME TO {old}")
+    statements.append("ALTER TABLE notes_partitioned RENAME TO notes")
+    for kind, name in _OBJECTS:
+        new = _renamed(name, "notes_partitioned")
+        if kind == "CONSTRAINT":
+            statements.append(f"ALTER TABLE notes RENAME CONSTRAINT {new} TO {name}")
+        else:
+            statements.append(f"ALTER INDEX {new} RENAME TO {name}")
+    statements += [
+        # Otherwise dropping the old table would take the id sequence with it.
+        "ALTER SEQUENCE notes_id_seq OWNED BY notes.id",
+        """
+        ALTER TABLE note_tags ADD CONSTRAINT fk_note_tags_owner_id_note_id_notes
+        FOREIGN KEY (owner_id, note_id) REFERENCES notes (owner_id, id) ON DELETE CASCADE NOT VALID
+        """,
+    ]
+    return statements
+
+
+# Checks existing links without blocking writes; run after the swap commits.
+VALIDATE = "ALTER TABLE note_tags VALIDATE CONSTRAINT fk_note_tags_owner_id_note_id_notes"
+
+CLEANUP = "DROP TABLE notes_unpartitioned"
+
+ABORT = [
+    "DROP TRIGGER IF EXISTS notes_mirror ON notes",
+    "DROP FUNCTION IF EXISTS notes_mirror()",
+    "DROP TABLE IF EXISTS notes_partitioned",
+]
+
+
+async def _execute(statements: list) -> None:
+    async with async_engine.begin() as conn:
+        for statement in statements:
+            await conn.execute(text(statement) if isinstance(statement, str) else statement)
+
+
+async def prepare(partitions: int) -> None:
+    async with async_engine.connect() as conn:
+        if (await conn.execute(IS_PARTITIONED)).scalar():
+            raise SystemExit("notes is already partitioned")
+    await _execute(prepare_statements(partitions))
+    logger.info("Created notes_partitioned with %s partitions and the mirror trigger", partitions)
+
+
+async def backfill(batch: int, after: int = 0) -> int:
+    batches = 0
+    async with async_engine.connect() as conn:
+        while True:
+            async with conn.begin():
+                last_id = (await conn.execute(BACKFILL, {"after": after, "size": batch})).scalar()
+            if last_id is None:
+                break
+            batches += 1
+            after = last_id
+            if batches % 100 == 0:
+                # Pass this as --after to resume an interrupted backfill.
+                logger.info("Backfilled notes up to ID %s", after)
+    logger.info("Backfill finished after %s batches, last ID %s", batches, after)
+    return after
+
+
+async def verify() -> bool:
+    async with async_engine.connect() as conn:
+        plain, partitioned = (await conn.execute(COUNTS)).one()
+    logger.info("notes has %s rows, notes_partitioned has %s", plain, partitioned)
+    return plain == partitioned
+
+
+async def swap() -> None:
+    if not await verify():
+        raise SystemExit("Row counts differ; finish the backfill before swapping")
+    await _execute(swap_statements())
+    await _execute([VALIDATE])
+    logger.info("notes is now partitioned; the old table is notes_unpartitioned")
+
+
+async def cleanup() -> None:
+    await _execute([CLEANUP])
+
+
+async def abort() -> None:
+    """
+    Undoes `prepare` (and any backfill); `notes` itself is untouched.
+    """
+    await _execute(ABORT)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert notes to hash partitioning on owner_id, online.")
+    parser.add_argument("step", choices=["prepare", "backfill", "verify", "swap", "cleanup", "abort"])
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--after", type=int, default=0, help="resume the backfill after this note ID")
+    args = parser.parse_args()
+
+    if args.step == "prepare":
+        await prepare(args.partitions)
+    elif args.step == "backfill":
+        await backfill(args.batch, args.after)
+    elif args.step == "verify":
+        if not await verify():
+            raise SystemExit(1)
+    elif args.step == "swap":
+        await swap()
+    elif args.step == "cleanup":
+        await cleanup()
+    else:
+        await abort()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,187 @@
+"""
+Revision history of notes.
+
+Each update stores the version it replaces as a reverse delta: the edit
+script that turns the new body back into the old one. Both bodies are at
+hand during the update, so recording a revision never reads older ones.
+Every NOTE_REVISION_SNAPSHOT_INTERVAL-th version, and any version whose delta
+would not be smaller, is stored in full instead. A revision is rebuilt from
+the nearest snapshot above it, or from the note itself, by applying fewer
+than NOTE_REVISION_SNAPSHOT_INTERVAL deltas.
+
+Deltas diff sentence/line tokens and encode the result as copy ops (a byte
+range of the newer body) and insert ops (literal bytes), varint-framed and
+zlib-compressed.
+"""
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import (
+    NOTE_CONTENT_CODEC,
+    NOTE_CONTENT_COMPRESS_LEVEL,
+    NOTE_CONTENT_COMPRESS_MIN,
+    NOTE_REVISION_SNAPSHOT_INTERVAL,
+)
+from src.note.model import NoteRevision
+from src.utils.compression import compress_text, decompress_text
+
+_TOKEN = re.compile(r"[^\n.!?]*[\n.!?]+\s*|[^\n.!?]+")
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def make_delta(source: str, target: str) -> bytes:
+    """
+    Ops that rebuild `target` from `source`.
+    """
+    ops = bytearray()
+    if source == target:
+        # Title- and tag-only edits: skip the diff.
+        _write_varint(ops, len(source.encode()) << 1)
+        _write_varint(ops, 0)
+        return zlib.compress(bytes(ops))
+
+    source_tokens, target_tokens = _TOKEN.findall(source), _TOKEN.findall(target)
+    offsets = [0]
+    for token in source_tokens:
+        offsets.append(offsets[-1] + len(token.encode()))
+    matcher = SequenceMatcher(None, source_tokens, target_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            _write_varint(ops, (offsets[i2] - offsets[i1]) << 1)
+            _write_varint(ops, offsets[i1])
+        elif j2 > j1:
+            literal = "".join(target_tokens[j1:j2]).encode()
+            _write_varint(ops, len(literal) << 1 | 1)
+            ops += literal
+    return zlib.compress(bytes(ops))
+
+
+def apply_delta(source: str, delta: bytes) -> str:
+    base, ops, out = source.encode(), zlib.decompress(delta), bytearray()
+    pos = 0
+    while pos < len(ops):
+        header, pos = _read_varint(ops, pos)
+        length = header >> 1
+        if header & 1:
+            out += ops[pos:pos + length]
+            pos += length
+        else:
+            start, pos = _read_varint(ops, pos)
+            out += base[start:start + length]
+    return out.decode()
+
+
+def _snapshot(content: str | None) -> bytes | None:
+    if content is None:
+        return None
+    return compress_text(content, NOTE_CONTENT_CODEC, NOTE_CONTENT_COMPRESS_LEVEL, NOTE_CONTENT_COMPRESS_MIN)
+
+
+def revision_row(owner_id: int, note_id: int, replaced: dict, new_content: str | None) -> dict:
+    """
+    The note_revisions row for `replaced` (title, content, tags, version and
+    updated_at of the version being overwritten) given the new body.
+    """
+    row = {
+        "owner_id": owner_id,
+        "note_id": note_id,
+        "version": replaced["version"],
+        "title": replaced["title"],
+        "tags": replaced["tags"],
+        "saved_at": replaced["updated_at"],
+    }
+    old_content = replaced["content"]
+    if (
+        replaced["version"] % NOTE_REVISION_SNAPSHOT_INTERVAL != 0
+        and old_content is not None
+        and new_content is not None
+    ):
+        delta = make_delta(new_content, old_content)
+        # Only pay for compressing a snapshot when the delta might not be
+        # smaller; text rarely compresses past 16:1.
+        if len(delta) * 16 < len(old_content):
+            return {**row, "content": delta, "snapshot": False}
+        snapshot = _snapshot(old_content)
+        if len(delta) < len(snapshot):
+            return {**row, "content": delta, "snapshot": False}
+        return {**row, "content": snapshot, "snapshot": True}
+    return {**row, "content": _snapshot(old_content), "snapshot": True}
+
+
+async def rebuild(
+        session: AsyncSession,
+        owner_id: int,
+        note_id: int,
+        version: int,
+        current_version: int,
+        current_content: str | None
+) -> dict | None:
+    """
+    Revision `version` with its content as text, or None if it was never
+    recorded. `current_*` describe the note as it is now.
+    """
+    columns = (
+        NoteRevision.version, NoteRevision.title, NoteRevision.tags,
+        NoteRevision.content, NoteRevision.snapshot, NoteRevision.saved_at
+    )
+    rows = []
+    while True:
+        # Versions are contiguous from the first recorded one, and a snapshot
+        # is at most an interval away; more reads only if the interval grew.
+        result = await session.execute(
+            select(*columns)
+            .filter(
+                NoteRevision.owner_id == owner_id,
+                NoteRevision.note_id == note_id,
+                NoteRevision.version >= version + len(rows)
+            )
+            .order_by(NoteRevision.version)
+            .limit(NOTE_REVISION_SNAPSHOT_INTERVAL)
+        )
+        batch = result.all()
+        rows += batch
+        if not rows or rows[0].version != version:
+            return None
+        if len(batch) < NOTE_REVISION_SNAPSHOT_INTERVAL or any(row.snapshot for row in batch):
+            break
+
+    start = next((i for i, row in enumerate(rows) if row.snapshot), None)
+    if start is None:
+        if rows[-1].version != current_version - 1:
+            raise LookupError(f"Revisions of note {note_id} end at {rows[-1].version}, not {current_version - 1}")
+        content, chain = current_content, rows
+    else:
+        snapshot = rows[start].content
+        content, chain = None if snapshot is None else decompress_text(snapshot), rows[:start]
+    for row in reversed(chain):
+        content = apply_delta(content, row.content)
+
+    target = rows[0]
+    return {
+        "version": target.version,
+        "title": target.title,
+        "content": content,
+        "tags": target.tags,
+        "saved_at": target.saved_at,
+    }
@@ -1,16 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+import asyncio
 
-from fastapi_limiter.depends import RateLimiter
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import AsyncIterator, List, Literal, Optional, Union
+
+import orjson
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import CHANGE_FEED_KEEPALIVE, NOTE_BULK_BATCH_SIZE, NOTE_BULK_MAX_LINES
 from src.config import REQUEST_LIMIT_PER_MINUTE as rl_tms
 
 from src.database import get_db
-from src.note.schema import NoteCreate, NoteUpdate, NoteResponse
+from src.note.schema import (
+    BulkImportResult,
+    NoteBatch,
+    NoteBatchRequest,
+    NoteCreate,
+    NotePage,
+    NoteResponse,
+    NoteRestore,
+    NoteRevisionPage,
+    NoteRevisionResponse,
+    NoteSearchPage,
+    NoteStats,
+    NoteSummary,
+    NoteSummaryBatch,
+    NoteSummaryPage,
+    NoteUpdate,
+    note_payload,
+    note_summary_payload,
+    revision_payload,
+)
 from src.note import dao
+from src.note.cache import cached_response
+from src.note.changes import change_feed, parse_event_id
 from src.user.auth import get_current_user
-from src.user.model import User
+from src.utils.instrumentation import timed
+from src.utils.request_limiter import RateLimit
+from src.user.schema import UserResponse
 
 router = APIRouter()
 
@@ -18,103 +46,403 @@ router = APIRouter()
 @router.post(
     "/notes/",
     response_model=NoteResponse,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def create_note(
         note: NoteCreate,
-        user: User = Depends(get_current_user),
+        user: UserResponse = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
 ) -> NoteResponse:
     db_note = await dao.create_note(session, note, user)
-    db_note.tags = note.tags
-    return db_note
+    return ORJSONResponse(note_payload(db_note))
+
+
+def _expected_version(if_match: Optional[str]) -> Optional[int]:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+@router.post(
+    "/notes/bulk",
+    response_model=BulkImportResult,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def bulk_import_notes(
+        request: Request,
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> BulkImportResult:
+    """
+    Imports NDJSON (one NoteCreate per line). Each batch commits on its own,
+    so a failing batch is reported per line without undoing earlier ones.
+    """
+    ids, errors = [], []
+    batch, batch_lines = [], []
+
+    async def flush() -> None:
+        try:
+            ids.extend(await dao.bulk_create_notes(session, batch, user))
+        except HTTPException as e:
+            errors.extend({"line": line_no, "error": e.detail} for line_no in batch_lines)
+        batch.clear()
+        batch_lines.clear()
+
+    line_no = 0
+    async for line in _ndjson_lines(request):
+        line_no += 1
+        if line_no > NOTE_BULK_MAX_LINES:
+            errors.append({"line": line_no, "error": f"Import is limited to {NOTE_BULK_MAX_LINES} lines"})
+            break
+        if not line.strip():
+            continue
+        try:
+            batch.append(NoteCreate.model_validate_json(line))
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            errors.append({"line": line_no, "error": f"{location}: {error['msg']}" if location else error["msg"]})
+            continue
+        batch_lines.append(line_no)
+        if len(batch) >= NOTE_BULK_BATCH_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return {"inserted": len(ids), "ids": ids, "errors": errors}
+
+
+@router.get(
+    "/notes/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def export_notes(
+        user: UserResponse = Depends(get_current_user)
+) -> StreamingResponse:
+    return StreamingResponse(
+        dao.export_notes(user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="notes.ndjson"'}
+    )
+
+
+def _render_page(rows: list, next_cursor: Optional[str], view: str, legacy: bool = False) -> str:
+    """
+    A page as `{items, next_cursor}`; `legacy` renders the bare list that
+    clients of the deprecated `skip` mode still expect.
+    """
+    payload = note_summary_payload if view == "summary" else note_payload
+    with timed("render"):
+        items = [payload(row) for row in rows]
+        return orjson.dumps(items if legacy else {"items": items, "next_cursor": next_cursor}).decode()
 
 
 @router.get(
     "/notes/",
-    response_model=List[NoteResponse],
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    response_model=Union[NotePage, NoteSummaryPage, List[NoteResponse], List[NoteSummary]],
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def read_notes(
-        skip: int = 0,
-        limit: int = 10,
-        user: User = Depends(get_current_user),
+        request: Request,
+        view: Literal["full", "summary"] = "full",
+        cursor: Optional[str] = None,
+        limit: int = Query(10, ge=1, le=100),
+        skip: Optional[int] = Query(None, ge=0, deprecated=True),
+        user: UserResponse = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
-) -> List[NoteResponse]:
-    notes = await dao.get_notes_by_owner(session, user.id, skip, limit)
-    for note in notes:
-        note.tags = note.tags.split(",") if note.tags else []
-    return notes
+) -> NotePage:
+    async def load() -> tuple[str, None]:
+        rows, next_cursor = await dao.get_notes_by_owner(session, user.id, limit, cursor, skip, view)
+        return _render_page(rows, next_cursor, view, legacy=skip is not None), None
+
+    return await cached_response(request, user.id, f"list:{view}:{limit}:{cursor}:{skip}", load)
 
 
 @router.get(
-    "/notes/{prompt}",
-    response_model=List[NoteResponse],
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    "/notes/search",
+    response_model=NoteSearchPage,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
-async def read_notes_by_tag(
-        prompt: str,
-        skip: int = 0,
-        limit: int = 10,
-        user: User = Depends(get_current_user),
+async def search_notes(
+        q: str = Query(..., min_length=1, max_length=256),
+        cursor: Optional[str] = None,
+        limit: int = Query(10, ge=1, le=100),
+        user: UserResponse = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
-) -> List[NoteResponse]:
-    notes = await dao.get_notes_by_tags(session, user.id, prompt, skip, limit)
+) -> NoteSearchPage:
+    hits, next_cursor = await dao.search_notes(session, user.id, q, limit, cursor)
+    items = [{**note_payload(note), "rank": rank, "headline": headline} for note, rank, headline in hits]
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
 
-    for note in notes:
-        note.tags = note.tags.split(",") if note.tags else []
 
-    return notes
+@router.post(
+    "/notes/batch",
+    response_model=Union[NoteBatch, NoteSummaryBatch],
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def read_notes_batch(
+        batch: NoteBatchRequest,
+        view: Literal["full", "summary"] = "full",
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> NoteBatch:
+    """
+    Up to NOTE_BATCH_MAX_IDS notes by id in request order; ids that are not
+    the user's notes are listed under `missing`.
+    """
+    rows, missing = await dao.get_notes_by_ids(session, user.id, batch.ids, view)
+    payload = note_summary_payload if view == "summary" else note_payload
+    with timed("render"):
+        return ORJSONResponse({"items": [payload(row) for row in rows], "missing": missing})
 
 
 @router.get(
-    "/notes/{note_id}",
+    "/notes/stats",
+    response_model=NoteStats,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def read_note_stats(
+        request: Request,
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> NoteStats:
+    async def load() -> tuple[str, None]:
+        return orjson.dumps(await dao.get_note_stats(session, user.id)).decode(), None
+
+    return await cached_response(request, user.id, "stats", load)
+
+
+def _last_event_id(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        parse_event_id(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return value
+
+
+async def _sse_events(user_id: int, last_event_id: Optional[str]) -> AsyncIterator[bytes]:
+    async for event in change_feed.subscribe(user_id, last_event_id, CHANGE_FEED_KEEPALIVE):
+        if event is None:
+            yield b": keepalive\n\n"
+            continue
+        event_id, data = event
+        yield b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), data["type"].encode(), orjson.dumps(data))
+
+
+@router.get(
+    "/notes/changes",
+    response_class=StreamingResponse,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def note_changes(
+        last_event_id: Optional[str] = Query(None),
+        last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+        user: UserResponse = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Server-sent events for the user's note creates, updates and deletes.
+    Reconnect with Last-Event-ID (header or query) to receive what was missed.
+    """
+    return StreamingResponse(
+        _sse_events(user.id, _last_event_id(last_event_id_header or last_event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/notes/changes/ws")
+async def note_changes_ws(
+        websocket: WebSocket,
+        token: Optional[str] = Query(None),
+        last_event_id: Optional[str] = Query(None)
+) -> None:
+    """
+    The change feed as JSON messages. Browsers cannot set headers on a
+    WebSocket, so the access token may come as `?token=`.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    token = token or authorization.removeprefix("Bearer ").strip()
+    try:
+        user = await get_current_user(token)
+        last_event_id = _last_event_id(last_event_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    async def forward() -> None:
+        async for event_id, data in change_feed.subscribe(user.id, last_event_id):
+            await websocket.send_text(orjson.dumps({"id": event_id, **data}).decode())
+        # The feed only ends when this client fell behind or we are shutting down.
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+    sender = asyncio.create_task(forward())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+
+# Declared before /notes/{prompt}, which would otherwise take numeric ids as tag names.
+@router.get(
+    "/notes/{note_id:int}",
     response_model=NoteResponse,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def read_note(
+        request: Request,
         note_id: int,
-        user: User = Depends(get_current_user),
+        user: UserResponse = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
 ) -> NoteResponse:
-    note = await dao.get_note_by_id(session, note_id, user)
+    async def load() -> tuple[str, str]:
+        note = await dao.get_note_by_id(session, note_id, user)
 
-    if note is None:
-        raise HTTPException(status_code=404, detail="Note not found")
+        if note is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+
+        with timed("render"):
+            return orjson.dumps(note_payload(note)).decode(), f'"{note.version}"'
+
+    return await cached_response(request, user.id, f"note:{note_id}", load)
+
+
+@router.get(
+    "/notes/{note_id:int}/revisions",
+    response_model=NoteRevisionPage,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def read_note_revisions(
+        note_id: int,
+        cursor: Optional[str] = None,
+        limit: int = Query(10, ge=1, le=100),
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> NoteRevisionPage:
+    """
+    Earlier versions of the note, newest first; fetch one to get its content.
+    """
+    rows, next_cursor = await dao.get_note_revisions(session, note_id, user, limit, cursor)
+    return ORJSONResponse({"items": [revision_payload(row._mapping) for row in rows], "next_cursor": next_cursor})
+
+
+@router.get(
+    "/notes/{note_id:int}/revisions/{version:int}",
+    response_model=NoteRevisionResponse,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def read_note_revision(
+        note_id: int,
+        version: int,
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> NoteRevisionResponse:
+    revision = await dao.get_note_revision(session, note_id, version, user)
+    return ORJSONResponse(revision_payload(revision))
+
+
+@router.post(
+    "/notes/{note_id:int}/restore",
+    response_model=NoteResponse,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def restore_note(
+        note_id: int,
+        restore: NoteRestore,
+        if_match: Optional[str] = Header(None),
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> NoteResponse:
+    """
+    Restores an earlier version (by number, or the one current at a point
+    in time) as a new version of the note.
+    """
+    note = await dao.restore_note(session, note_id, user, restore.version, restore.at, _expected_version(if_match))
+    return ORJSONResponse(note_payload(note), headers={"ETag": f'"{note.version}"'})
+
+
+@router.get(
+    "/notes/tags/{prompt}",
+    response_model=Union[NotePage, NoteSummaryPage, List[NoteResponse], List[NoteSummary]],
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+@router.get(
+    "/notes/{prompt}",
+    response_model=Union[NotePage, NoteSummaryPage, List[NoteResponse], List[NoteSummary]],
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def read_notes_by_tag(
+        request: Request,
+        prompt: str,
+        match: Literal["any", "all"] = "any",
+        view: Literal["full", "summary"] = "full",
+        cursor: Optional[str] = None,
+        limit: int = Query(10, ge=1, le=100),
+        skip: Optional[int] = Query(None, ge=0, deprecated=True),
+        user: UserResponse = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+) -> NotePage:
+    async def load() -> tuple[str, None]:
+        rows, next_cursor = await dao.get_notes_by_tags(
+            session, user.id, prompt.split(","), match, limit, cursor, skip, view
+        )
+        return _render_page(rows, next_cursor, view, legacy=skip is not None), None
 
-    note.tags = note.tags.split(",") if note.tags else []
-    return note
+    key = f"tags:{match}:{view}:{','.join(dao.normalize_tags(prompt.split(',')))}:{limit}:{cursor}:{skip}"
+    return await cached_response(request, user.id, key, load)
 
 
 @router.put(
     "/notes/{note_id}",
     response_model=NoteResponse,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def update_note(
         note_id: int,
         note_update: NoteUpdate,
-        user: User = Depends(get_current_user),
+        if_match: Optional[str] = Header(None),
+        user: UserResponse = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
 ) -> NoteResponse:
-    note_update.tags = ",".join(note_update.tags) if note_update.tags else ""
-    note = await dao.update_note(session, note_id, note_update, user)
+    if note_update.tags is not None:
+        note_update.tags = ",".join(note_update.tags)
+    note = await dao.update_note(session, note_id, note_update, user, _expected_version(if_match))
 
     if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
 
-    note.tags = note.tags.split(",") if note.tags != "" else []
-    return note
+    return ORJSONResponse(note_payload(note), headers={"ETag": f'"{note.version}"'})
 
 
 @router.delete(
     "/notes/{note_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def delete_note(
         note_id: int,
-        user: User = Depends(get_current_user),
+        if_match: Optional[str] = Header(None),
+        user: UserResponse = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
 ) -> None:
-    await dao.delete_note(session, note_id, user)
+    await dao.delete_note(session, note_id, user, _expected_version(if_match))
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Mapping, Optional
+from datetime import datetime, timezone
+
+from src.config import NOTE_BATCH_MAX_IDS
 
 
 class NoteBase(BaseModel):
@@ -24,8 +26,145 @@ class NoteUpdate(NoteBase):
 
 class NoteResponse(NoteBase):
     id: int
+    version: int
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+def note_payload(note: Any) -> dict:
+    """
+    NoteResponse as a plain dict, built from a `Note` or a row of its columns.
+
+    Database rows are trusted, so this skips pydantic validation; orjson
+    renders the datetimes the same way `model_dump_json` does.
+    """
+    return {
+        "id": note.id,
+        "title": note.title,
+        "content": note.content,
+        "tags": note.tags.split(",") if note.tags else [],
+        "version": note.version,
+        "created_at": note.created_at,
+        "updated_at": note.updated_at,
+    }
+
+
+def note_summary_payload(note: Any) -> dict:
+    return {
+        "id": note.id,
+        "title": note.title,
+        "snippet": note.snippet or "",
+        "tags": note.tags.split(",") if note.tags else [],
+        "version": note.version,
+        "created_at": note.created_at,
+        "updated_at": note.updated_at,
+    }
+
+
+class NotePage(BaseModel):
+    items: List[NoteResponse]
+    next_cursor: Optional[str] = None
+
+
+class NoteSummary(BaseModel):
+    id: int
+    title: str
+    snippet: str
+    tags: List[str] = []
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class NoteSummaryPage(BaseModel):
+    items: List[NoteSummary]
+    next_cursor: Optional[str] = None
+
+
+class NoteSearchHit(NoteResponse):
+    rank: float
+    headline: str
+
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class NoteStats(BaseModel):
+    total: int
+    tags: Dict[str, int]
+    months: Dict[str, int]
+
+
+class BulkLineError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    ids: List[int]
+    errors: List[BulkLineError]
+
+
+class NoteBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=NOTE_BATCH_MAX_IDS)
+
+
+class NoteBatch(BaseModel):
+    items: List[NoteResponse]
+    missing: List[int]
+
+
+class NoteSummaryBatch(BaseModel):
+    items: List[NoteSummary]
+    missing: List[int]
+
+
+class NoteRevisionSummary(BaseModel):
+    version: int
+    title: Optional[str] = None
+    tags: List[str] = []
+    saved_at: Optional[datetime] = None
+
+
+class NoteRevisionPage(BaseModel):
+    items: List[NoteRevisionSummary]
+    next_cursor: Optional[str] = None
+
+
+class NoteRevisionResponse(NoteRevisionSummary):
+    content: Optional[str] = None
+
+
+def revision_payload(revision: Mapping[str, Any]) -> dict:
+    payload = {
+        "version": revision["version"],
+        "title": revision["title"],
+        "tags": revision["tags"].split(",") if revision["tags"] else [],
+        "saved_at": revision["saved_at"],
+    }
+    if "content" in revision:
+        payload["content"] = revision["content"]
+    return payload
+
+
+class NoteRestore(BaseModel):
+    """
+    The version to restore, by number or as the one current at `at`.
+    """
+    version: Optional[int] = Field(None, ge=1)
+    at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def one_target(self) -> "NoteRestore":
+        if (self.version is None) == (self.at is None):
+            raise ValueError("Give either version or at")
+        if self.at is not None and self.at.tzinfo is not None:
+            # Note timestamps are stored as naive UTC.
+            self.at = self.at.astimezone(timezone.utc).replace(tzinfo=None)
+        return self
@@ -0,0 +1,207 @@
+import math
+import re
+from collections import Counter
+from typing import NamedTuple
+
+from sqlalchemy import String, bindparam, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from src.config import SEARCH_BACKEND, SEARCH_LANGUAGE
+from src.note.model import Note
+from src.utils.pagination import decode_cursor, encode_cursor
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchHit(NamedTuple):
+    note: Note
+    rank: float
+    headline: str
+
+
+def tokenize(text: str | None) -> list[str]:
+    return [word.lower() for word in _WORD.findall(text or "")]
+
+
+def highlight(text: str | None, terms: set[str], max_words: int = 35) -> str:
+    """
+    Python counterpart of ts_headline: a window of words around the first match.
+    """
+    words = (text or "").split()
+    first = next((i for i, word in enumerate(words) if terms & set(tokenize(word))), 0)
+    start = max(0, first - max_words // 3)
+    window = words[start:start + max_words]
+    marked = [f"<b>{word}</b>" if terms & set(tokenize(word)) else word for word in window]
+    return " ".join(marked)
+
+
+def document_vector(title, content):
+    """
+    The `notes.search_vector` of a note: title and content as SQL expressions
+    or bound text. Shared by the indexer and the migration that backfilled it.
+    """
+    return func.to_tsvector(SEARCH_LANGUAGE, func.concat_ws(" ", title, content))
+
+
+class PostgresSearchEngine:
+    """
+    Ranked search over the stored `notes.search_vector` column (GIN indexed).
+    """
+
+    async def on_delete(self, note_id: int) -> None:
+        pass
+
+    async def index_many(self, session: AsyncSession, documents: list[dict]) -> None:
+        """
+        Sets the vectors of the given notes, one executemany per batch. The
+        text is bound from Python rather than read from the columns.
+        """
+        table = Note.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.owner_id == bindparam("doc_owner_id"), table.c.id == bindparam("doc_id"))
+            # Indexing is not an edit: keep `updated_at` (and the keyset order).
+            .values(
+                search_vector=document_vector(
+                    bindparam("doc_title", type_=String), bindparam("doc_content", type_=String)
+                ),
+                updated_at=table.c.updated_at
+            ),
+            [
+                {
+                    "doc_id": doc["id"], "doc_owner_id": doc["owner_id"],
+                    "doc_title": doc["title"], "doc_content": doc["content"]
+                }
+                for doc in documents
+            ]
+        )
+
+    async def search(
+            self,
+            session: AsyncSession,
+            owner_id: int,
+            q: str,
+            limit: int = 10,
+            cursor: str | None = None
+    ) -> tuple[list[SearchHit], str | None]:
+        query = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+        rank = func.ts_rank_cd(Note.search_vector, query)
+
+        # Headlines come from Python: the stored content may be compressed,
+        # so ts_headline cannot read it.
+        stmt = select(Note, rank).options(undefer(Note.content)).filter(
+            Note.owner_id == owner_id,
+            Note.search_vector.op("@@")(query)
+        )
+        if cursor is not None:
+            last_rank, last_id = decode_cursor(cursor, float, int)
+            stmt = stmt.filter(tuple_(rank, Note.id) < (last_rank, last_id))
+
+        result = await session.execute(stmt.order_by(rank.desc(), Note.id.desc()).limit(limit + 1))
+        terms = set(tokenize(q))
+        hits = [SearchHit(note, rank, highlight(note.content, terms)) for note, rank in result.all()]
+        return _page(hits, limit)
+
+
+class InvertedIndexSearchEngine:
+    """
+    Pure-Python inverted index for SQLite-backed runs, where there is no tsvector.
+
+    The index lives in process memory: it is filled by `rebuild` at startup and
+    kept current by the search jobs, so it only suits a single process running
+    its jobs in-process (JOB_BACKEND=memory).
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[int, int]] = {}
+        self._documents: dict[int, tuple[int, int, tuple[str, ...]]] = {}
+
+    async def on_write(self, note: Note) -> None:
+        self._add(note.id, note.owner_id, note.title, note.content)
+
+    async def index_many(self, session: AsyncSession, documents: list[dict]) -> None:
+        for doc in documents:
+            self._add(doc["id"], doc["owner_id"], doc["title"], doc["content"])
+
+    def _add(self, note_id: int, owner_id: int, title: str | None, content: str | None) -> None:
+        self._remove(note_id)
+        tokens = tokenize(f"{title or ''} {content or ''}")
+        counts = Counter(tokens)
+        for token, count in counts.items():
+            self._postings.setdefault(token, {})[note_id] = count
+        self._documents[note_id] = (owner_id, len(tokens), tuple(counts))
+
+    async def on_delete(self, note_id: int) -> None:
+        self._remove(note_id)
+
+    def _remove(self, note_id: int) -> None:
+        document = self._documents.pop(note_id, None)
+        if document is None:
+            return
+        for token in document[2]:
+            del self._postings[token][note_id]
+            if not self._postings[token]:
+                del self._postings[token]
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        self._postings.clear()
+        self._documents.clear()
+        result = await session.stream_scalars(select(Note).options(undefer(Note.content)))
+        async for note in result:
+            await self.on_write(note)
+
+    def _rank(self, owner_id: int, terms: list[str]) -> dict[int, float]:
+        postings = [self._postings.get(term, {}) for term in terms]
+        if not postings or not all(postings):
+            return {}
+
+        # AND semantics, like websearch_to_tsquery without operators.
+        candidates = set.intersection(*(set(notes) for notes in postings))
+        total = len(self._documents)
+        scores = {}
+        for note_id in candidates:
+            doc_owner, length, _ = self._documents[note_id]
+            if doc_owner != owner_id:
+                continue
+            score = sum(notes[note_id] * math.log(1 + total / len(notes)) for notes in postings)
+            scores[note_id] = score / (1 + math.log(1 + length))
+        return scores
+
+    async def search(
+            self,
+            session: AsyncSession,
+            owner_id: int,
+            q: str,
+            limit: int = 10,
+            cursor: str | None = None
+    ) -> tuple[list[SearchHit], str | None]:
+        terms = list(dict.fromkeys(tokenize(q)))
+        ranked = sorted(
+            ((score, note_id) for note_id, score in self._rank(owner_id, terms).items()),
+            reverse=True
+        )
+        if cursor is not None:
+            last = tuple(decode_cursor(cursor, float, int))
+            ranked = [key for key in ranked if key < last]
+        ranked = ranked[:limit + 1]
+
+        result = await session.execute(
+            select(Note).options(undefer(Note.content)).filter(Note.id.in_([note_id for _, note_id in ranked]))
+        )
+        notes = {note.id: note for note in result.scalars().all()}
+        hits = [
+            SearchHit(notes[note_id], score, highlight(notes[note_id].content, set(terms)))
+            for score, note_id in ranked if note_id in notes
+        ]
+        return _page(hits, limit)
+
+
+def _page(hits: list[SearchHit], limit: int) -> tuple[list[SearchHit], str | None]:
+    if len(hits) <= limit:
+        return hits, None
+    hits = hits[:limit]
+    return hits, encode_cursor(hits[-1].rank, hits[-1].note.id)
+
+
+search_engine = InvertedIndexSearchEngine() if SEARCH_BACKEND == "memory" else PostgresSearchEngine()
@@ -0,0 +1,155 @@
+"""
+Incrementally maintained note counters behind GET /notes/stats.
+
+The DAO applies deltas inside the transaction that writes the notes, so the
+counters commit or roll back with them. `rebuild` recomputes everything from
+`notes`/`note_tags` to repair drift:
+
+    python -m src.note.stats [--user USER_ID]
+"""
+import argparse
+import asyncio
+from collections import Counter
+from datetime import date, datetime
+from typing import Iterable
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session
+from src.note.cache import note_cache
+from src.note.model import Note, NoteMonthCount, Tag, note_tags
+from src.user.model import User
+from src.utils.logging_config import get_logger
+from src.utils.redis_client import init_redis
+
+logger = get_logger(__name__)
+
+
+def month_of(created_at: datetime) -> date:
+    return created_at.date().replace(day=1)
+
+
+def dialect_insert(session: AsyncSession):
+    """
+    The session dialect's `insert`, which has the ON CONFLICT clauses.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upserts are not implemented for {dialect}")
+
+
+def _month_column(session: AsyncSession):
+    if session.get_bind().dialect.name == "sqlite":
+        return func.date(Note.created_at, "start of month")
+    return func.date_trunc("month", Note.created_at).cast(NoteMonthCount.month.type)
+
+
+async def adjust_tag_counts(session: AsyncSession, deltas: Counter) -> None:
+    """
+    Applies {tag_id: delta} with one executemany.
+    """
+    rows = [{"tag": tag_id, "delta": delta} for tag_id, delta in deltas.items() if delta]
+    if not rows:
+        return
+    table = Tag.__table__
+    await session.execute(
+        update(table)
+        .where(table.c.id == bindparam("tag"))
+        .values(note_count=table.c.note_count + bindparam("delta")),
+        rows
+    )
+
+
+async def adjust_month_counts(
+        session: AsyncSession,
+        owner_id: int,
+        created: Iterable[datetime],
+        sign: int = 1
+) -> None:
+    """
+    Adds (or with sign=-1 removes) notes created at the given times.
+    """
+    deltas = Counter(month_of(created_at) for created_at in created if created_at is not None)
+    if not deltas:
+        return
+    stmt = dialect_insert(session)(NoteMonthCount)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NoteMonthCount.owner_id, NoteMonthCount.month],
+        set_={"count": NoteMonthCount.count + stmt.excluded.count}
+    )
+    await session.execute(
+        stmt,
+        [{"owner_id": owner_id, "month": month, "count": sign * count} for month, count in deltas.items()]
+    )
+
+
+async def get_stats(session: AsyncSession, owner_id: int) -> dict:
+    months = await session.execute(
+        select(NoteMonthCount.month, NoteMonthCount.count)
+        .filter(NoteMonthCount.owner_id == owner_id, NoteMonthCount.count > 0)
+        .order_by(NoteMonthCount.month)
+    )
+    tags = await session.execute(
+        select(Tag.name, Tag.note_count)
+        .filter(Tag.owner_id == owner_id, Tag.note_count > 0)
+        .order_by(Tag.note_count.desc(), Tag.name)
+    )
+    by_month = {month.strftime("%Y-%m"): count for month, count in months.all()}
+    return {"total": sum(by_month.values()), "tags": dict(tags.all()), "months": by_month}
+
+
+async def rebuild(session: AsyncSession, owner_id: int | None = None) -> None:
+    """
+    Recomputes the counters with full scans; for repair, not the request path.
+    """
+    tag_filter = [] if owner_id is None else [Tag.owner_id == owner_id]
+    note_filter = [] if owner_id is None else [Note.owner_id == owner_id]
+
+    await session.execute(
+        update(Tag).filter(*tag_filter).values(
+            note_count=select(func.count())
+            .select_from(note_tags)
+            .where(note_tags.c.tag_id == Tag.id)
+            .scalar_subquery()
+        )
+    )
+
+    month = _month_column(session)
+    await session.execute(
+        delete(NoteMonthCount).filter(*([] if owner_id is None else [NoteMonthCount.owner_id == owner_id]))
+    )
+    await session.execute(
+        dialect_insert(session)(NoteMonthCount).from_select(
+            ["owner_id", "month", "count"],
+            select(Note.owner_id, month, func.count())
+            .filter(Note.created_at.isnot(None), *note_filter)
+            .group_by(Note.owner_id, month)
+        )
+    )
+    await session.commit()
+    # Cached /notes/stats responses were rendered from the old counters.
+    if owner_id is None:
+        result = await session.execute(select(User.id))
+        await note_cache.bump_many(result.scalars().all())
+    else:
+        await note_cache.bump(owner_id)
+    logger.info("Rebuilt note stats for %s", "all users" if owner_id is None else f"user ID: {owner_id}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute note stats counters from the notes table.")
+    parser.add_argument("--user", type=int, help="only rebuild this user's counters")
+    args = parser.parse_args()
+
+    await init_redis()
+    async with async_session() as session:
+        await rebuild(session, args.user)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
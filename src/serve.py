@@ -0,0 +1,127 @@
+"""
+Production server:
+
+    python -m src.serve [--workers N] [--host HOST] [--port PORT]
+
+Imports the app once, binds the socket, then forks the workers, so each
+inherits the imported modules instead of importing them again and is ready
+as soon as its lifespan has prewarmed the database pool and Redis. Workers
+run uvicorn on uvloop with the httptools parser. The supervisor restarts
+workers that die; on SIGTERM/SIGINT it stops them, and each finishes its
+in-flight requests for up to SERVER_GRACEFUL_TIMEOUT seconds.
+"""
+import argparse
+import os
+import signal
+import time
+
+from src.config import SERVER_BACKLOG, SERVER_GRACEFUL_TIMEOUT, SERVER_HOST, SERVER_PORT, SERVER_WORKERS
+
+
+def default_workers() -> int:
+    # CPUs this process may run on, which respects container CPU sets.
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the API with pre-forked uvicorn workers.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS or default_workers())
+    args = parser.parse_args()
+
+    started_at = time.time()
+    # Deferred until after argument parsing so `--help` and bad arguments
+    # return without paying for the app's imports.
+    import uvicorn
+
+    from src.utils import instrumentation, logging_config
+    from src.utils.logging_config import get_logger
+
+    logger = get_logger(__name__)
+
+    class Server(uvicorn.Server):
+        async def shutdown(self, sockets=None) -> None:
+            from src.main import drain
+
+            # Stop accepting first, then end long-lived streams so the
+            # graceful wait only covers ordinary requests.
+            for server in self.servers:
+                server.close()
+            drain()
+            await super().shutdown(sockets)
+
+    config = uvicorn.Config(
+        "src.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        lifespan="on",
+        backlog=SERVER_BACKLOG,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        access_log=False,
+        server_header=False,
+    )
+    config.load()
+    instrumentation.launch.update({"started_at": started_at, "import": time.time() - started_at})
+    sock = config.bind_socket()
+
+    def run_worker() -> None:
+        code = 0
+        try:
+            Server(config).run(sockets=[sock])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            logging_config.stop_listener()
+            os._exit(code)
+
+    if args.workers == 1:
+        Server(config).run(sockets=[sock])
+        return
+
+    workers: set[int] = set()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            instrumentation.launch["forked_at"] = time.time()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            run_worker()
+        workers.add(pid)
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Starting %s workers on %s:%s", args.workers, args.host, args.port)
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        pid, status = os.wait()
+        workers.discard(pid)
+        if not stopping:
+            logger.warning("Worker %s exited with status %s, restarting it", pid, os.waitstatus_to_exitcode(status))
+            time.sleep(1)
+            if not stopping:
+                spawn()
+    sock.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import logging
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Union, Annotated
 
@@ -6,51 +8,141 @@ import pytz
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.ext.asyncio import AsyncSession
+from redis.exceptions import RedisError
 
-from src.config import ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
-from src.database import get_db
+from src.config import ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM, JWT_CACHE_SIZE, JWT_EMBED_PRINCIPAL
+from src.database import async_session
 from src.user import dao
-from src.user.model import User
+from src.user.cache import principal_cache
+from src.user.schema import UserResponse
+from src.utils.instrumentation import timed
+from src.utils.logging_config import get_logger
+from src.utils.lru import TTLCache
+from src.utils.redis_client import get_redis
+
+logger = get_logger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/token")
 
+# Verified token -> claims. Entries expire together with the token itself.
+_verified_tokens = TTLCache(JWT_CACHE_SIZE, ttl=0)
+
 
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(pytz.UTC) + expires_delta
     else:
-        expire = datetime.now(pytz.UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = datetime.now(pytz.UTC) + timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def principal_claims(user) -> dict:
+    claims = {"sub": str(user.id)}
+    if JWT_EMBED_PRINCIPAL:
+        claims["usr"] = {"username": user.username, "created_at": user.created_at.isoformat()}
+    return claims
+
+
 def decode_access_token(token: str) -> dict:
+    claims = _verified_tokens.get(token)
+    if claims is not None:
+        return claims
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token or expired token")
+    ttl = claims.get("exp", 0) - time.time()
+    if ttl > 0:
+        _verified_tokens.set(token, claims, ttl)
+    return claims
+
+
+async def is_revoked(claims: dict) -> bool:
+    """
+    Fails open: while Redis is unreachable every token is accepted, revoked or
+    not, until it expires (at most ACCESS_TOKEN_EXPIRE_MINUTES).
+    """
+    redis = get_redis()
+    if redis is None:
+        return False
+    try:
+        jti_revoked, revoked_before = await redis.mget(
+            f"revoked:jti:{claims.get('jti')}", f"revoked:user:{claims.get('sub')}"
+        )
+    except RedisError as e:
+        logger.warning("Token revocation check failed: %s", e)
+        return False
+    if jti_revoked is not None:
+        return True
+    return revoked_before is not None and claims.get("iat", 0) <= float(revoked_before)
+
+
+def _revocation_unavailable(e: RedisError) -> HTTPException:
+    logger.error("Token revocation failed: %s", e)
+    return HTTPException(status_code=503, detail="Token revocation unavailable", headers={"Retry-After": "1"})
+
+
+async def revoke_token(token: str, claims: dict) -> None:
+    _verified_tokens.delete(token)
+    ttl = int(claims.get("exp", 0) - time.time()) + 1
+    redis = get_redis()
+    if redis is not None and ttl > 0:
+        try:
+            await redis.set(f"revoked:jti:{claims.get('jti')}", 1, ex=ttl)
+        except RedisError as e:
+            raise _revocation_unavailable(e)
+
+
+async def revoke_user_tokens(user_id: int) -> None:
+    """
+    Invalidates every token issued to the user so far, e.g. for a password
+    change. Raises 503 if that cannot be recorded, so callers should revoke
+    before making the change.
+    """
+    redis = get_redis()
+    if redis is not None:
+        try:
+            await redis.set(
+                f"revoked:user:{user_id}", time.time(), ex=int(ACCESS_TOKEN_EXPIRE_MINUTES) * 60 + 1
+            )
+        except RedisError as e:
+            raise _revocation_unavailable(e)
+    await principal_cache.invalidate(user_id)
+
+
+async def _load_user(user_id: int):
+    async with async_session() as db:
+        return await dao.get_user_by_id(db, user_id)
 
 
 async def get_current_user(
-        token: Annotated[str, Depends(oauth2_scheme)],
-        db: AsyncSession = Depends(get_db)
-) -> User:
+        token: Annotated[str, Depends(oauth2_scheme)]
+) -> UserResponse:
+    # Deliberately no `get_db` dependency: the route's session is only created
+    # after authentication succeeds, and cache hits never touch the pool.
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
     )
 
     try:
-        payload = decode_access_token(token)
+        with timed("jwt"):
+            payload = decode_access_token(token)
+        if await is_revoked(payload):
+            raise credentials_exception
         user_id: int = int(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
-        user = await dao.get_user_by_id(db, user_id)
+
+        principal = payload.get("usr")
+        if principal is not None:
+            return UserResponse(id=user_id, **principal)
+
+        with timed("principal"):
+            user = await principal_cache.get_or_load(user_id, lambda: _load_user(user_id))
         if user is None:
             raise credentials_exception
 
@@ -0,0 +1,127 @@
+import time
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from src.config import (
+    PRINCIPAL_CACHE_REDIS_TTL,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL,
+    PRINCIPAL_CACHE_USE_REDIS,
+)
+from src.user.schema import UserResponse
+from src.utils.logging_config import get_logger
+from src.utils.lru import TTLCache
+from src.utils.metrics import Counter, Histogram
+from src.utils.redis_client import get_redis
+
+logger = get_logger(__name__)
+
+principal_cache_requests = Counter(
+    "principal_cache_requests_total",
+    "Authenticated-user lookups by cache tier that answered them.",
+    ["result"],
+)
+principal_cache_saved_seconds = Counter(
+    "principal_cache_saved_seconds_total",
+    "Estimated user-lookup latency avoided by principal cache hits.",
+)
+principal_load_seconds = Histogram(
+    "principal_load_seconds",
+    "Latency of loading a principal from the database on a cache miss.",
+)
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of authenticated users keyed by user id.
+
+    The local tier is a short-lived LRU in this worker; the optional Redis tier
+    is shared by all workers and outlives it. Entries hold `UserResponse`, never
+    ORM objects, so they are safe to share between sessions.
+    """
+
+    def __init__(self, max_size: int, ttl: float, redis_ttl: int, use_redis: bool) -> None:
+        self.local = TTLCache(max_size, ttl)
+        self.redis_ttl = redis_ttl
+        self.use_redis = use_redis
+        # Moving average of a miss, credited as "saved" on each hit.
+        self._miss_cost = 0.0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    def _redis(self):
+        return get_redis() if self.use_redis else None
+
+    async def get(self, user_id: int) -> UserResponse | None:
+        user = self.local.get(user_id)
+        if user is not None:
+            principal_cache_requests.inc(result="local")
+            return user
+
+        redis = self._redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._key(user_id))
+            except RedisError as e:
+                logger.warning("Principal cache Redis read failed: %s", e)
+                raw = None
+            if raw is not None:
+                user = UserResponse.model_validate_json(raw)
+                self.local.set(user_id, user)
+                principal_cache_requests.inc(result="redis")
+                return user
+
+        principal_cache_requests.inc(result="miss")
+        return None
+
+    async def set(self, user: UserResponse) -> None:
+        self.local.set(user.id, user)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                await redis.set(self._key(user.id), user.model_dump_json(), ex=self.redis_ttl)
+            except RedisError as e:
+                logger.warning("Principal cache Redis write failed: %s", e)
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Drops a user from both tiers. Must be called after any change to the user row;
+        other workers' local tiers converge within PRINCIPAL_CACHE_TTL.
+        """
+        self.local.delete(user_id)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                await redis.delete(self._key(user_id))
+            except RedisError as e:
+                logger.warning("Principal cache Redis invalidation failed: %s", e)
+
+    async def get_or_load(
+            self,
+            user_id: int,
+            loader: Callable[[], Awaitable[object | None]]
+    ) -> UserResponse | None:
+        user = await self.get(user_id)
+        if user is not None:
+            principal_cache_saved_seconds.inc(self._miss_cost)
+            return user
+
+        start = time.perf_counter()
+        db_user = await loader()
+        elapsed = time.perf_counter() - start
+        principal_load_seconds.observe(elapsed)
+        self._miss_cost = elapsed if not self._miss_cost else 0.9 * self._miss_cost + 0.1 * elapsed
+
+        if db_user is None:
+            return None
+        user = UserResponse.model_validate(db_user)
+        await self.set(user)
+        return user
+
+
+principal_cache = PrincipalCache(
+    PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_REDIS_TTL, PRINCIPAL_CACHE_USE_REDIS
+)
@@ -1,16 +1,20 @@
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException
 
-from src.utils.logging_config import logger
+from src.database import mark_write, use_replica
+from src.utils.logging_config import get_logger
 from src.user.model import User
 from src.user.schema import UserCreate
 from src.utils.password_hashing import hash_password
 
+logger = get_logger(__name__)
+
 
 async def create_user(session: AsyncSession, user: UserCreate) -> User:
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password(user.password)
 
     db_user = User(
         username=user.username,
@@ -22,18 +26,18 @@ async def create_user(session: AsyncSession, user: UserCreate) -> User:
     try:
         await session.commit()
         await session.refresh(db_user)
-        logger.info(f"User created successfully: {user.username}")
+        logger.info("User created successfully: %s", user.username)
     except IntegrityError as e:
         await session.rollback()
-        logger.error(f"Integrity error while creating user: {e}")
+        logger.error("Integrity error while creating user: %s", e)
         raise HTTPException(status_code=400, detail="User already exists")
     except SQLAlchemyError as e:
         await session.rollback()
-        logger.error(f"SQLAlchemy error while creating user: {e}")
+        logger.error("SQLAlchemy error while creating user: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     except Exception as e:
         await session.rollback()
-        logger.error(f"Unexpected error while creating user: {e}")
+        logger.error("Unexpected error while creating user: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
     return db_user
@@ -44,30 +48,45 @@ async def get_user_by_username(session: AsyncSession, username: str) -> User or
         result = await session.execute(select(User).filter(User.username == username))
         user = result.scalars().first()
         if user is None:
-            logger.info(f"User not found by username: {username}")
+            logger.info("User not found by username: %s", username)
         else:
-            logger.info(f"User retrieved by username: {username}")
+            logger.info("User retrieved by username: %s", username)
     except SQLAlchemyError as e:
-        logger.error(f"SQLAlchemy error while retrieving user by username: {e}")
+        logger.error("SQLAlchemy error while retrieving user by username: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     except Exception as e:
-        logger.error(f"Unexpected error while retrieving user by username: {e}")
+        logger.error("Unexpected error while retrieving user by username: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     return user
 
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> User or None:
+    await use_replica(session, user_id)
     try:
         result = await session.execute(select(User).filter(User.id == user_id))
         user = result.scalars().first()
         if user is None:
-            logger.info(f"User not found by id: {user_id}")
+            logger.info("User not found by id: %s", user_id)
         else:
-            logger.info(f"User retrieved by id: {user_id}")
+            logger.info("User retrieved by id: %s", user_id)
     except SQLAlchemyError as e:
-        logger.error(f"SQLAlchemy error while retrieving user by id: {e}")
+        logger.error("SQLAlchemy error while retrieving user by id: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     except Exception as e:
-        logger.error(f"Unexpected error while retrieving user by id: {e}")
+        logger.error("Unexpected error while retrieving user by id: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
     return user
+
+
+async def update_password_hash(session: AsyncSession, user_id: int, hashed_password: str) -> None:
+    try:
+        await session.execute(
+            update(User).where(User.id == user_id).values(hashed_password=hashed_password)
+        )
+        await session.commit()
+        await mark_write(session, user_id)
+        logger.info("Password hash updated for user id: %s", user_id)
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error("SQLAlchemy error while updating password hash: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,8 +1,8 @@
 from datetime import timedelta
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import ACCESS_TOKEN_EXPIRE_MINUTES
@@ -10,10 +10,19 @@ from src.config import REQUEST_LIMIT_PER_MINUTE as rl_tms
 
 from src.database import get_db
 from src.user import dao
-from src.user.auth import create_access_token
+from src.user.auth import (
+    create_access_token,
+    decode_access_token,
+    get_current_user,
+    oauth2_scheme,
+    principal_claims,
+    revoke_token,
+    revoke_user_tokens,
+)
 from src.user.dao import get_user_by_username
-from src.user.schema import UserCreate, UserResponse, Token
-from src.utils.password_hashing import verify_password
+from src.user.schema import UserCreate, UserResponse, Token, PasswordChange
+from src.utils.password_hashing import hash_password, verify_and_update
+from src.utils.request_limiter import RateLimit
 
 router = APIRouter()
 
@@ -21,28 +30,65 @@ router = APIRouter()
 @router.post(
     "/users/token",
     response_model=Token,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def login(
         form_data: OAuth2PasswordRequestForm = Depends(),
         db: AsyncSession = Depends(get_db)
 ) -> Token:
     user = await get_user_by_username(db, form_data.username)
-    if user is None or not verify_password(form_data.password, user.hashed_password):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+
+    valid, new_hash = await verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
+    if new_hash is not None:
+        # BCRYPT_ROUNDS changed since this hash was made; upgrade it transparently.
+        await dao.update_password_hash(db, user.id, new_hash)
 
     access_token_expires = timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=principal_claims(user),
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post(
+    "/users/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def logout(token: Annotated[str, Depends(oauth2_scheme)]) -> None:
+    await revoke_token(token, decode_access_token(token))
+
+
+@router.post(
+    "/users/me/password",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
+)
+async def change_password(
+        password_change: PasswordChange,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+) -> None:
+    user = await dao.get_user_by_id(db, current_user.id)
+    valid, _ = await verify_and_update(password_change.old_password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Incorrect password")
+
+    new_hash = await hash_password(password_change.new_password)
+    # Revoke first: if Redis is down the request fails with the old password intact.
+    await revoke_user_tokens(user.id)
+    await dao.update_password_hash(db, user.id, new_hash)
+
+
 @router.post(
     "/users/",
     response_model=UserResponse,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def create_user(
         user: UserCreate,
@@ -54,7 +100,7 @@ async def create_user(
 @router.get(
     "/users/{user_id}",
     response_model=UserResponse,
-    dependencies=[Depends(RateLimiter(times=rl_tms, seconds=60))]
+    dependencies=[Depends(RateLimit(times=rl_tms, seconds=60))]
 )
 async def read_user_by_id(
         user_id: int,
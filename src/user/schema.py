@@ -19,4 +19,9 @@ class UserResponse(UserBase):
 
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+
+class PasswordChange(BaseModel):
+    old_password: str
+    new_password: str
@@ -0,0 +1,216 @@
+"""
+Compression for note bodies at rest and for HTTP responses.
+
+Stored values are bytes. Compressed ones start with MAGIC and a codec byte;
+anything else is plain UTF-8, which covers rows written before compression
+and bodies too small to be worth it. 0xFF never occurs in UTF-8, so the
+marker cannot be mistaken for text.
+"""
+import zlib
+from functools import lru_cache
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzipped
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for NOTE_CONTENT_CODEC=zstd
+    zstandard = None
+
+from src.utils.metrics import Counter
+
+MAGIC = b"\xff\x01"
+CODEC_IDS = {"zlib": 1, "zstd": 2}
+
+response_bytes = Counter(
+    "http_response_body_bytes_total",
+    "Response body bytes before and after compression, by encoding.",
+    ["encoding", "stage"],
+)
+
+
+@lru_cache(maxsize=None)
+def _zstd_compressor(level: int):
+    return zstandard.ZstdCompressor(level=level)
+
+
+@lru_cache(maxsize=None)
+def _zstd_decompressor():
+    return zstandard.ZstdDecompressor()
+
+
+def check_codec(codec: str) -> None:
+    if codec not in ("none", *CODEC_IDS):
+        raise ValueError(f"Unknown content codec {codec!r}; expected none, zlib or zstd")
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("NOTE_CONTENT_CODEC=zstd needs the zstandard package")
+
+
+def compress_text(text: str, codec: str, level: int, min_size: int) -> bytes:
+    """
+    `text` as stored: framed and compressed when at least `min_size` bytes
+    and compression actually saves space, plain UTF-8 otherwise.
+    """
+    raw = text.encode()
+    if codec == "none" or len(raw) < min_size:
+        return raw
+    if codec == "zstd":
+        packed = _zstd_compressor(level).compress(raw)
+    else:
+        packed = zlib.compress(raw, level)
+    if len(packed) + len(MAGIC) + 1 >= len(raw):
+        return raw
+    return MAGIC + bytes((CODEC_IDS[codec],)) + packed
+
+
+def decompress_text(value: bytes) -> str:
+    if not value.startswith(MAGIC):
+        return value.decode()
+    codec, payload = value[len(MAGIC)], value[len(MAGIC) + 1:]
+    if codec == CODEC_IDS["zlib"]:
+        return zlib.decompress(payload).decode()
+    if codec == CODEC_IDS["zstd"]:
+        if zstandard is None:
+            raise RuntimeError("Note content was stored with zstd but the zstandard package is missing")
+        return _zstd_decompressor().decompress(payload).decode()
+    raise ValueError(f"Unknown content codec id {codec}")
+
+
+def _accepted(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+class _Encoder:
+    """
+    Streaming encoder that flushes after every chunk, so streamed responses
+    (NDJSON export) still reach the client chunk by chunk.
+    """
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `minimum_size` bytes with the best
+    encoding the client accepts (br, then gzip). Every response it could
+    compress gets `Vary: Accept-Encoding`, including those sent as is. Event
+    streams, already encoded bodies and non-text media types pass through
+    untouched.
+    """
+
+    compressible = ("application/json", "application/x-ndjson", "text/plain", "text/html", "text/csv")
+
+    def __init__(self, app, minimum_size: int, gzip_level: int, brotli_quality: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value
+                break
+        accepted = _accepted(accept.decode("latin-1"))
+        encoding = "br" if brotli is not None and "br" in accepted else "gzip" if "gzip" in accepted else None
+
+        start_message = None
+        encoder: _Encoder | None = None
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message, encoder
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                media_type = headers.get(b"content-type", b"").split(b";")[0].decode("latin-1").strip()
+                if b"content-encoding" in headers or (media_type and media_type not in self.compressible):
+                    await send(message)
+                    return
+                # Compressed or not, this URL's responses depend on Accept-Encoding;
+                # 304s (no media type) must carry the same Vary as the 200.
+                message["headers"] = _vary_accept_encoding(message.get("headers", []))
+                if encoding is None or not media_type:
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                if not more and len(body) < self.minimum_size:
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                start_message["headers"] = _compressed_headers(start_message["headers"], encoding)
+                await send(start_message)
+
+            compressed = encoder.compress(body, final=not more)
+            response_bytes.inc(len(body), encoding=encoding, stage="original")
+            response_bytes.inc(len(compressed), encoding=encoding, stage="sent")
+            await send({"type": "http.response.body", "body": compressed, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _vary_accept_encoding(headers: list) -> list:
+    result = []
+    vary_set = False
+    for name, value in headers:
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                value = value + b", Accept-Encoding"
+            vary_set = True
+        result.append((name, value))
+    if not vary_set:
+        result.append((b"vary", b"Accept-Encoding"))
+    return result
+
+
+def _compressed_headers(headers: list, encoding: str) -> list:
+    result = []
+    for name, value in headers:
+        lower = name.lower()
+        if lower == b"content-length":
+            continue
+        if lower == b"etag" and not value.startswith(b"W/"):
+            # Byte-for-byte the body changed; the representation did not.
+            value = b"W/" + value
+        result.append((name, value))
+    result.append((b"content-encoding", encoding.encode()))
+    return result
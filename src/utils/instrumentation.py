@@ -0,0 +1,207 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from redis import asyncio as aioredis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.utils.logging_config import get_logger
+from src.utils.metrics import Gauge, Histogram
+
+logger = get_logger(__name__)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template, method and status.",
+    ["method", "route", "status"],
+)
+http_requests_in_progress = Gauge("http_requests_in_progress", "Requests currently being served.")
+request_phase_duration = Histogram(
+    "request_phase_duration_seconds",
+    "Time spent per request phase (rate limit, auth, db, redis, render).",
+    ["phase"],
+)
+db_query_duration = Histogram("db_query_duration_seconds", "Database statement execution time.", ["operation"])
+redis_command_duration = Histogram("redis_command_duration_seconds", "Redis round trips by command.", ["command"])
+event_loop_lag = Gauge("event_loop_lag_seconds", "How late the last event-loop probe woke up.")
+event_loop_lag_histogram = Histogram(
+    "event_loop_lag_distribution_seconds",
+    "Distribution of event-loop probe delays.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+startup_duration = Gauge(
+    "startup_duration_seconds",
+    "Worker start-up by phase: import, prewarm, fork (fork to serving) and ready (launch to serving).",
+    ["phase"],
+)
+first_request_duration = Gauge("first_request_duration_seconds", "Latency of the first request this worker served.")
+
+# Filled in by `src.serve` before it forks workers, which inherit it.
+launch: dict[str, float] = {}
+_first_request = True
+
+# Per-request accumulator: phase -> [seconds, count]. None outside requests.
+_phases: ContextVar[dict[str, list] | None] = ContextVar("request_phases", default=None)
+
+
+def record(phase: str, seconds: float) -> None:
+    """
+    Adds `seconds` to the phase's total for the current request, if any.
+    """
+    phases = _phases.get()
+    if phases is not None:
+        entry = phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        request_phase_duration.observe(elapsed, phase=phase)
+        record(phase, elapsed)
+
+
+def server_timing(phases: dict[str, list], total: float) -> str:
+    entries = [
+        f'{phase};dur={seconds * 1000:.2f};desc="{count}x"' if count > 1 else f"{phase};dur={seconds * 1000:.2f}"
+        for phase, (seconds, count) in phases.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def report_startup(prewarm_seconds: float) -> None:
+    """
+    Records how long this worker took to become ready. Without `src.serve`
+    the launch time is unknown and only the prewarm phase is reported.
+    """
+    startup_duration.set(prewarm_seconds, phase="prewarm")
+    if "import" in launch:
+        startup_duration.set(launch["import"], phase="import")
+    if "forked_at" in launch:
+        startup_duration.set(time.time() - launch["forked_at"], phase="fork")
+    if "started_at" in launch:
+        ready = time.time() - launch["started_at"]
+        startup_duration.set(ready, phase="ready")
+        logger.info(
+            "Worker ready %.0f ms after fork, %.0f ms after launch (prewarm %.0f ms)",
+            (time.time() - launch.get("forked_at", launch["started_at"])) * 1000, ready * 1000, prewarm_seconds * 1000
+        )
+    else:
+        logger.info("Worker ready (prewarm %.0f ms)", prewarm_seconds * 1000)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request by route template and adds a Server-Timing
+    header with the phases recorded while it was served.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        global _first_request
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: dict[str, list] = {}
+        token = _phases.set(phases)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(phases, time.perf_counter() - start)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_requests_in_progress.dec()
+            _phases.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            http_request_duration.observe(
+                elapsed,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+            if _first_request:
+                _first_request = False
+                first_request_duration.set(elapsed)
+                logger.info("First request served in %.1f ms", elapsed * 1000)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Times each statement through cursor execute events. They run in the
+    greenlet of the awaiting task, so the request's context is visible.
+    """
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_query_duration.observe(elapsed, operation=operation)
+        record("db", elapsed)
+
+
+class TimedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            elapsed = time.perf_counter() - start
+            redis_command_duration.observe(elapsed, command="PIPELINE")
+            record("redis", elapsed)
+
+
+class TimedRedis(aioredis.Redis):
+    """
+    Redis client that times every round trip, pipelines included.
+    """
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            elapsed = time.perf_counter() - start
+            redis_command_duration.observe(elapsed, command=str(args[0]).upper())
+            record("redis", elapsed)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> TimedPipeline:
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """
+    Sleeps `interval` over and over; any extra delay is time the loop was
+    busy running something else.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(time.perf_counter() - start - interval, 0.0)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
@@ -0,0 +1,323 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, NamedTuple
+
+import orjson
+from redis.exceptions import RedisError, ResponseError
+
+from src.config import JOB_IDEMPOTENCY_TTL, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY, JOB_VISIBILITY_TIMEOUT
+from src.utils.logging_config import get_logger
+from src.utils.lru import TTLCache
+from src.utils.metrics import Counter, Gauge, Histogram
+
+logger = get_logger(__name__)
+
+job_queue_lag = Histogram(
+    "job_queue_lag_seconds",
+    "Time from a job becoming due to a worker starting it.",
+    ["name"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+job_duration = Histogram("job_duration_seconds", "Job handler run time.", ["name"])
+jobs_processed = Counter("jobs_processed_total", "Finished job runs by outcome.", ["name", "result"])
+job_queue_depth = Gauge("job_queue_depth", "Jobs waiting in the queue, including delayed retries.")
+
+Handler = Callable[[dict], Awaitable[None]]
+handlers: dict[str, Handler] = {}
+
+
+def job_handler(name: str) -> Callable[[Handler], Handler]:
+    """
+    Registers the decorated coroutine as the handler of jobs called `name`.
+    """
+    def register(func: Handler) -> Handler:
+        handlers[name] = func
+        return func
+    return register
+
+
+class Job(NamedTuple):
+    id: str
+    name: str
+    payload: dict
+    key: str | None = None
+    attempt: int = 0
+    # When the job became due: enqueue time, or the end of its retry delay.
+    due_at: float = 0.0
+
+    def dumps(self) -> str:
+        return orjson.dumps(self._asdict()).decode()
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "Job":
+        return cls(**orjson.loads(raw))
+
+
+class InMemoryJobBackend:
+    """
+    Queue for a single process: jobs are lost on restart, retries wait on the
+    event loop. Meant for tests and local runs.
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._keys = TTLCache(100_000, JOB_IDEMPOTENCY_TTL)
+        self._done = TTLCache(100_000, JOB_IDEMPOTENCY_TTL)
+        self._delayed = 0
+        # Put but not yet acknowledged: queued, delayed or being run.
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.dead: list[tuple[Job, str]] = []
+
+    async def claim_key(self, key: str) -> bool:
+        if self._keys.get(key):
+            return False
+        self._keys.set(key, True)
+        return True
+
+    async def put(self, job: Job, delay: float = 0.0) -> None:
+        self._unfinished += 1
+        self._idle.clear()
+        if delay <= 0:
+            self._queue.put_nowait(job)
+            return
+        self._delayed += 1
+
+        def release() -> None:
+            self._delayed -= 1
+            self._queue.put_nowait(job)
+
+        asyncio.get_running_loop().call_later(delay, release)
+
+    async def fetch(self, consumer: str, timeout: float) -> tuple[Job, Any] | None:
+        try:
+            job = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return job, job
+
+    async def ack(self, receipt: Any) -> None:
+        # A retry is put before the failed run is acknowledged, so this only
+        # reaches zero once every job has finished or been buried.
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._idle.set()
+
+    async def join(self) -> None:
+        """
+        Waits until every job put so far has finished or been buried.
+        """
+        await self._idle.wait()
+
+    async def is_done(self, key: str) -> bool:
+        return bool(self._done.get(key))
+
+    async def mark_done(self, key: str) -> None:
+        self._done.set(key, True)
+
+    async def bury(self, job: Job, error: str) -> None:
+        self.dead.append((job, error))
+
+    async def depth(self) -> int:
+        return self._queue.qsize() + self._delayed
+
+
+class RedisJobBackend:
+    """
+    Redis stream consumed through a consumer group, so every job goes to one
+    worker and stays pending until acknowledged. Retries wait in a sorted set
+    until due; jobs of a crashed worker are reclaimed after
+    JOB_VISIBILITY_TIMEOUT; jobs out of attempts go to a dead-letter stream.
+    """
+
+    stream = "jobs:stream"
+    group = "workers"
+    delayed = "jobs:delayed"
+    dead = "jobs:dead"
+
+    def __init__(self, redis) -> None:
+        self.redis = redis
+        self._group_ready = False
+        self._last_reclaim = 0.0
+        self._reclaimed: list = []
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def claim_key(self, key: str) -> bool:
+        return bool(await self.redis.set(f"jobs:key:{key}", 1, nx=True, ex=JOB_IDEMPOTENCY_TTL))
+
+    async def put(self, job: Job, delay: float = 0.0) -> None:
+        if delay <= 0:
+            await self.redis.xadd(self.stream, {"job": job.dumps()})
+        else:
+            await self.redis.zadd(self.delayed, {job.dumps(): job.due_at})
+
+    async def _promote_due(self) -> None:
+        due = await self.redis.zrangebyscore(self.delayed, "-inf", time.time(), start=0, num=100)
+        for raw in due:
+            # Only the worker whose ZREM succeeds moves the job.
+            if await self.redis.zrem(self.delayed, raw):
+                await self.redis.xadd(self.stream, {"job": raw})
+
+    async def _reclaim(self, consumer: str) -> None:
+        now = time.monotonic()
+        if self._reclaimed or now - self._last_reclaim < JOB_VISIBILITY_TIMEOUT / 2:
+            return
+        self._last_reclaim = now
+        result = await self.redis.xautoclaim(
+            self.stream, self.group, consumer, min_idle_time=JOB_VISIBILITY_TIMEOUT * 1000, count=100
+        )
+        self._reclaimed.extend(result[1])
+
+    async def fetch(self, consumer: str, timeout: float) -> tuple[Job, Any] | None:
+        await self._ensure_group()
+        await self._promote_due()
+        await self._reclaim(consumer)
+        if self._reclaimed:
+            entry_id, fields = self._reclaimed.pop()
+            return Job.loads(fields["job"]), entry_id
+
+        response = await self.redis.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=1, block=int(timeout * 1000)
+        )
+        if not response or not response[0][1]:
+            return None
+        entry_id, fields = response[0][1][0]
+        return Job.loads(fields["job"]), entry_id
+
+    async def ack(self, receipt: Any) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, receipt)
+        pipe.xdel(self.stream, receipt)
+        await pipe.execute()
+
+    async def is_done(self, key: str) -> bool:
+        return bool(await self.redis.exists(f"jobs:done:{key}"))
+
+    async def mark_done(self, key: str) -> None:
+        await self.redis.set(f"jobs:done:{key}", 1, ex=JOB_IDEMPOTENCY_TTL)
+
+    async def bury(self, job: Job, error: str) -> None:
+        await self.redis.xadd(self.dead, {"job": job.dumps(), "error": error}, maxlen=10_000, approximate=True)
+
+    async def depth(self) -> int:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xlen(self.stream)
+        pipe.zcard(self.delayed)
+        return sum(await pipe.execute())
+
+
+class JobQueue:
+    """
+    Enqueues jobs by handler name and runs them on a pool of asyncio workers.
+
+    A job is retried with exponential backoff until JOB_MAX_ATTEMPTS. With an
+    idempotency key, the job is enqueued at most once per key and skipped if
+    a run with that key already succeeded, which covers redelivery after a
+    worker died between running a job and acknowledging it.
+    """
+
+    def __init__(self, backend, fetch_timeout: float = 1.0) -> None:
+        self.backend = backend
+        # How long an idle worker blocks on the backend, hence how long `stop` can take.
+        self.fetch_timeout = fetch_timeout
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    async def enqueue(self, name: str, payload: dict, key: str | None = None) -> None:
+        job = Job(uuid.uuid4().hex, name, payload, key, 0, time.time())
+        try:
+            if key is not None and not await self.backend.claim_key(key):
+                return
+            await self.backend.put(job)
+        except (RedisError, OSError) as e:
+            # Losing the work would leave derived data stale for good; doing
+            # it inline only costs this request some latency.
+            logger.warning("Could not enqueue job %s, running it inline: %s", name, e)
+            try:
+                await self._execute(job, None)
+            except (RedisError, OSError) as e:
+                logger.error("Inline run of job %s could not be recorded: %s", name, e)
+
+    async def _execute(self, job: Job, receipt: Any) -> None:
+        handler = handlers.get(job.name)
+        job_queue_lag.observe(max(time.time() - job.due_at, 0), name=job.name)
+        start = time.perf_counter()
+        try:
+            if job.key is not None and await self.backend.is_done(job.key):
+                jobs_processed.inc(name=job.name, result="duplicate")
+            elif handler is None:
+                await self.backend.bury(job, "no handler registered")
+                jobs_processed.inc(name=job.name, result="dead")
+                logger.error("No handler for job %s (%s)", job.name, job.id)
+            else:
+                await handler(job.payload)
+                if job.key is not None:
+                    await self.backend.mark_done(job.key)
+                jobs_processed.inc(name=job.name, result="ok")
+        except Exception as e:
+            await self._retry(job, e)
+        finally:
+            job_duration.observe(time.perf_counter() - start, name=job.name)
+        if receipt is not None:
+            await self.backend.ack(receipt)
+
+    async def _retry(self, job: Job, error: Exception) -> None:
+        attempt = job.attempt + 1
+        if attempt >= JOB_MAX_ATTEMPTS:
+            jobs_processed.inc(name=job.name, result="dead")
+            logger.error("Job %s (%s) failed %s times, giving up: %s", job.name, job.id, attempt, error)
+            await self.backend.bury(job, repr(error))
+            return
+        delay = JOB_RETRY_DELAY * 2 ** job.attempt
+        jobs_processed.inc(name=job.name, result="retry")
+        logger.warning("Job %s (%s) failed, retrying in %.1fs: %s", job.name, job.id, delay, error)
+        await self.backend.put(job._replace(attempt=attempt, due_at=time.time() + delay), delay)
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                fetched = await self.backend.fetch(self.consumer, timeout=self.fetch_timeout)
+                if fetched is not None:
+                    await self._execute(*fetched)
+            except (RedisError, OSError) as e:
+                # An unacknowledged job is reclaimed after JOB_VISIBILITY_TIMEOUT.
+                logger.warning("Job queue backend error: %s", e)
+                await asyncio.sleep(1.0)
+
+    async def _monitor(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_queue_depth.set(await self.backend.depth())
+            except (RedisError, OSError):
+                pass
+            await asyncio.sleep(5)
+
+    async def run(self, concurrency: int) -> None:
+        """
+        Runs `concurrency` workers until `stop` is called; in-flight jobs finish.
+        """
+        self._stopping.clear()
+        monitor = asyncio.create_task(self._monitor())
+        try:
+            await asyncio.gather(*(self._work() for _ in range(concurrency)))
+        finally:
+            monitor.cancel()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+
+job_queue = JobQueue(InMemoryJobBackend())
@@ -1,12 +1,87 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from src.config import LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_QUEUE_SIZE, LOG_SAMPLE_RATE
+from src.utils.metrics import Gauge
 
 log_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../logs")
 os.makedirs(log_directory, exist_ok=True)
 
 log_file = os.path.join(log_directory, 'app.log')
 
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.INFO or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread, which formats and writes them off
+    the event loop. The message and traceback are rendered to text first:
+    args may be mutated by the request after the call, or be ORM objects
+    that must not be touched from another thread. Records are dropped, not
+    waited on, when the queue is full.
+    """
+
+    dropped = 0
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A copy: other handlers on the logger get the same record object.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def _module_levels(spec: str) -> dict[str, str]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
 handler = TimedRotatingFileHandler(
     log_file,
     when='midnight',
@@ -14,10 +89,49 @@ handler = TimedRotatingFileHandler(
     backupCount=7
 )
 
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
 handler.setFormatter(formatter)
 
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+if LOG_SAMPLE_RATE < 1.0:
+    queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+logs_dropped = Gauge("logs_dropped", "Log records dropped because the logging queue was full.")
+logs_dropped.set_function(lambda: NonBlockingQueueHandler.dropped)
+
+listener = QueueListener(log_queue, handler, respect_handler_level=True)
+listener.start()
+
+
+def _restart_listener() -> None:
+    # A forked worker inherits the queue but not the listener thread, and the
+    # queue's lock may have been held mid-put at fork time: start afresh.
+    global log_queue, listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler.queue = log_queue
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+
+
+def stop_listener() -> None:
+    listener.stop()
+
+
+os.register_at_fork(after_in_child=_restart_listener)
+atexit.register(stop_listener)
+
 # Configure logging
 logger = logging.getLogger()
-logger.setLevel(logging.DEBUG)
-logger.addHandler(handler)
+logger.setLevel(LOG_LEVEL.upper())
+logger.addHandler(queue_handler)
+
+for module, level in _module_levels(LOG_LEVELS).items():
+    logging.getLogger(module).setLevel(level)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,34 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Packs the sort key of the last row of a page into an opaque token.
+    """
+    raw = json.dumps(values, default=_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> list:
+    """
+    Unpacks a token from `encode_cursor`, converting each value with `types`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return [convert(value) for convert, value in zip(types, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
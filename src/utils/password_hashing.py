@@ -1,18 +1,115 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-# Инициализация контекста для хэширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.config import (
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_WORKERS,
+)
+from src.utils.metrics import Counter, Gauge, Histogram
+
+# Инициализация контекста для хэширования паролей.
+# min/max rounds равны текущему cost, поэтому хэши с другим cost помечаются needs_update.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+password_hash_pending = Gauge(
+    "password_hash_pending",
+    "Hashing operations submitted to the pool and not yet finished.",
+)
+password_hash_seconds = Histogram(
+    "password_hash_seconds",
+    "Wall time of hashing operations including time queued in the pool.",
+    ["operation"],
+)
+password_hash_rejected = Counter(
+    "password_hash_rejected_total",
+    "Hashing operations rejected because the pool queue was full.",
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
 
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
-def hash_password(password: str) -> str:
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded worker pool so it never blocks the event loop.
+
+    At most `max_pending` operations may be queued or running; beyond that
+    callers get a 503 instead of piling up behind a login storm.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int) -> None:
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._pending = 0
+        password_hash_pending.set_function(lambda: self._pending)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, operation: str, func, *args):
+        if self._pending >= self.max_pending:
+            password_hash_rejected.inc()
+            raise HTTPException(status_code=503, detail="Server busy", headers={"Retry-After": "1"})
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self._pending -= 1
+            password_hash_seconds.observe(time.perf_counter() - start, operation=operation)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hasher = PasswordHasher(PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password(password: str) -> str:
     """
     Хэширует пароль с использованием bcrypt.
     """
-    return pwd_context.hash(password)
+    return await hasher.run("hash", _hash, password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Проверяет пароль с хэшированным паролем.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    valid, _ = await verify_and_update(plain_password, hashed_password)
+    return valid
+
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль и возвращает новый хэш, если текущий создан с устаревшими параметрами.
+    """
+    return await hasher.run("verify", _verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,19 @@
+from redis import asyncio as aioredis
+
+from src.config import REDIS_HOST
+from src.utils.instrumentation import TimedRedis
+
+redis: aioredis.Redis | None = None
+
+
+async def init_redis() -> aioredis.Redis:
+    global redis
+    redis = await TimedRedis.from_url(REDIS_HOST, encoding="utf-8", decode_responses=True)
+    return redis
+
+
+def get_redis() -> aioredis.Redis | None:
+    """
+    The connection opened at startup, or None when Redis is not configured yet.
+    """
+    return redis
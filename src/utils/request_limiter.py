@@ -0,0 +1,182 @@
+import asyncio
+import math
+import time
+
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
+
+from src.config import RATE_LIMIT_SYNC_INTERVAL
+from src.user.auth import decode_access_token
+from src.utils.instrumentation import timed
+from src.utils.logging_config import get_logger
+from src.utils.metrics import Counter, Histogram
+
+logger = get_logger(__name__)
+
+rate_limit_rejected = Counter("rate_limit_rejected_total", "Requests rejected by the rate limiter.", ["scope"])
+rate_limit_sync_seconds = Histogram("rate_limit_sync_seconds", "Duration of a limiter sync with its backend.")
+
+
+class InMemoryBackend:
+    """
+    Counter store for a single process (tests, local runs without Redis).
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[str, tuple[int, float]] = {}
+
+    async def sync(self, increments: dict[str, int], ttls: dict[str, int], watched: list[str]) -> dict[str, int]:
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._counts.items() if expires_at <= now]:
+            del self._counts[key]
+        result = {key: self._counts.get(key, (0, None))[0] for key in watched}
+        for key, amount in increments.items():
+            count, expires_at = self._counts.get(key, (0, now + ttls[key]))
+            self._counts[key] = (count + amount, expires_at)
+            result[key] = count + amount
+        return result
+
+
+class RedisBackend:
+    """
+    Shares counters between workers: one pipelined round trip per sync,
+    however many requests were admitted since the last one. Only keys with
+    new hits are written; the rest are read back with a single MGET.
+    """
+
+    def __init__(self, redis) -> None:
+        self.redis = redis
+
+    async def sync(self, increments: dict[str, int], ttls: dict[str, int], watched: list[str]) -> dict[str, int]:
+        pipe = self.redis.pipeline(transaction=False)
+        for key, amount in increments.items():
+            pipe.incrby(key, amount)
+            # Plain EXPIRE (not NX, which needs Redis 7): a window key is only
+            # written during its window, so each write leaves it long enough.
+            pipe.expire(key, ttls[key])
+        if watched:
+            pipe.mget(watched)
+        results = await pipe.execute()
+        totals = {key: int(results[2 * i]) for i, key in enumerate(increments)}
+        if watched:
+            totals.update((key, int(count or 0)) for key, count in zip(watched, results[-1]))
+        return totals
+
+
+class LocalRateLimiter:
+    """
+    Sliding-window counter decided entirely in process memory.
+
+    Each window's count is the last total seen in the backend plus the hits
+    this worker admitted since; `sync` pushes those hits in one batch and pulls
+    the new totals. The previous window is weighted by how much of it still
+    overlaps the sliding window. Between syncs, other workers' hits are not
+    visible, so the cluster may overshoot by at most one sync interval.
+    """
+
+    def __init__(self, backend) -> None:
+        self.backend = backend
+        self._known: dict[str, int] = {}
+        self._pending: dict[str, int] = {}
+        self._ttls: dict[str, int] = {}
+        self._expires: dict[str, float] = {}
+
+    def hit(self, key: str, times: int, seconds: int) -> float:
+        """
+        Admits one request for `key`; returns 0, or seconds to wait if over the limit.
+        """
+        now = time.time()
+        window = int(now // seconds)
+        current, previous = f"rl:{key}:{seconds}:{window}", f"rl:{key}:{seconds}:{window - 1}"
+
+        count = self._known.get(current, 0) + self._pending.get(current, 0)
+        previous_count = self._known.get(previous, 0) + self._pending.get(previous, 0)
+        overlap = 1 - (now % seconds) / seconds
+        if count >= times:
+            return (window + 1) * seconds - now
+        if previous_count * overlap + count >= times:
+            # Wait until the previous window's weight has decayed enough.
+            return max(seconds * (overlap - (times - count) / previous_count), 0.001)
+
+        self._pending[current] = self._pending.get(current, 0) + 1
+        for window_key, end in ((current, (window + 1) * seconds), (previous, window * seconds)):
+            self._ttls[window_key] = 2 * seconds
+            self._expires[window_key] = end + seconds
+        return 0
+
+    async def sync(self) -> None:
+        now = time.time()
+        for key in [key for key, expires_at in self._expires.items() if expires_at <= now]:
+            self._expires.pop(key)
+            self._known.pop(key, None)
+            self._pending.pop(key, None)
+            self._ttls.pop(key, None)
+        if not self._expires:
+            return
+
+        increments, self._pending = self._pending, {}
+        ttls = {key: self._ttls[key] for key in increments}
+        # Count the hits being flushed as known while the round trip is in
+        # flight; `hit` would otherwise see them nowhere.
+        for key, amount in increments.items():
+            self._known[key] = self._known.get(key, 0) + amount
+        # Keys without new hits are still refreshed, so other workers' hits
+        # are seen before this one admits more.
+        watched = [key for key in self._expires if key not in increments]
+
+        start = time.perf_counter()
+        try:
+            totals = await self.backend.sync(increments, ttls, watched)
+        except (RedisError, OSError) as e:
+            logger.warning("Rate limiter sync failed, keeping counts locally: %s", e)
+            for key, amount in increments.items():
+                if key in self._known:
+                    self._known[key] -= amount
+                self._pending[key] = self._pending.get(key, 0) + amount
+            return
+        finally:
+            rate_limit_sync_seconds.observe(time.perf_counter() - start)
+        self._known.update(totals)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(RATE_LIMIT_SYNC_INTERVAL)
+            await self.sync()
+
+
+rate_limiter = LocalRateLimiter(InMemoryBackend())
+
+
+def _identity(request: Request) -> str:
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_access_token(token)['sub']}"
+        except (HTTPException, KeyError):
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimit:
+    """
+    Route dependency: `times` requests per `seconds`, per user (or per IP
+    for anonymous requests) and per endpoint.
+    """
+
+    def __init__(self, times: int, seconds: int) -> None:
+        self.times = int(times)
+        self.seconds = int(seconds)
+
+    async def __call__(self, request: Request) -> None:
+        endpoint = request.scope.get("endpoint")
+        scope = getattr(endpoint, "__name__", request.url.path)
+        with timed("ratelimit"):
+            retry_after = rate_limiter.hit(f"{scope}:{_identity(request)}", self.times, self.seconds)
+        if retry_after:
+            rate_limit_rejected.inc(scope=scope)
+            raise HTTPException(
+                status_code=429,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
@@ -0,0 +1,37 @@
+"""
+Job worker process:
+
+    JOB_BACKEND=redis python -m src.worker
+
+Runs JOB_WORKERS concurrent jobs from the Redis stream until SIGINT/SIGTERM,
+then lets the jobs in flight finish.
+"""
+import asyncio
+import signal
+
+from src.config import JOB_BACKEND, JOB_WORKERS
+from src.note import jobs as note_jobs  # noqa: F401  (registers the note job handlers)
+from src.utils.jobs import RedisJobBackend, job_queue
+from src.utils.logging_config import get_logger
+from src.utils.redis_client import init_redis
+
+logger = get_logger(__name__)
+
+
+async def main() -> None:
+    if JOB_BACKEND != "redis":
+        raise SystemExit("The worker process needs JOB_BACKEND=redis; the memory backend runs inside the API.")
+
+    job_queue.backend = RedisJobBackend(await init_redis())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, job_queue.stop)
+
+    logger.info("Job worker %s started with %s workers", job_queue.consumer, JOB_WORKERS)
+    await job_queue.run(JOB_WORKERS)
+    logger.info("Job worker %s stopped", job_queue.consumer)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+The app runs in-process against a throwaway SQLite database and fakeredis,
+with the in-memory backends for jobs, search, rate limits and the change
+feed. The schema is created once per session; every test signs up its own
+users, and notes are owner-scoped, so tests do not see each other's data.
+"""
+import itertools
+import os
+import tempfile
+
+# Settings are read at import time, so these must be in place before `src` is.
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'dreamnotes_test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("REQUEST_LIMIT_PER_MINUTE", "100000")
+for name in ("JOB_BACKEND", "SEARCH_BACKEND", "RATE_LIMIT_BACKEND", "CHANGE_FEED_BACKEND"):
+    os.environ.setdefault(name, "memory")
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from benchmarks.common import reset_schema, running, use_fakeredis  # noqa: E402
+
+use_fakeredis()
+
+from src.main import app  # noqa: E402
+from src.user.auth import create_access_token  # noqa: E402
+
+_usernames = (f"user{i}" for i in itertools.count())
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client():
+    await reset_schema()
+    async with running(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+@pytest.fixture
+def make_auth(client):
+    """
+    Signs up a fresh user; returns headers authenticating as them.
+    """
+    async def make_auth() -> dict:
+        response = await client.post("/api/users/", json={"username": next(_usernames), "password": "secret"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(response.json()['id'])})}"}
+
+    return make_auth
+
+
+@pytest.fixture
+async def auth(make_auth) -> dict:
+    return await make_auth()
@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from src.utils import redis_client
+
+pytestmark = pytest.mark.anyio
+
+_usernames = (f"auth{i}" for i in itertools.count())
+
+
+@pytest.fixture
+async def account(client) -> tuple[str, dict]:
+    """
+    A signed-up user's name and headers carrying a token from logging in.
+    """
+    username = next(_usernames)
+    await client.post("/api/users/", json={"username": username, "password": "secret"})
+    response = await client.post("/api/users/token", data={"username": username, "password": "secret"})
+    return username, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(redis_client.redis, "set", fail)
+
+
+async def test_logout_revokes_token(client, account):
+    _, auth = account
+
+    assert (await client.post("/api/users/logout", headers=auth)).status_code == 204
+    assert (await client.get("/api/notes/", headers=auth)).status_code == 401
+
+
+async def test_password_change_revokes_tokens(client, account):
+    username, auth = account
+
+    response = await client.post(
+        "/api/users/me/password", json={"old_password": "secret", "new_password": "changed"}, headers=auth
+    )
+
+    assert response.status_code == 204
+    assert (await client.get("/api/notes/", headers=auth)).status_code == 401
+    login = await client.post("/api/users/token", data={"username": username, "password": "changed"})
+    assert login.status_code == 200
+
+
+async def test_logout_without_redis_is_503(client, account, redis_down):
+    _, auth = account
+
+    assert (await client.post("/api/users/logout", headers=auth)).status_code == 503
+
+
+async def test_password_change_without_redis_keeps_old_password(client, account, redis_down):
+    username, auth = account
+
+    response = await client.post(
+        "/api/users/me/password", json={"old_password": "secret", "new_password": "changed"}, headers=auth
+    )
+
+    assert response.status_code == 503
+    login = await client.post("/api/users/token", data={"username": username, "password": "secret"})
+    assert login.status_code == 200
@@ -0,0 +1,70 @@
+import pytest
+
+from src.config import NOTE_BATCH_MAX_IDS
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, auth, content: str = "x", tags: list[str] = ()) -> int:
+    response = await client.post(
+        "/api/notes/", json={"title": "dream", "content": content, "tags": list(tags)}, headers=auth
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def _batch(client, auth, ids: list[int], **params):
+    return await client.post("/api/notes/batch", json={"ids": ids}, params=params, headers=auth)
+
+
+async def test_batch_keeps_request_order_and_reports_missing(client, auth):
+    first, second = await _create(client, auth, "one"), await _create(client, auth, "two")
+
+    response = await _batch(client, auth, [second, 999999, first, second])
+
+    assert response.status_code == 200
+    assert [(item["id"], item["content"]) for item in response.json()["items"]] == [(second, "two"), (first, "one")]
+    assert response.json()["missing"] == [999999]
+
+
+async def test_batch_only_returns_own_notes(client, auth, make_auth):
+    mine, theirs = await _create(client, auth), await _create(client, await make_auth())
+
+    body = (await _batch(client, auth, [theirs, mine])).json()
+
+    assert [item["id"] for item in body["items"]] == [mine]
+    assert body["missing"] == [theirs]
+
+
+async def test_batch_summary_view(client, auth):
+    note_id = await _create(client, auth, "a long dream")
+
+    item = (await _batch(client, auth, [note_id], view="summary")).json()["items"][0]
+
+    assert item["snippet"] == "a long dream" and "content" not in item
+
+
+@pytest.mark.parametrize("size", [0, NOTE_BATCH_MAX_IDS + 1])
+async def test_batch_size_is_bounded(client, auth, size):
+    assert (await _batch(client, auth, list(range(1, size + 1)))).status_code == 422
+
+
+async def test_legacy_tag_route_matches_new_one(client, auth):
+    note_id = await _create(client, auth, tags=["flying"])
+
+    legacy = await client.get("/api/notes/flying", headers=auth)
+    current = await client.get("/api/notes/tags/flying", headers=auth)
+
+    assert legacy.status_code == current.status_code == 200
+    assert [item["id"] for item in legacy.json()["items"]] == [note_id]
+    assert legacy.json() == current.json()
+
+
+async def test_numeric_path_is_a_note_lookup(client, auth):
+    # `/notes/2024` used to list notes tagged "2024"; numeric tags now need `/notes/tags/`.
+    note_id = await _create(client, auth, tags=["2024"])
+
+    assert (await client.get("/api/notes/2024", headers=auth)).status_code == 404
+    assert (await client.get(f"/api/notes/{note_id}", headers=auth)).json()["id"] == note_id
+    by_tag = await client.get("/api/notes/tags/2024", headers=auth)
+    assert [item["id"] for item in by_tag.json()["items"]] == [note_id]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from src.note import dao, router
+
+pytestmark = pytest.mark.anyio
+
+
+def _ndjson(*lines) -> bytes:
+    return b"\n".join(line if isinstance(line, bytes) else json.dumps(line).encode() for line in lines) + b"\n"
+
+
+async def _import(client, auth, body: bytes) -> dict:
+    response = await client.post(
+        "/api/notes/bulk", content=body, headers={**auth, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_malformed_lines_are_reported_and_the_rest_imported(client, auth, monkeypatch):
+    monkeypatch.setattr(router, "NOTE_BULK_BATCH_SIZE", 2)
+
+    result = await _import(client, auth, _ndjson(
+        {"title": "one", "content": "a", "tags": ["sea"]},
+        b"{not json",
+        {"title": "two", "content": "b"},
+        b"",
+        {"content": "no title"},
+        {"title": "three", "content": "c"},
+    ))
+
+    assert result["inserted"] == 3
+    assert [error["line"] for error in result["errors"]] == [2, 5]
+    assert "title" in result["errors"][1]["error"]
+    listed = (await client.get("/api/notes/", headers=auth)).json()["items"]
+    assert sorted(note["id"] for note in listed) == sorted(result["ids"])
+
+
+async def test_lines_past_the_cap_are_refused(client, auth, monkeypatch):
+    monkeypatch.setattr(router, "NOTE_BULK_MAX_LINES", 3)
+
+    result = await _import(client, auth, _ndjson(*({"title": f"n{i}", "content": "x"} for i in range(5))))
+
+    assert result["inserted"] == 3
+    assert result["errors"] == [{"line": 4, "error": "Import is limited to 3 lines"}]
+
+
+async def test_export_streams_every_note_of_the_owner_only(client, auth, make_auth, monkeypatch):
+    monkeypatch.setattr(dao, "NOTE_EXPORT_CHUNK_SIZE", 2)
+    imported = await _import(client, auth, _ndjson(*({"title": f"n{i}", "content": "x"} for i in range(5))))
+    await _import(client, await make_auth(), _ndjson({"title": "someone else", "content": "y"}))
+
+    response = await client.get("/api/notes/export", headers=auth)
+    exported = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [note["id"] for note in exported] == imported["ids"]
+    assert [note["title"] for note in exported] == [f"n{i}" for i in range(5)]
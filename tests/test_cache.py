@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import update
+
+from src.database import async_session
+from src.note import recompress, stats
+from src.note.model import Tag
+from src.user.auth import decode_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_unchanged_list_answers_304(client, auth):
+    await client.post("/api/notes/", json={"title": "dream", "content": "I was flying"}, headers=auth)
+    first = await client.get("/api/notes/", headers=auth)
+
+    again = await client.get("/api/notes/", headers={**auth, "If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+    assert again.content == b""
+
+
+async def test_write_invalidates_etag(client, auth):
+    await client.post("/api/notes/", json={"title": "dream", "content": "I was flying"}, headers=auth)
+    first = await client.get("/api/notes/", headers=auth)
+    await client.post("/api/notes/", json={"title": "another", "content": "I was falling"}, headers=auth)
+
+    again = await client.get("/api/notes/", headers={**auth, "If-None-Match": first.headers["etag"]})
+
+    assert again.status_code == 200
+    assert again.headers["etag"] != first.headers["etag"]
+    assert [item["title"] for item in again.json()["items"]] == ["another", "dream"]
+
+
+async def test_etag_does_not_carry_over_to_another_user(client, auth, make_auth):
+    first = await client.get("/api/notes/", headers=auth)
+
+    again = await client.get("/api/notes/", headers={**await make_auth(), "If-None-Match": first.headers["etag"]})
+
+    assert again.status_code == 200
+
+
+async def test_stats_rebuild_invalidates_cached_stats(client, auth):
+    owner_id = int(decode_access_token(auth["Authorization"].removeprefix("Bearer "))["sub"])
+    await client.post("/api/notes/", json={"title": "dream", "content": "x", "tags": ["sea"]}, headers=auth)
+    async with async_session() as session:
+        # Drift the counter behind the cache's back, then cache the wrong stats.
+        await session.execute(update(Tag).filter(Tag.owner_id == owner_id).values(note_count=5))
+        await session.commit()
+    stale = await client.get("/api/notes/stats", headers=auth)
+
+    async with async_session() as session:
+        await stats.rebuild(session, owner_id)
+    again = await client.get("/api/notes/stats", headers={**auth, "If-None-Match": stale.headers["etag"]})
+
+    assert stale.json()["tags"] == {"sea": 5}
+    assert again.status_code == 200
+    assert again.json()["tags"] == {"sea": 1}
+
+
+async def test_recompress_invalidates_cached_lists(client, auth):
+    await client.post("/api/notes/", json={"title": "dream", "content": "I was flying"}, headers=auth)
+    first = await client.get("/api/notes/", headers=auth)
+
+    await recompress.recompress(1000)
+    again = await client.get("/api/notes/", headers={**auth, "If-None-Match": first.headers["etag"]})
+
+    assert again.status_code == 200
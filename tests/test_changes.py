@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from src.note.changes import ChangeFeed, MemoryChangeLog
+
+pytestmark = pytest.mark.anyio
+
+
+async def _take(events, count: int) -> list:
+    return [await asyncio.wait_for(anext(events), 1) for _ in range(count)]
+
+
+async def test_subscriber_receives_published_events():
+    feed = ChangeFeed(MemoryChangeLog(100), 10)
+    events = feed.subscribe(1)
+    pending = asyncio.ensure_future(_take(events, 2))
+    await asyncio.sleep(0.01)
+
+    await feed.publish(1, [{"type": "created", "note_id": 1}])
+    await feed.publish(2, [{"type": "created", "note_id": 2}])
+    await feed.publish(1, [{"type": "deleted", "note_id": 1}])
+
+    assert [event["type"] for _, event in await pending] == ["created", "deleted"]
+    await events.aclose()
+
+
+async def test_resume_replays_missed_events_once():
+    feed = ChangeFeed(MemoryChangeLog(100), 10)
+    for note_id in (1, 2, 3):
+        await feed.publish(1, [{"type": "created", "note_id": note_id}])
+    first_id = (await feed.log.read(1, "0-0"))[0][0][0]
+
+    events = feed.subscribe(1, first_id)
+    replayed = await _take(events, 2)
+    await feed.publish(1, [{"type": "created", "note_id": 4}])
+    live = await _take(events, 1)
+
+    assert [event["note_id"] for _, event in replayed + live] == [2, 3, 4]
+    await events.aclose()
+
+
+async def test_resume_past_trimmed_history_resets():
+    feed = ChangeFeed(MemoryChangeLog(2), 10)
+    await feed.publish(1, [{"type": "created", "note_id": 1}])
+    first_id = await feed.log.latest(1)
+    for note_id in (2, 3, 4):
+        await feed.publish(1, [{"type": "created", "note_id": note_id}])
+
+    events = feed.subscribe(1, first_id)
+
+    assert [event["type"] for _, event in await _take(events, 1)] == ["reset"]
+    await events.aclose()
@@ -0,0 +1,61 @@
+import pytest
+
+from src.utils.compression import compress_text, decompress_text
+
+pytestmark = pytest.mark.anyio
+
+TEXT = "I was walking through a house with too many doors. " * 100
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib", "zstd"])
+@pytest.mark.parametrize("text", ["", "short dream", TEXT])
+def test_stored_text_round_trips(codec, text):
+    assert decompress_text(compress_text(text, codec, 6, 64)) == text
+
+
+def test_small_text_is_stored_plain():
+    assert compress_text("short dream", "zlib", 6, 64) == b"short dream"
+
+
+@pytest.fixture
+async def note_headers(client, auth):
+    await client.post("/api/notes/", json={"title": "dream", "content": TEXT}, headers=auth)
+    return auth
+
+
+async def test_large_response_is_compressed(client, note_headers):
+    response = await client.get("/api/notes/", headers={**note_headers, "Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"].startswith("W/")
+    assert response.json()["items"][0]["content"] == TEXT
+
+
+async def test_identity_response_still_varies(client, note_headers):
+    response = await client.get("/api/notes/", headers={**note_headers, "Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+async def test_small_response_still_varies(client, note_headers):
+    # A one-item summary page stays under RESPONSE_COMPRESSION_MIN_SIZE.
+    response = await client.get(
+        "/api/notes/", params={"view": "summary"}, headers={**note_headers, "Accept-Encoding": "gzip"}
+    )
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+async def test_not_modified_varies_like_the_full_response(client, note_headers):
+    first = await client.get("/api/notes/", headers={**note_headers, "Accept-Encoding": "gzip"})
+
+    again = await client.get(
+        "/api/notes/", headers={**note_headers, "Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]}
+    )
+
+    assert again.status_code == 304
+    assert again.headers["vary"] == "Accept-Encoding"
+
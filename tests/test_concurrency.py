@@ -0,0 +1,59 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, auth) -> dict:
+    response = await client.post("/api/notes/", json={"title": "dream", "content": "I was flying"}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_update_with_current_version(client, auth):
+    note = await _create(client, auth)
+
+    response = await client.put(
+        f"/api/notes/{note['id']}", json={"title": "again"}, headers={**auth, "If-Match": '"1"'}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["etag"] == '"2"'
+
+
+async def test_update_with_stale_version_is_rejected(client, auth):
+    note = await _create(client, auth)
+    await client.put(f"/api/notes/{note['id']}", json={"title": "first"}, headers=auth)
+
+    response = await client.put(
+        f"/api/notes/{note['id']}", json={"title": "second"}, headers={**auth, "If-Match": 'W/"1"'}
+    )
+
+    assert response.status_code == 412
+    assert (await client.put(f"/api/notes/{note['id']}", json={}, headers=auth)).json()["title"] == "first"
+
+
+@pytest.mark.parametrize("if_match, status", [("*", 200), ("banana", 400)])
+async def test_update_if_match_forms(client, auth, if_match, status):
+    note = await _create(client, auth)
+
+    response = await client.put(
+        f"/api/notes/{note['id']}", json={"title": "again"}, headers={**auth, "If-Match": if_match}
+    )
+
+    assert response.status_code == status
+
+
+async def test_missing_note_is_not_a_conflict(client, auth):
+    response = await client.put("/api/notes/999999", json={"title": "x"}, headers={**auth, "If-Match": '"1"'})
+
+    assert response.status_code == 404
+
+
+async def test_delete_checks_version(client, auth):
+    note = await _create(client, auth)
+
+    stale = await client.delete(f"/api/notes/{note['id']}", headers={**auth, "If-Match": '"7"'})
+    current = await client.delete(f"/api/notes/{note['id']}", headers={**auth, "If-Match": '"1"'})
+
+    assert (stale.status_code, current.status_code) == (412, 204)
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.utils import jobs
+from src.utils.jobs import InMemoryJobBackend, JobQueue, job_handler
+
+pytestmark = pytest.mark.anyio
+
+runs: list[dict] = []
+
+
+@job_handler("test.record")
+async def record(payload: dict) -> None:
+    runs.append(payload)
+    if payload.get("fail"):
+        raise RuntimeError("handler failed")
+
+
+@pytest.fixture
+async def queue(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_RETRY_DELAY", 0.001)
+    runs.clear()
+    queue = JobQueue(InMemoryJobBackend(), fetch_timeout=0.01)
+    worker = asyncio.create_task(queue.run(2))
+    yield queue
+    queue.stop()
+    await worker
+
+
+async def _drain(queue: JobQueue) -> None:
+    await asyncio.wait_for(queue.backend.join(), 5)
+
+
+async def test_job_with_key_runs_once(queue):
+    await queue.enqueue("test.record", {"n": 1}, key="index:1:2")
+    await queue.enqueue("test.record", {"n": 1}, key="index:1:2")
+    await queue.enqueue("test.record", {"n": 2})
+
+    await _drain(queue)
+
+    assert sorted(run["n"] for run in runs) == [1, 2]
+
+
+async def test_failing_job_is_retried_then_buried(queue):
+    await queue.enqueue("test.record", {"fail": True})
+
+    await _drain(queue)
+
+    assert len(runs) == jobs.JOB_MAX_ATTEMPTS
+    [(job, error)] = queue.backend.dead
+    assert job.attempt == jobs.JOB_MAX_ATTEMPTS - 1
+    assert "handler failed" in error
+
+
+async def test_unknown_job_is_buried(queue):
+    await queue.enqueue("test.missing", {})
+
+    await _drain(queue)
+
+    assert queue.backend.dead[0][1] == "no handler registered"
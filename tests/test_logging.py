@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueListener, TimedRotatingFileHandler
+
+from src.utils.logging_config import JsonFormatter, NonBlockingQueueHandler
+
+
+def _log_through_queue(path, emit) -> list[dict]:
+    file_handler = TimedRotatingFileHandler(path, when="midnight")
+    file_handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(10)
+    listener = QueueListener(log_queue, file_handler)
+    logger = logging.getLogger("tests.logging")
+    logger.propagate = False
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+    try:
+        emit(logger)
+        listener.start()
+    finally:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+        file_handler.close()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_record_reaches_file_with_message_as_logged(tmp_path):
+    def emit(logger):
+        ids = [1, 2]
+        logger.warning("Notes %s for user ID: %s", ids, 7, extra={"request_id": "abc"})
+        # Mutated after the call, before the listener thread formats it.
+        ids.append(3)
+
+    [entry] = _log_through_queue(tmp_path / "app.log", emit)
+
+    assert entry["message"] == "Notes [1, 2] for user ID: 7"
+    assert entry["level"] == "WARNING"
+    assert entry["request_id"] == "abc"
+
+
+def test_traceback_is_rendered_before_enqueueing(tmp_path):
+    def emit(logger):
+        try:
+            raise ValueError("bad note")
+        except ValueError:
+            logger.exception("Failed")
+        assert sys.exc_info() == (None, None, None)
+
+    [entry] = _log_through_queue(tmp_path / "app.log", emit)
+
+    assert entry["message"] == "Failed"
+    assert "ValueError: bad note" in entry["exc"]
+
+
+def test_full_queue_drops_records():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    before = NonBlockingQueueHandler.dropped
+
+    for _ in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "dream"}))
+
+    assert NonBlockingQueueHandler.dropped == before + 2
@@ -0,0 +1,70 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _follow(client, auth, url: str, limit: int) -> tuple[list[int], int]:
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params, headers=auth)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids += [item["id"] for item in page["items"]]
+        pages += 1
+        assert pages <= 20, "cursor did not advance"
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+async def _create(client, auth, count: int, tags: list[str]) -> list[int]:
+    # Created back to back through the API, so several share the same second.
+    ids = []
+    for i in range(count):
+        response = await client.post(
+            "/api/notes/", json={"title": f"dream {i}", "content": "I was flying", "tags": tags}, headers=auth
+        )
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+@pytest.mark.parametrize("url", ["/api/notes/", "/api/notes/tags/flying"])
+async def test_cursor_visits_every_note_once(client, auth, url):
+    created = await _create(client, auth, 15, ["flying"])
+
+    ids, pages = await _follow(client, auth, url, 4)
+
+    assert ids == created[::-1]
+    assert pages == 4
+
+
+async def test_cursor_filters_by_tag(client, auth):
+    flying = await _create(client, auth, 5, ["flying"])
+    await _create(client, auth, 5, ["falling"])
+
+    ids, _ = await _follow(client, auth, "/api/notes/tags/flying", 2)
+
+    assert ids == flying[::-1]
+
+
+async def test_updated_note_moves_to_first_page(client, auth):
+    created = await _create(client, auth, 6, [])
+    response = await client.put(f"/api/notes/{created[0]}", json={"title": "again"}, headers=auth)
+    assert response.status_code == 200, response.text
+
+    ids, _ = await _follow(client, auth, "/api/notes/", 4)
+
+    assert ids == [created[0], *created[:0:-1]]
+
+
+@pytest.mark.parametrize("url", ["/api/notes/", "/api/notes/tags/offset"])
+async def test_skip_still_pages_by_offset_as_a_bare_list(client, auth, url):
+    created = await _create(client, auth, 5, ["offset"])
+
+    response = await client.get(url, params={"limit": 2, "skip": 2}, headers=auth)
+
+    assert [item["id"] for item in response.json()] == created[::-1][2:4]
+    summaries = await client.get(url, params={"limit": 2, "skip": 2, "view": "summary"}, headers=auth)
+    assert [item["id"] for item in summaries.json()] == created[::-1][2:4]
@@ -0,0 +1,116 @@
+import asyncio
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError
+
+from src.utils.request_limiter import InMemoryBackend, LocalRateLimiter, RedisBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingBackend(InMemoryBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    async def sync(self, increments, ttls, watched):
+        self.calls.append((dict(increments), list(watched)))
+        return await super().sync(increments, ttls, watched)
+
+
+async def test_only_new_hits_are_written():
+    backend = RecordingBackend()
+    limiter = LocalRateLimiter(backend)
+    limiter.hit("read:user:1", 10, 60)
+    limiter.hit("read:user:1", 10, 60)
+    await limiter.sync()
+    await limiter.sync()
+
+    (first_increments, _), (second_increments, second_watched) = backend.calls
+    assert list(first_increments.values()) == [2]
+    assert second_increments == {}
+    # The window just written to is still read back for other workers' hits.
+    assert set(first_increments) < set(second_watched)
+
+
+async def test_workers_see_each_others_hits():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    first, second = LocalRateLimiter(RedisBackend(redis)), LocalRateLimiter(RedisBackend(redis))
+    assert first.hit("read:user:1", 3, 60) == 0
+    await first.sync()
+    assert second.hit("read:user:1", 3, 60) == 0
+    assert second.hit("read:user:1", 3, 60) == 0
+    await second.sync()
+
+    # `first` has no new hits; the sync only reads the shared total.
+    await first.sync()
+
+    assert first.hit("read:user:1", 3, 60) > 0
+    window_key = next(key for key in await redis.keys("rl:*"))
+    assert await redis.get(window_key) == "3"
+    assert 0 < await redis.ttl(window_key) <= 120
+
+
+async def test_failed_sync_keeps_hits_for_the_next():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    limiter = LocalRateLimiter(RedisBackend(redis))
+    limiter.hit("read:user:1", 3, 60)
+    execute = redis.pipeline
+
+    def broken_pipeline(*args, **kwargs):
+        pipe = execute(*args, **kwargs)
+
+        async def fail():
+            raise ConnectionError("Redis is down")
+
+        pipe.execute = fail
+        return pipe
+
+    redis.pipeline = broken_pipeline
+    await limiter.sync()
+    redis.pipeline = execute
+    await limiter.sync()
+
+    assert [await redis.get(key) for key in await redis.keys("rl:*")] == ["1"]
+
+
+class SlowBackend(InMemoryBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = asyncio.Event()
+        self.fail = False
+
+    async def sync(self, increments, ttls, watched):
+        await self.release.wait()
+        if self.fail:
+            raise ConnectionError("Redis is down")
+        return await super().sync(increments, ttls, watched)
+
+
+@pytest.mark.parametrize("fail", [False, True])
+async def test_hits_in_flight_still_count(fail):
+    backend = SlowBackend()
+    backend.fail = fail
+    limiter = LocalRateLimiter(backend)
+    for _ in range(3):
+        assert limiter.hit("read:user:1", 3, 60) == 0
+
+    sync = asyncio.ensure_future(limiter.sync())
+    await asyncio.sleep(0)
+    limited_during_sync = limiter.hit("read:user:1", 3, 60)
+    backend.release.set()
+    await sync
+
+    assert limited_during_sync > 0
+    assert limiter.hit("read:user:1", 3, 60) > 0
+
+
+async def test_successful_sync_does_not_double_count():
+    limiter = LocalRateLimiter(InMemoryBackend())
+    for _ in range(3):
+        limiter.hit("read:user:1", 5, 60)
+
+    await limiter.sync()
+
+    assert [limiter.hit("read:user:1", 5, 60) == 0 for _ in range(3)] == [True, True, False]
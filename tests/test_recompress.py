@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session
+from src.note import recompress
+from src.note.model import Note
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_recompress_keeps_notes_intact(client, auth):
+    text = "I was flying over the sea. " * 100
+    note = (await client.post("/api/notes/", json={"title": "dream", "content": text}, headers=auth)).json()
+
+    await recompress.recompress(100)
+
+    async with async_session() as session:
+        row = (await session.execute(
+            select(Note.content, Note.version, Note.updated_at).filter(Note.id == note["id"])
+        )).one()
+    assert row.content == text
+    assert row.version == 1
+    assert row.updated_at.isoformat() == note["updated_at"]
+
+
+async def test_recompress_skips_notes_edited_after_read(client, auth, monkeypatch):
+    note = (await client.post("/api/notes/", json={"title": "dream", "content": "old body"}, headers=auth)).json()
+    execute = AsyncSession.execute
+
+    # The user's edit lands between the batch read and its rewrite.
+    async def edit_first(self, statement, *args, **kwargs):
+        if statement.is_dml:
+            monkeypatch.setattr(AsyncSession, "execute", execute)
+            async with async_session() as other:
+                await other.execute(
+                    update(Note).filter(Note.id == note["id"]).values(content="new body", version=Note.version + 1)
+                )
+                await other.commit()
+        return await execute(self, statement, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncSession, "execute", edit_first)
+    await recompress.recompress(100000)
+
+    async with async_session() as session:
+        assert await session.scalar(select(Note.content).filter(Note.id == note["id"])) == "new body"
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import database
+from src.database import ReplicaRouter, async_engine, async_session, mark_write, use_replica
+from src.note.model import Note
+
+pytestmark = pytest.mark.anyio
+
+STICKY_SECONDS = 0.2
+
+
+@pytest.fixture
+async def router(client, monkeypatch):
+    # `client` starts the app, so the sticky window is shared through (fake) Redis too.
+    monkeypatch.setattr(database, "REPLICA_STICKY_SECONDS", STICKY_SECONDS)
+    reader = create_async_engine("sqlite+aiosqlite://")
+    router = ReplicaRouter(async_engine, [reader])
+    monkeypatch.setattr(database, "replica_router", router)
+    yield router
+    await reader.dispose()
+
+
+def _bind(session, clause):
+    return session.sync_session.get_bind(clause=clause)
+
+
+async def test_reads_go_to_the_replica_and_writes_to_the_primary(router):
+    async with async_session() as session:
+        await use_replica(session, 1)
+
+        assert _bind(session, select(Note.id)) is router.readers[0].sync_engine
+        assert _bind(session, insert(Note)) is router.writer.sync_engine
+        assert _bind(session, update(Note)) is router.writer.sync_engine
+
+
+async def test_sessions_read_from_the_primary_until_use_replica(router):
+    async with async_session() as session:
+        assert _bind(session, select(Note.id)) is router.writer.sync_engine
+
+
+async def test_reads_stay_on_the_primary_within_the_sticky_window(router):
+    async with async_session() as session:
+        await use_replica(session, 2)
+        await mark_write(session, 2)
+
+        assert _bind(session, select(Note.id)) is router.writer.sync_engine
+
+    async with async_session() as session:
+        await use_replica(session, 2)
+        assert _bind(session, select(Note.id)) is router.writer.sync_engine
+
+    async with async_session() as session:
+        await use_replica(session, 3)
+        assert _bind(session, select(Note.id)) is router.readers[0].sync_engine
+
+    await asyncio.sleep(STICKY_SECONDS * 1.5)
+    async with async_session() as session:
+        await use_replica(session, 2)
+        assert _bind(session, select(Note.id)) is router.readers[0].sync_engine
+
+
+async def test_sticky_window_is_shared_between_workers(router):
+    await router.mark_write(4)
+    other_worker = ReplicaRouter(router.writer, router.readers)
+
+    assert await other_worker.is_sticky(4)
+    assert not await other_worker.is_sticky(5)
+
+
+async def test_reads_fall_back_to_the_primary_without_healthy_replicas(router):
+    router.healthy = []
+    async with async_session() as session:
+        await use_replica(session, 6)
+        assert _bind(session, select(Note.id)) is router.writer.sync_engine
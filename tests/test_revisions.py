@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from src.note import revisions
+
+pytestmark = pytest.mark.anyio
+
+
+def test_delta_round_trip():
+    rng = random.Random(3)
+    for _ in range(500):
+        source, target = ("".join(rng.choice("ab. \nxé!") for _ in range(rng.randint(0, 80))) for _ in range(2))
+        assert revisions.apply_delta(source, revisions.make_delta(source, target)) == target
+
+
+def test_small_edit_is_stored_as_delta():
+    old = "I was flying over the sea. The waves were singing!\n" * 100
+    replaced = {"version": 3, "title": "t", "content": old, "tags": "", "updated_at": None}
+
+    row = revisions.revision_row(1, 1, replaced, old + "Then I woke up.")
+
+    assert not row["snapshot"]
+    assert len(row["content"]) < 100
+
+
+@pytest.fixture
+async def history(client, auth, monkeypatch):
+    """
+    A note with 13 versions, every third a tag-only edit; maps each version
+    to its (title, content, tags).
+    """
+    # Short interval, so rebuilds cross snapshots as well as the live note.
+    monkeypatch.setattr(revisions, "NOTE_REVISION_SNAPSHOT_INTERVAL", 5)
+    text = "I was flying over the sea. The waves were singing!\nThen I woke up. " * 30
+    response = await client.post("/api/notes/", json={"title": "t1", "content": text, "tags": ["a"]}, headers=auth)
+    note = response.json()
+    versions = {1: (note["title"], note["content"], note["tags"])}
+    for version in range(2, 14):
+        text = text.replace("sea", f"sea{version}", 1) + f"Edit {version}. "
+        body = {"title": f"t{version}", "content": text} if version % 3 else {"tags": [f"tag{version}"]}
+        response = await client.put(f"/api/notes/{note['id']}", json=body, headers=auth)
+        assert response.status_code == 200, response.text
+        updated = response.json()
+        versions[updated["version"]] = (updated["title"], updated["content"], updated["tags"])
+    return note["id"], versions
+
+
+async def test_every_version_rebuilds(client, auth, history):
+    note_id, versions = history
+
+    for version, expected in versions.items():
+        revision = (await client.get(f"/api/notes/{note_id}/revisions/{version}", headers=auth)).json()
+        assert (revision["title"], revision["content"], revision["tags"]) == expected, version
+
+
+async def test_revisions_page_newest_first(client, auth, history):
+    note_id, _ = history
+
+    first = (await client.get(f"/api/notes/{note_id}/revisions", params={"limit": 5}, headers=auth)).json()
+    second = (await client.get(
+        f"/api/notes/{note_id}/revisions", params={"limit": 5, "cursor": first["next_cursor"]}, headers=auth
+    )).json()
+
+    assert [item["version"] for item in first["items"] + second["items"]] == list(range(12, 2, -1))
+
+
+async def test_restore_writes_a_new_version(client, auth, history):
+    note_id, versions = history
+
+    stale = await client.post(
+        f"/api/notes/{note_id}/restore", json={"version": 2}, headers={**auth, "If-Match": '"1"'}
+    )
+    restored = await client.post(f"/api/notes/{note_id}/restore", json={"version": 2}, headers=auth)
+    latest = (await client.get(f"/api/notes/{note_id}/revisions/13", headers=auth)).json()
+
+    assert stale.status_code == 412
+    assert restored.json()["version"] == 14
+    assert (restored.json()["title"], restored.json()["content"], restored.json()["tags"]) == versions[2]
+    assert (latest["title"], latest["content"], latest["tags"]) == versions[13]
+
+
+@pytest.mark.parametrize("body, status", [
+    ({"at": "2001-01-01T00:00:00Z"}, 404),
+    ({"at": "2100-01-01T00:00:00+02:00"}, 200),
+    ({}, 422),
+])
+async def test_restore_at(client, auth, history, body, status):
+    note_id, _ = history
+
+    response = await client.post(f"/api/notes/{note_id}/restore", json=body, headers=auth)
+
+    assert response.status_code == status
+
+
+async def test_revisions_are_private_and_deleted_with_note(client, auth, make_auth, history):
+    note_id, _ = history
+
+    other = await client.get(f"/api/notes/{note_id}/revisions", headers=await make_auth())
+    missing = await client.get(f"/api/notes/{note_id}/revisions/99", headers=auth)
+    await client.delete(f"/api/notes/{note_id}", headers=auth)
+    gone = await client.get(f"/api/notes/{note_id}/revisions/2", headers=auth)
+
+    assert (other.status_code, missing.status_code, gone.status_code) == (404, 404, 404)
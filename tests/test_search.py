@@ -0,0 +1,66 @@
+import pytest
+
+from src.utils.jobs import job_queue
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, auth, title: str, content: str) -> int:
+    response = await client.post("/api/notes/", json={"title": title, "content": content}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def _search(client, auth, q: str, **params) -> dict:
+    # Notes are indexed by background jobs.
+    await job_queue.backend.join()
+    response = await client.get("/api/notes/search", params={"q": q, **params}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_results_are_ranked_by_relevance(client, auth):
+    once = await _create(client, auth, "dream", "A whale passed by while we talked about the weather for hours.")
+    often = await _create(client, auth, "whale", "The whale sang, and another whale answered.")
+    await _create(client, auth, "other", "Nothing about the sea here.")
+
+    page = await _search(client, auth, "whale")
+
+    assert [item["id"] for item in page["items"]] == [often, once]
+    assert page["items"][0]["rank"] > page["items"][1]["rank"]
+    assert "<b>whale</b>" in page["items"][0]["headline"]
+
+
+async def test_all_terms_must_match(client, auth):
+    both = await _create(client, auth, "sea", "A blue whale in the sea.")
+    await _create(client, auth, "sea", "Only the sea.")
+
+    assert [item["id"] for item in (await _search(client, auth, "whale SEA"))["items"]] == [both]
+
+
+async def test_cursor_pages_through_hits(client, auth):
+    ids = {await _create(client, auth, f"note {i}", "lighthouse " * (i + 1)) for i in range(5)}
+
+    first = await _search(client, auth, "lighthouse", limit=2)
+    rest = await _search(client, auth, "lighthouse", limit=10, cursor=first["next_cursor"])
+
+    assert {item["id"] for item in first["items"] + rest["items"]} == ids
+    assert len(first["items"]) == 2 and rest["next_cursor"] is None
+
+
+async def test_index_follows_updates_deletes_and_owners(client, auth, make_auth):
+    note_id = await _create(client, auth, "dream", "a volcano")
+    gone = await _create(client, auth, "dream", "a volcano too")
+    await client.put(f"/api/notes/{note_id}", json={"content": "a glacier"}, headers=auth)
+    await client.delete(f"/api/notes/{gone}", headers=auth)
+
+    assert (await _search(client, auth, "volcano"))["items"] == []
+    assert [item["id"] for item in (await _search(client, auth, "glacier"))["items"]] == [note_id]
+    assert (await _search(client, await make_auth(), "glacier"))["items"] == []
+
+
+async def test_queries_without_terms(client, auth):
+    await _create(client, auth, "dream", "words")
+
+    assert (await _search(client, auth, "!!!")) == {"items": [], "next_cursor": None}
+    assert (await client.get("/api/notes/search", params={"q": ""}, headers=auth)).status_code == 422
@@ -0,0 +1,36 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _stats(client, auth) -> dict:
+    response = await client.get("/api/notes/stats", headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_counts_follow_creates_updates_and_deletes(client, auth):
+    ids = []
+    for tags in (["flying", "sea"], ["flying"], ["falling"]):
+        response = await client.post("/api/notes/", json={"title": "dream", "content": "x", "tags": tags}, headers=auth)
+        ids.append(response.json()["id"])
+    await client.put(f"/api/notes/{ids[1]}", json={"tags": ["sea", "Falling"]}, headers=auth)
+    await client.delete(f"/api/notes/{ids[2]}", headers=auth)
+
+    stats = await _stats(client, auth)
+
+    assert stats["total"] == 2
+    assert stats["tags"] == {"flying": 1, "sea": 2, "falling": 1}
+    assert sum(stats["months"].values()) == 2
+
+
+async def test_tag_lookup_matches_counts(client, auth):
+    for tags in (["flying", "sea"], ["sea"]):
+        await client.post("/api/notes/", json={"title": "dream", "content": "x", "tags": tags}, headers=auth)
+
+    stats = await _stats(client, auth)
+    any_match = (await client.get("/api/notes/tags/flying,sea", headers=auth)).json()["items"]
+    all_match = (await client.get("/api/notes/tags/flying,sea", params={"match": "all"}, headers=auth)).json()["items"]
+
+    assert stats["tags"] == {"flying": 1, "sea": 2}
+    assert (len(any_match), len(all_match)) == (2, 1)
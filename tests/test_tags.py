@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import Select, false
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.note.model import Tag
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, auth, tags: list[str]) -> int:
+    response = await client.post("/api/notes/", json={"title": "dream", "content": "x", "tags": tags}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def _ids(client, auth, prompt: str, **params) -> set[int]:
+    response = await client.get(f"/api/notes/tags/{prompt}", params=params, headers=auth)
+    assert response.status_code == 200, response.text
+    return {item["id"] for item in response.json()["items"]}
+
+
+async def test_match_any_and_all(client, auth):
+    both = await _create(client, auth, ["flying", "sea"])
+    flying = await _create(client, auth, ["Flying"])
+    sea = await _create(client, auth, ["sea "])
+    await _create(client, auth, ["falling"])
+
+    assert await _ids(client, auth, "flying,sea") == {both, flying, sea}
+    assert await _ids(client, auth, "flying,sea", match="all") == {both}
+    assert await _ids(client, auth, "SEA") == {both, sea}
+    assert await _ids(client, auth, "nowhere") == set()
+
+
+async def test_tags_are_per_owner(client, auth, make_auth):
+    await _create(client, auth, ["flying"])
+
+    assert await _ids(client, await make_auth(), "flying") == set()
+
+
+async def test_tag_created_concurrently_is_reused(client, auth, monkeypatch):
+    await _create(client, auth, ["flying"])
+    execute = AsyncSession.execute
+
+    # The lookup misses "flying", as if another request created it just after.
+    async def miss_existing_tags(self, statement, *args, **kwargs):
+        if (
+            isinstance(statement, Select)
+            and statement.get_final_froms() == [Tag.__table__]
+            and list(statement.selected_columns.keys()) == ["name", "id"]
+        ):
+            monkeypatch.setattr(AsyncSession, "execute", execute)
+            statement = statement.filter(false())
+        return await execute(self, statement, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncSession, "execute", miss_existing_tags)
+    note_id = await _create(client, auth, ["flying"])
+
+    assert note_id in await _ids(client, auth, "flying")
+    assert (await client.get("/api/notes/stats", headers=auth)).json()["tags"] == {"flying": 2}